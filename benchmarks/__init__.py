@@ -0,0 +1 @@
+"""Benchmarks for News Mailer (not shipped with the package)."""
@@ -0,0 +1,335 @@
+"""Local HTTP stand-ins for NewsAPI, Gemini and Brevo.
+
+Each fake runs a ``ThreadingHTTPServer`` on an ephemeral localhost port and
+speaks just enough of the real wire format for the production clients:
+
+* :class:`FakeNewsAPI` – ``GET /v2/everything`` (synthetic or recorded articles)
+* :class:`FakeGemini` – ``POST /v1beta/models/<model>:generateContent`` and
+  ``:streamGenerateContent`` as used by the SDK's ``transport="rest"``
+* :class:`FakeBrevo` – ``POST /v3/smtp/email`` including ``messageVersions``
+
+Latency, jitter, error rate and payload size are set per service through
+:class:`ServiceProfile`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+
+@dataclass
+class ServiceProfile:
+    """Behaviour of one fake service.
+
+    *latency* (plus up to *jitter* extra seconds) is slept before answering;
+    a fraction *error_rate* of requests is answered with *error_status*.
+    """
+
+    latency: float = 0.05
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    seed: int | None = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - keep stdout quiet
+        pass
+
+    def do_GET(self):
+        self.server.fake.dispatch(self, "GET")
+
+    def do_POST(self):
+        self.server.fake.dispatch(self, "POST")
+
+    def read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw or b"{}")
+
+    def send_json(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_chunks(self, chunks: List[bytes], delay: float) -> None:
+        """Stream *chunks* with chunked transfer encoding, *delay* apart."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, chunk in enumerate(chunks):
+            if i and delay:
+                time.sleep(delay)
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping pooled or cancelled connections is normal here.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeService:
+    """Base class: owns the server thread, request counters and fault injection."""
+
+    def __init__(self, profile: ServiceProfile | None = None):
+        self.profile = profile or ServiceProfile()
+        self._random = random.Random(self.profile.seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self._server: _Server | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeService":
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.fake = self
+        threading.Thread(
+            target=self._server.serve_forever,
+            name=f"{type(self).__name__}-server",
+            daemon=True,
+        ).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _delay_and_maybe_fail(self) -> bool:
+        """Sleep the configured latency; return True if this request should fail."""
+        with self._lock:
+            self.requests += 1
+            extra = self._random.uniform(0, self.profile.jitter)
+            fail = self._random.random() < self.profile.error_rate
+            if fail:
+                self.errors += 1
+        time.sleep(self.profile.latency + extra)
+        return fail
+
+    def dispatch(self, handler: _Handler, method: str) -> None:
+        if self._delay_and_maybe_fail():
+            handler.send_json(
+                self.profile.error_status,
+                {"status": "error", "code": "injected", "message": "fault injection"},
+            )
+            return
+        self.handle(handler, method)
+
+    def handle(self, handler: _Handler, method: str) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "errors": self.errors}
+
+
+class FakeNewsAPI(FakeService):
+    """``/v2/everything`` returning *pageSize* articles per query.
+
+    With *recorded* (a saved NewsAPI response or a ``{query: [articles]}``
+    mapping), matching queries replay that data; everything else is synthetic.
+    Synthetic URLs overlap between queries at a rate of *overlap* so the
+    de-duplication stages have work to do.
+    """
+
+    def __init__(
+        self,
+        profile: ServiceProfile | None = None,
+        description_chars: int = 300,
+        overlap: float = 0.1,
+        recorded: str | Path | None = None,
+    ):
+        super().__init__(profile)
+        self.description_chars = description_chars
+        self.overlap = overlap
+        self.recorded: Dict[str, List[Dict]] = {}
+        if recorded:
+            data = json.loads(Path(recorded).read_text(encoding="utf-8"))
+            if isinstance(data, dict) and "articles" in data:
+                self.recorded["*"] = data["articles"]
+            else:
+                self.recorded = data
+
+    def _synthetic(self, query: str, count: int) -> List[Dict]:
+        digest = hashlib.blake2b(query.encode("utf-8"), digest_size=4).hexdigest()
+        filler = (
+            "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+            * (self.description_chars // 56 + 1)
+        )[: self.description_chars]
+        articles = []
+        for i in range(count):
+            shared = i < int(count * self.overlap)
+            slug = f"shared-{i}" if shared else f"{digest}-{i}"
+            articles.append(
+                {
+                    "source": {"id": None, "name": f"Source {i % 7}"},
+                    "author": "Bench",
+                    "title": f"Headline {slug} about {query[:40]}",
+                    "description": filler,
+                    "url": f"https://news.example/{slug}",
+                    "urlToImage": None,
+                    "publishedAt": f"2024-01-01T{i % 24:02d}:{i % 60:02d}:00Z",
+                    "content": filler,
+                }
+            )
+        return articles
+
+    def handle(self, handler: _Handler, method: str) -> None:
+        parts = urlsplit(handler.path)
+        if method != "GET" or parts.path != "/v2/everything":
+            handler.send_json(404, {"status": "error", "code": "notFound"})
+            return
+        params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        query = params.get("q", "")
+        size = int(params.get("pageSize", 20))
+        articles = self.recorded.get(query) or self.recorded.get("*")
+        articles = (articles or self._synthetic(query, size))[:size]
+        since = params.get("from")
+        if since:
+            articles = [a for a in articles if (a.get("publishedAt") or "") > since]
+        handler.send_json(
+            200, {"status": "ok", "totalResults": len(articles), "articles": articles}
+        )
+
+
+class FakeGemini(FakeService):
+    """Gemini REST endpoints returning HTML of roughly *output_chars* characters.
+
+    Streaming responses are split into *chunks* pieces, *chunk_delay* seconds
+    apart, after the profile latency (the time to first token).
+    """
+
+    _PATH = re.compile(r"^/v1beta/models/(?P<model>[^:]+):(?P<method>\w+)")
+
+    def __init__(
+        self,
+        profile: ServiceProfile | None = None,
+        output_chars: int = 4000,
+        chunks: int = 8,
+        chunk_delay: float = 0.01,
+    ):
+        super().__init__(profile)
+        self.output_chars = output_chars
+        self.chunks = max(1, chunks)
+        self.chunk_delay = chunk_delay
+
+    def _text(self, prompt: str) -> str:
+        paragraph = "<p>Markets moved on the day's headlines [1][2].</p>\n"
+        text = (paragraph * (self.output_chars // len(paragraph) + 1))[
+            : self.output_chars
+        ]
+        if "<!-- SECTIONS -->" in prompt:
+            text = "<p>Good morning.</p>\n<!-- SECTIONS -->\n<p>Have a good day.</p>"
+        return text
+
+    def _response(self, text: str, prompt_tokens: int, final: bool) -> Dict:
+        candidate = {
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "index": 0,
+        }
+        if final:
+            candidate["finishReason"] = "STOP"
+        return {
+            "candidates": [candidate],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": len(text) // 4,
+                "totalTokenCount": prompt_tokens + len(text) // 4,
+            },
+        }
+
+    def handle(self, handler: _Handler, method: str) -> None:
+        match = self._PATH.match(urlsplit(handler.path).path)
+        if method != "POST" or not match:
+            handler.send_json(404, {"error": {"code": 404, "message": "not found"}})
+            return
+        request = handler.read_json()
+        prompt = "".join(
+            part.get("text", "")
+            for content in request.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        prompt_tokens = len(prompt) // 4
+        text = self._text(prompt)
+
+        if match.group("method") != "streamGenerateContent":
+            handler.send_json(200, self._response(text, prompt_tokens, final=True))
+            return
+
+        size = -(-len(text) // self.chunks)
+        pieces = [text[i : i + size] for i in range(0, len(text), size)] or [""]
+        messages = [
+            json.dumps(self._response(p, prompt_tokens, i == len(pieces) - 1))
+            for i, p in enumerate(pieces)
+        ]
+        # The REST transport streams one JSON array of responses.
+        chunks = [
+            (
+                ("[" if i == 0 else ",\n") + m + ("]" if i == len(messages) - 1 else "")
+            ).encode("utf-8")
+            for i, m in enumerate(messages)
+        ]
+        handler.send_chunks(chunks, self.chunk_delay)
+
+
+class FakeBrevo(FakeService):
+    """``/v3/smtp/email`` accepting single sends and ``messageVersions`` batches."""
+
+    def __init__(self, profile: ServiceProfile | None = None):
+        super().__init__(profile)
+        self.recipients = 0
+        self.html_bytes = 0
+
+    def handle(self, handler: _Handler, method: str) -> None:
+        if method != "POST" or urlsplit(handler.path).path != "/v3/smtp/email":
+            handler.send_json(404, {"code": "not_found", "message": "not found"})
+            return
+        request = handler.read_json()
+        versions = request.get("messageVersions") or [{"to": request.get("to", [])}]
+        with self._lock:
+            self.recipients += sum(len(v.get("to", [])) for v in versions)
+            self.html_bytes += len((request.get("htmlContent") or "").encode("utf-8"))
+            start = self.requests
+        ids = [f"<bench-{start}-{i}@fake.brevo>" for i in range(len(versions))]
+        payload: Dict = {"messageIds": ids}
+        if len(ids) == 1:
+            payload = {"messageId": ids[0]}
+        handler.send_json(201, payload)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(
+            super().stats(), recipients=self.recipients, html_bytes=self.html_bytes
+        )
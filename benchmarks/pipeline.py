@@ -0,0 +1,233 @@
+"""Offline end-to-end pipeline benchmark against local fake services.
+
+Starts the stand-ins from :mod:`benchmarks.fake_services`, points the
+application at them through ``NEWS_API_BASE_URL`` / ``GEMINI_API_ENDPOINT``
+/ ``BREVO_API_HOST`` and drives the real ``main.run`` (or ``run_regions``
+when ``--regions`` > 1) several times. Reports p50/p95 per pipeline stage
+(from :mod:`src.news_mailer.utils.metrics`), throughput and peak traced
+memory; ``--json`` saves the report so later changes can be compared with
+``--baseline``.
+
+    python -m benchmarks.pipeline --runs 5 --regions 3 --recipients 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.fake_services import (
+    FakeBrevo,
+    FakeGemini,
+    FakeNewsAPI,
+    ServiceProfile,
+)
+
+DEFAULT_TOPICS = 6
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of *values* (0 < q <= 1)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def _configure_env(args, news, gemini, brevo, workdir: Path) -> None:
+    recipients = [f"reader{i}@bench.example" for i in range(args.recipients)]
+    topics = {f"topic_{i}": f"bench query {i}" for i in range(args.topics)}
+    profiles = [
+        {"region": f"Region{r}", "topic_queries": topics, "recipients": recipients}
+        for r in range(args.regions)
+    ]
+    os.environ.update(
+        {
+            # Keep a developer's real .env out of the measurement.
+            "ENV_FILE": os.devnull,
+            "GEMINI_API_KEY": "bench",
+            "NEWS_API_KEY": "bench",
+            "BREVO_API_KEY": "bench",
+            "EMAIL_FROM": "bench@bench.example",
+            "BREVO_EMAIL_PROVIDER": "bench@bench.example",
+            "EMAIL_TO": ",".join(recipients),
+            "NEWS_API_BASE_URL": news.url,
+            "GEMINI_API_ENDPOINT": gemini.url,
+            "BREVO_API_HOST": f"{brevo.url}/v3",
+            "CACHE_DIR": str(workdir / "cache"),
+            "STATE_DIR": str(workdir / "state"),
+            "METRICS_DIR": "",
+            # Every run should do the full amount of work.
+            "NEWS_CACHE_ENABLED": "false",
+            "GENERATION_CACHE_ENABLED": "false",
+            "INCREMENTAL_FETCH": "false",
+            # Measure the pipeline, not the free-tier API budgets.
+            "NEWSAPI_DAILY_QUOTA": "0",
+            "GEMINI_REQUESTS_PER_MINUTE": "0",
+            "GEMINI_TOKENS_PER_MINUTE": "0",
+            "GEMINI_HEDGE_DELAY": str(args.hedge_delay),
+            "GEMINI_TTFT_DEADLINE": str(args.ttft_deadline),
+            "COMPOSE_MODE": args.compose_mode,
+            "REGION_PROFILES": json.dumps(profiles),
+        }
+    )
+
+
+def run_benchmark(args) -> Dict:
+    news = FakeNewsAPI(
+        ServiceProfile(args.news_latency, args.jitter, args.news_error_rate, seed=1),
+        description_chars=args.description_chars,
+        recorded=args.recorded,
+    )
+    gemini = FakeGemini(
+        ServiceProfile(
+            args.gemini_latency, args.jitter, args.gemini_error_rate, seed=2
+        ),
+        output_chars=args.output_chars,
+    )
+    brevo = FakeBrevo(
+        ServiceProfile(args.brevo_latency, args.jitter, args.brevo_error_rate, seed=3)
+    )
+    with news, gemini, brevo, tempfile.TemporaryDirectory() as tmp:
+        _configure_env(args, news, gemini, brevo, Path(tmp))
+
+        # Imported after the environment is in place; settings are cached.
+        from src.news_mailer import main
+        from src.news_mailer.utils.metrics import metrics
+
+        def run_once() -> bool:
+            try:
+                if args.regions > 1:
+                    main.run_regions()
+                else:
+                    main.run()
+                return True
+            except Exception as exc:  # measured, not fatal
+                print(f"run failed: {exc}", file=sys.stderr)
+                return False
+
+        # Warm-up runs pay for SDK imports and connection setup off the clock.
+        for _ in range(args.warmup):
+            run_once()
+
+        stages: Dict[str, List[float]] = {}
+        totals = {"emails_sent": 0.0, "articles_cited": 0.0}
+        failures = 0
+        tracemalloc.start()
+        started = time.perf_counter()
+        for _ in range(args.runs):
+            failures += not run_once()
+            for stage, values in metrics.samples().items():
+                stages.setdefault(stage, []).extend(values)
+            for name in totals:
+                totals[name] += metrics.counter(name)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "config": {
+                k: v for k, v in vars(args).items() if k not in ("json", "baseline")
+            },
+            "runs": args.runs,
+            "failed_runs": failures,
+            "wall_seconds": round(elapsed, 3),
+            "stages": {
+                stage: {
+                    "count": len(values),
+                    "p50": round(percentile(values, 0.5), 4),
+                    "p95": round(percentile(values, 0.95), 4),
+                    "max": round(max(values), 4),
+                }
+                for stage, values in sorted(stages.items())
+            },
+            "throughput": {
+                "digests_per_second": round(args.runs * args.regions / elapsed, 3),
+                "emails_per_second": round(totals["emails_sent"] / elapsed, 3),
+                "articles_per_second": round(totals["articles_cited"] / elapsed, 3),
+            },
+            "peak_memory_mb": round(peak / (1024 * 1024), 2),
+            "services": {
+                "newsapi": news.stats(),
+                "gemini": gemini.stats(),
+                "brevo": brevo.stats(),
+            },
+        }
+
+
+def _print_report(report: Dict, baseline: Dict | None) -> None:
+    print(f"{'stage':<24} {'n':>5} {'p50 s':>9} {'p95 s':>9} {'max s':>9}", end="")
+    print(f" {'Δp95':>8}" if baseline else "")
+    for stage, row in report["stages"].items():
+        line = (
+            f"{stage:<24} {row['count']:>5} {row['p50']:>9.4f} "
+            f"{row['p95']:>9.4f} {row['max']:>9.4f}"
+        )
+        base = (baseline or {}).get("stages", {}).get(stage)
+        if base and base["p95"]:
+            line += f" {(row['p95'] / base['p95'] - 1) * 100:>+7.1f}%"
+        print(line)
+    print()
+    for name, value in report["throughput"].items():
+        print(f"{name:<24} {value}")
+    print(f"{'peak_memory_mb':<24} {report['peak_memory_mb']}")
+    print(f"{'wall_seconds':<24} {report['wall_seconds']}")
+    print(f"{'failed_runs':<24} {report['failed_runs']}/{report['runs']}")
+    for name, stats in report["services"].items():
+        print(f"{name:<24} {stats}")
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs first")
+    parser.add_argument("--regions", type=int, default=1)
+    parser.add_argument("--recipients", type=int, default=10)
+    parser.add_argument(
+        "--topics",
+        type=int,
+        default=DEFAULT_TOPICS,
+        help="topics per region profile (single-region runs use TOPIC_QUERIES)",
+    )
+    parser.add_argument(
+        "--compose-mode", choices=("single", "map_reduce"), default="single"
+    )
+    parser.add_argument("--news-latency", type=float, default=0.05)
+    parser.add_argument("--gemini-latency", type=float, default=0.2)
+    parser.add_argument("--brevo-latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--news-error-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--brevo-error-rate", type=float, default=0.0)
+    parser.add_argument("--description-chars", type=int, default=300)
+    parser.add_argument("--output-chars", type=int, default=4000)
+    parser.add_argument("--hedge-delay", type=float, default=5.0)
+    parser.add_argument("--ttft-deadline", type=float, default=10.0)
+    parser.add_argument(
+        "--recorded",
+        help="NewsAPI response JSON (or {query: [articles]}) to replay",
+    )
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="earlier --json report to compare against")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args)
+    baseline = None
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    _print_report(report, baseline)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 1 if report["failed_runs"] == args.runs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
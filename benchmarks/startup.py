@@ -0,0 +1,98 @@
+"""Cold-start import benchmark based on ``python -X importtime``.
+
+Imports the target module in fresh interpreters, reports the median
+cumulative import time and the heaviest dependencies, and exits non-zero
+when the median exceeds ``--max-ms`` or when a module listed in
+``--forbid`` gets imported (e.g. an SDK that should stay lazy).
+
+    python -m benchmarks.startup --max-ms 800
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+DEFAULT_MODULE = "src.news_mailer.main"
+DEFAULT_FORBIDDEN = (
+    "google.generativeai",
+    "googleapiclient",
+    "google_auth_oauthlib",
+    "brevo_python",
+)
+
+
+def import_profile(
+    module: str, forbid: Tuple[str, ...]
+) -> Tuple[Dict[str, int], List[str]]:
+    """Import *module* in a fresh interpreter.
+
+    Returns cumulative microseconds per imported module and the forbidden
+    modules that ended up in ``sys.modules``.
+    """
+    probe = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {list(forbid)!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        if cum.isdigit():
+            cumulative[name] = int(cum)
+    leaked = [m for m in proc.stdout.strip().split(",") if m]
+    return cumulative, leaked
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--max-ms", type=float, default=None, help="fail if the median exceeds this"
+    )
+    parser.add_argument(
+        "--forbid",
+        nargs="*",
+        default=list(DEFAULT_FORBIDDEN),
+        help="modules that must not be imported at startup",
+    )
+    args = parser.parse_args(argv)
+
+    totals: List[int] = []
+    profile: Dict[str, int] = {}
+    leaked: List[str] = []
+    for _ in range(args.runs):
+        profile, leaked = import_profile(args.module, tuple(args.forbid))
+        totals.append(profile.get(args.module, 0))
+
+    median_ms = statistics.median(totals) / 1000
+    print(f"{args.module}: median {median_ms:.1f} ms over {args.runs} runs")
+    print("Heaviest imports (last run, cumulative):")
+    heaviest = sorted(profile.items(), key=lambda item: item[1], reverse=True)
+    for name, micros in heaviest[: args.top]:
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if leaked:
+        print(f"FAIL: eagerly imported {', '.join(leaked)}")
+        failed = True
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"FAIL: {median_ms:.1f} ms exceeds budget of {args.max_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
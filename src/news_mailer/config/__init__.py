@@ -1,4 +1,12 @@
 """Configuration package for News Mailer."""
-from .base_config import Settings, get_settings
+from .base_config import Settings, get_settings, load_env
+from .region_profile import RegionProfile, load_recipient_topics, load_region_profiles
 
-__all__ = ["Settings", "get_settings"]
+__all__ = [
+    "Settings",
+    "get_settings",
+    "load_env",
+    "RegionProfile",
+    "load_recipient_topics",
+    "load_region_profiles",
+]
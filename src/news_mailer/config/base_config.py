@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 from pydantic_settings import BaseSettings
 from pydantic import Field
 import os
@@ -6,7 +7,10 @@ from dotenv import load_dotenv
 
 
 class Settings(BaseSettings):
-    """Application configuration, loaded from environment variables or .env file."""
+    """Application configuration, loaded from environment variables or .env file.
+
+    :func:`get_settings` reads the file named by ``ENV_FILE`` (default ``.env``).
+    """
 
     gemini_api_key: str = Field(..., env="GEMINI_API_KEY")
     news_api_key: str = Field(..., env="NEWS_API_KEY")
@@ -20,6 +24,105 @@ class Settings(BaseSettings):
 
     brevo_api_key: str | None = Field(None, env="BREVO_API_KEY")
     brevo_email_provider: str | None = Field(None, env="BREVO_EMAIL_PROVIDER")
+    brevo_batch_size: int = Field(100, env="BREVO_BATCH_SIZE")
+    brevo_max_concurrency: int = Field(4, env="BREVO_MAX_CONCURRENCY")
+    brevo_rate_per_second: float = Field(5.0, env="BREVO_RATE_PER_SECOND")
+
+    # API endpoint overrides (e.g. local stand-ins used by the benchmarks)
+    news_api_base_url: str = Field("https://newsapi.org", env="NEWS_API_BASE_URL")
+    gemini_api_endpoint: str | None = Field(None, env="GEMINI_API_ENDPOINT")
+    brevo_api_host: str | None = Field(None, env="BREVO_API_HOST")
+
+    # NewsAPI fetching
+    news_fetch_max_workers: int = Field(6, env="NEWS_FETCH_MAX_WORKERS")
+    news_fetch_per_host_limit: int = Field(4, env="NEWS_FETCH_PER_HOST_LIMIT")
+    news_fetch_max_retries: int = Field(3, env="NEWS_FETCH_MAX_RETRIES")
+    news_fetch_timeout: float = Field(10.0, env="NEWS_FETCH_TIMEOUT")
+    # "per_topic" = one request per topic; "combined" = a few OR-queries whose
+    # results are assigned to topics locally
+    news_fetch_mode: Literal["per_topic", "combined"] = Field(
+        "per_topic", env="NEWS_FETCH_MODE"
+    )
+    news_combined_query_chars: int = Field(500, env="NEWS_COMBINED_QUERY_CHARS")
+    news_combined_page_size: int = Field(100, env="NEWS_COMBINED_PAGE_SIZE")
+    news_combined_max_pages: int = Field(1, env="NEWS_COMBINED_MAX_PAGES")
+    news_recency_half_life_hours: float = Field(
+        24.0, env="NEWS_RECENCY_HALF_LIFE_HOURS"
+    )
+
+    # Shared API budgets (0 = unlimited); quota use persists in STATE_DIR
+    newsapi_daily_quota: int = Field(0, env="NEWSAPI_DAILY_QUOTA")
+    newsapi_rate_per_second: float = Field(0.0, env="NEWSAPI_RATE_PER_SECOND")
+    gemini_requests_per_minute: float = Field(10.0, env="GEMINI_REQUESTS_PER_MINUTE")
+    gemini_tokens_per_minute: float = Field(250000.0, env="GEMINI_TOKENS_PER_MINUTE")
+    gemini_daily_quota: int = Field(0, env="GEMINI_DAILY_QUOTA")
+    # In-flight Gemini calls across all digests (COMPOSE_MAX_CONCURRENCY is per digest)
+    gemini_max_concurrency: int = Field(16, env="GEMINI_MAX_CONCURRENCY")
+    brevo_daily_quota: int = Field(0, env="BREVO_DAILY_QUOTA")
+    # Longest server-imposed cool-down to sit out before deferring the work
+    rate_limit_max_wait: float = Field(60.0, env="RATE_LIMIT_MAX_WAIT")
+
+    # On-disk caches (shared by every run pointed at the same directory)
+    cache_dir: str = Field(".cache/news-mailer", env="CACHE_DIR")
+    news_cache_enabled: bool = Field(True, env="NEWS_CACHE_ENABLED")
+    news_cache_ttl_seconds: int = Field(3600, env="NEWS_CACHE_TTL_SECONDS")
+    news_cache_max_bytes: int = Field(50 * 1024 * 1024, env="NEWS_CACHE_MAX_BYTES")
+    generation_cache_enabled: bool = Field(False, env="GENERATION_CACHE_ENABLED")
+    generation_cache_ttl_seconds: int = Field(86400, env="GENERATION_CACHE_TTL_SECONDS")
+    generation_cache_max_bytes: int = Field(
+        20 * 1024 * 1024, env="GENERATION_CACHE_MAX_BYTES"
+    )
+
+    # Incremental fetching state (watermarks + already-sent URLs), kept per region
+    region: str = Field("Global", env="REGION")
+    state_dir: str = Field(".state/news-mailer", env="STATE_DIR")
+    incremental_fetch: bool = Field(False, env="INCREMENTAL_FETCH")
+    seen_url_max_age_days: float = Field(7, env="SEEN_URL_MAX_AGE_DAYS")
+
+    # SQLite article history (defaults to STATE_DIR/articles.sqlite3)
+    article_store_enabled: bool = Field(False, env="ARTICLE_STORE_ENABLED")
+    article_store_path: str | None = Field(None, env="ARTICLE_STORE_PATH")
+    article_store_max_age_days: float = Field(30, env="ARTICLE_STORE_MAX_AGE_DAYS")
+    # How far back ``--from-store`` runs look for articles
+    article_store_lookback_hours: float = Field(24, env="ARTICLE_STORE_LOOKBACK_HOURS")
+
+    # Upper bound on prompt size; articles are trimmed/dropped to fit (0 = no limit)
+    prompt_token_budget: int = Field(8000, env="PROMPT_TOKEN_BUDGET")
+
+    # Gemini streaming deadlines and hedging. A hedge is a second, paid
+    # generation (and counts against the Gemini RPM and daily quota), so it
+    # is opt-in; thinking models can take minutes before their first token.
+    gemini_fallback_model: str | None = Field(None, env="GEMINI_FALLBACK_MODEL")
+    gemini_ttft_deadline: float = Field(120.0, env="GEMINI_TTFT_DEADLINE")
+    gemini_overall_deadline: float = Field(300.0, env="GEMINI_OVERALL_DEADLINE")
+    gemini_hedge_enabled: bool = Field(False, env="GEMINI_HEDGE_ENABLED")
+    gemini_hedge_percentile: float = Field(0.95, env="GEMINI_HEDGE_PERCENTILE")
+    gemini_hedge_delay: float = Field(90.0, env="GEMINI_HEDGE_DELAY")
+
+    # "single" = one Gemini call; "map_reduce" = parallel per-topic sections
+    compose_mode: Literal["single", "map_reduce"] = Field("single", env="COMPOSE_MODE")
+    compose_max_concurrency: int = Field(4, env="COMPOSE_MAX_CONCURRENCY")
+
+    # Minify the composed HTML and add a plain-text part before sending
+    html_postprocess_enabled: bool = Field(False, env="HTML_POSTPROCESS_ENABLED")
+
+    # Multi-region mode: JSON list of region profiles, inline or as a file path
+    region_profiles: str | None = Field(None, env="REGION_PROFILES")
+
+    # Per-recipient topic subscriptions: JSON object {email: [topic, ...]},
+    # inline or as a file path. Unlisted recipients get every topic.
+    recipient_topics: str | None = Field(None, env="RECIPIENT_TOPICS")
+
+    # Near-duplicate clustering ahead of composition
+    near_dup_enabled: bool = Field(False, env="NEAR_DUP_ENABLED")
+    near_dup_threshold: float = Field(0.6, env="NEAR_DUP_THRESHOLD")
+
+    # Scheduler daemon (``python -m src.news_mailer.daemon``)
+    daemon_catch_up_hours: float = Field(6.0, env="DAEMON_CATCH_UP_HOURS")
+    daemon_shutdown_timeout: float = Field(600.0, env="DAEMON_SHUTDOWN_TIMEOUT")
+
+    # Per-run stage timings and counters (empty disables export)
+    metrics_dir: str = Field(".state/news-mailer/metrics", env="METRICS_DIR")
 
     class Config:
         env_file = ".env"
@@ -27,11 +130,20 @@ class Settings(BaseSettings):
         extra = "ignore"
 
 
-# Load .env file if present
-load_dotenv(dotenv_path=os.getenv("ENV_FILE", ".env"))
+@lru_cache()
+def load_env(override: bool = False) -> None:
+    """Load the .env file into ``os.environ`` once per process.
+
+    Called lazily by :func:`get_settings` and by modules that read raw
+    environment variables, instead of at import time. With *override* the
+    file's values replace variables already set in the environment, as the
+    Gmail OAuth flow has always done.
+    """
+    load_dotenv(dotenv_path=os.getenv("ENV_FILE", ".env"), override=override)
 
 
 @lru_cache()
 def get_settings() -> Settings:
     """Return cached Settings instance."""
-    return Settings()
+    load_env()
+    return Settings(_env_file=os.getenv("ENV_FILE", ".env"))
@@ -0,0 +1,87 @@
+import datetime
+import json
+from pathlib import Path
+from typing import Dict, List
+
+from pydantic import BaseModel, Field, field_validator
+
+from src.news_mailer.utils.cron import CronSchedule
+
+from .base_config import get_settings
+
+
+class RegionProfile(BaseModel):
+    """One regional digest: its label, topic queries and recipients."""
+
+    region: str
+    topic_queries: Dict[str, str]
+    recipients: List[str] = Field(default_factory=list)
+    page_size_per_topic: int = 5
+    # Cron expression (UTC) used by the scheduler daemon; unscheduled
+    # profiles are only sent by ``--regions`` runs.
+    schedule: str | None = None
+    # Recipient address -> topic keys they subscribe to; see RECIPIENT_TOPICS.
+    subscriptions: Dict[str, List[str]] = Field(default_factory=dict)
+
+    @field_validator("schedule")
+    @classmethod
+    def _check_schedule(cls, value: str | None) -> str | None:
+        if value is not None:
+            # Parsing alone accepts dates that never occur (e.g. 30 February).
+            CronSchedule(value).next_after(datetime.datetime.now(datetime.timezone.utc))
+        return value
+
+
+def _read_json_setting(raw: str, opening: str):
+    if not raw.lstrip().startswith(opening):
+        raw = Path(raw).read_text(encoding="utf-8")
+    return json.loads(raw)
+
+
+def load_recipient_topics() -> Dict[str, List[str]]:
+    """Parse ``RECIPIENT_TOPICS`` (inline JSON or a path to a JSON file).
+
+    The value maps recipient addresses to the topic keys they want; an
+    empty mapping means everyone gets every topic.
+    """
+    raw = get_settings().recipient_topics
+    if not raw:
+        return {}
+    data = _read_json_setting(raw, "{")
+    if not isinstance(data, dict):
+        raise RuntimeError("RECIPIENT_TOPICS must be a JSON object of email -> topics.")
+    return {
+        email.strip(): [str(topic) for topic in topics]
+        for email, topics in data.items()
+    }
+
+
+def load_region_profiles() -> List[RegionProfile]:
+    """Parse ``REGION_PROFILES`` (inline JSON or a path to a JSON file).
+
+    The value is a list of :class:`RegionProfile` objects with distinct
+    ``region`` names. Profiles without ``recipients`` fall back to the
+    comma-separated ``EMAIL_TO`` addresses, and profiles without
+    ``subscriptions`` to ``RECIPIENT_TOPICS``.
+    """
+    settings = get_settings()
+    raw = settings.region_profiles
+    if not raw:
+        raise RuntimeError(
+            "REGION_PROFILES is not set; cannot run in multi-region mode."
+        )
+
+    default_recipients = [addr.strip() for addr in settings.email_to.split(",")]
+    default_subscriptions = load_recipient_topics()
+    profiles = [RegionProfile(**item) for item in _read_json_setting(raw, "[")]
+    regions = [profile.region for profile in profiles]
+    duplicates = sorted({region for region in regions if regions.count(region) > 1})
+    if duplicates:
+        # Fetch state and results are keyed by region name.
+        raise RuntimeError(f"REGION_PROFILES lists duplicate regions: {duplicates}")
+    for profile in profiles:
+        if not profile.recipients:
+            profile.recipients = default_recipients
+        if not profile.subscriptions:
+            profile.subscriptions = default_subscriptions
+    return profiles
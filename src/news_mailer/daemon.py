@@ -0,0 +1,274 @@
+"""Long-running scheduler that sends regional digests on cron schedules.
+
+Every ``REGION_PROFILES`` entry with a ``schedule`` becomes a job. The
+process keeps settings, the NewsAPI session and the Gemini / Brevo clients
+warm between digests, so a single always-on daemon replaces one cold-started
+CI job per region:
+
+    python -m src.news_mailer.daemon
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import json
+import logging
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Set, Tuple
+
+from src.news_mailer.config import RegionProfile, get_settings, load_region_profiles
+from src.news_mailer.main import run_regions
+from src.news_mailer.utils import get_logger
+from src.news_mailer.utils.cron import CronSchedule
+from src.news_mailer.utils.disk_cache import atomic_write_bytes
+
+logger = get_logger(__name__)
+
+# Re-check the clock at least this often, so suspends and clock jumps are noticed.
+MAX_SLEEP_SECONDS = 60.0
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+@dataclass
+class Job:
+    profile: RegionProfile
+    schedule: CronSchedule
+    next_run: datetime.datetime
+
+    @property
+    def region(self) -> str:
+        return self.profile.region
+
+
+class LastRunStore:
+    """Scheduled time of the last handled run per region, kept on disk."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raw = {}
+        self._runs: Dict[str, datetime.datetime] = {}
+        for region, stamp in raw.items():
+            try:
+                self._runs[region] = datetime.datetime.fromisoformat(stamp)
+            except (TypeError, ValueError):
+                logger.warning("Ignoring bad last-run time for %s: %r", region, stamp)
+
+    def get(self, region: str) -> datetime.datetime | None:
+        return self._runs.get(region)
+
+    def mark(self, region: str, when: datetime.datetime) -> None:
+        self._runs[region] = when
+
+    def save(self) -> None:
+        data = {region: when.isoformat() for region, when in self._runs.items()}
+        try:
+            atomic_write_bytes(self.path, json.dumps(data, indent=2).encode("utf-8"))
+        except OSError as exc:
+            logger.warning("Could not persist daemon last-run times: %s", exc)
+
+
+def _warm_up() -> None:
+    """Create the cached clients up front so the first digest is not a cold start."""
+    settings = get_settings()
+    from src.news_mailer.utils.http import get_session
+
+    get_session(settings.news_fetch_per_host_limit)
+    try:
+        from src.news_mailer.service.mail.email_composer import get_genai
+
+        get_genai()
+    except Exception as exc:
+        logger.warning("Gemini client warm-up failed: %s", exc)
+    try:
+        from src.news_mailer.service.mail.email_sender_brevo import get_brevo_api
+
+        get_brevo_api()
+    except Exception as exc:
+        logger.warning("Brevo client warm-up failed: %s", exc)
+
+
+class Scheduler:
+    """Run region jobs on their cron schedules inside an asyncio loop.
+
+    * Jobs due at the same minute are sent as one :func:`run_regions` batch,
+      so their shared queries are fetched once.
+    * Batches run one at a time on a worker thread. A job whose previous run
+      is still running or queued skips the new fire time (overlap protection).
+    * On start, a run missed within ``catch_up`` of now (per the persisted
+      last-run times) is sent immediately; older misses are skipped.
+    * :meth:`serve` returns ``True`` once *stop* is set and in-flight batches
+      finish. After *shutdown_timeout* seconds it records the unfinished
+      batches as handled and returns ``False``; their worker thread is still
+      running, so the caller must exit the process itself.
+    """
+
+    def __init__(
+        self,
+        profiles: Sequence[RegionProfile],
+        last_runs: LastRunStore,
+        catch_up: datetime.timedelta,
+        shutdown_timeout: float,
+        runner: Callable[[Sequence[RegionProfile]], None] = run_regions,
+        clock: Callable[[], datetime.datetime] = _utcnow,
+    ):
+        self.last_runs = last_runs
+        self.catch_up = catch_up
+        self.shutdown_timeout = shutdown_timeout
+        self.runner = runner
+        self.clock = clock
+        self.jobs: List[Job] = []
+        for profile in profiles:
+            if not profile.schedule:
+                continue
+            try:
+                self.jobs.append(self._make_job(profile))
+            except ValueError as exc:
+                logger.error("Not scheduling %s: %s", profile.region, exc)
+        self._running: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="digest")
+
+    def _make_job(self, profile: RegionProfile) -> Job:
+        schedule = CronSchedule(profile.schedule)
+        now = self.clock()
+        next_run = schedule.next_after(now)
+        last = self.last_runs.get(profile.region)
+        if last is not None:
+            missed = schedule.next_after(last)
+            if missed <= now and now - missed <= self.catch_up:
+                logger.info("Catching up %s run missed at %s", profile.region, missed)
+                next_run = missed
+            elif missed <= now:
+                logger.warning(
+                    "Skipping %s run missed at %s (older than the catch-up window)",
+                    profile.region,
+                    missed,
+                )
+        logger.info(
+            "Scheduled %s (%s); next run %s", profile.region, schedule, next_run
+        )
+        return Job(profile, schedule, next_run)
+
+    def _dispatch_due(self, now: datetime.datetime) -> None:
+        batch: List[Tuple[Job, datetime.datetime]] = []
+        for job in self.jobs:
+            if job.next_run > now:
+                continue
+            fire_time = job.next_run
+            # Fire times that passed while a run was going are coalesced.
+            job.next_run = job.schedule.next_after(now)
+            if job.region in self._running:
+                logger.warning(
+                    "Previous %s digest still in progress; skipping this run",
+                    job.region,
+                )
+            else:
+                batch.append((job, fire_time))
+        if batch:
+            self._running.update(job.region for job, _ in batch)
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Job, datetime.datetime]]) -> None:
+        regions = ", ".join(job.region for job, _ in batch)
+        try:
+            logger.info("Sending digests for %s", regions)
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self.runner, [job.profile for job, _ in batch]
+            )
+        except Exception as exc:
+            logger.error("Scheduled run for %s failed: %s", regions, exc)
+        finally:
+            # Failed runs are recorded too; the next fire time retries them.
+            for job, fire_time in batch:
+                self.last_runs.mark(job.region, fire_time)
+                self._running.discard(job.region)
+            self.last_runs.save()
+
+    async def serve(self, stop: asyncio.Event) -> bool:
+        if not self.jobs:
+            logger.warning("No scheduled region profiles; daemon has nothing to do.")
+            return True
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, _warm_up)
+
+        while not stop.is_set():
+            now = self.clock()
+            self._dispatch_due(now)
+            wake = min(job.next_run for job in self.jobs)
+            timeout = min(MAX_SLEEP_SECONDS, max(0.0, (wake - now).total_seconds()))
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        logger.info("Shutting down; waiting for %d running batch(es)", len(self._tasks))
+        pending: Set[asyncio.Task] = set()
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=self.shutdown_timeout)
+        if pending:
+            logger.warning(
+                "%d batch(es) still running after %.0fs; exiting anyway",
+                len(pending),
+                self.shutdown_timeout,
+            )
+            # Cancelling the tasks runs their ``finally``, which saves last-run
+            # times; the digest thread itself cannot be interrupted.
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        return not pending
+
+
+def _install_signal_handlers(stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows event loops do not support add_signal_handler.
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop.set))
+
+
+async def serve(profiles: Sequence[RegionProfile]) -> bool:
+    settings = get_settings()
+    scheduler = Scheduler(
+        profiles,
+        LastRunStore(Path(settings.state_dir) / "daemon_last_runs.json"),
+        catch_up=datetime.timedelta(hours=settings.daemon_catch_up_hours),
+        shutdown_timeout=settings.daemon_shutdown_timeout,
+    )
+    stop = asyncio.Event()
+    _install_signal_handlers(stop)
+    return await scheduler.serve(stop)
+
+
+def main() -> None:
+    """Run the scheduler until SIGINT / SIGTERM."""
+    profiles = [p for p in load_region_profiles() if p.schedule]
+    if not profiles:
+        raise RuntimeError(
+            "No REGION_PROFILES entry has a schedule; nothing for the daemon to run."
+        )
+    if not asyncio.run(serve(profiles)):
+        # The digest worker is a non-daemon thread and would keep the
+        # interpreter alive past the shutdown timeout; state is already saved.
+        logging.shutdown()
+        os._exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,409 @@
-from src.news_mailer.service.news import fetch_latest_news
-from src.news_mailer.service.mail import EmailComposer, send_email_brevo
+import datetime
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+from src.news_mailer.config import (
+    RegionProfile,
+    get_settings,
+    load_recipient_topics,
+    load_region_profiles,
+)
+from src.news_mailer.service.news import (
+    SeenUrlStore,
+    WatermarkStore,
+    cluster_near_duplicates,
+    fetch_latest_news,
+    fetch_topics,
+    get_article_store,
+    get_topic_queries,
+    merge_articles,
+)
+from src.news_mailer.service.mail import (
+    DigestFragments,
+    EmailComposer,
+    postprocess_html,
+)
 from src.news_mailer.utils import get_logger
+from src.news_mailer.utils.metrics import metrics
 
 logger = get_logger(__name__)
 
+FetchState = Tuple[WatermarkStore, SeenUrlStore]
+
+
+def _open_state(region: str) -> FetchState | None:
+    """Load the per-region watermark and sent-URL stores, if incremental fetching is on."""
+    settings = get_settings()
+    if not settings.incremental_fetch:
+        return None
+    state_dir = Path(settings.state_dir) / (region or "Global")
+    return (
+        WatermarkStore(state_dir / "watermarks.json"),
+        SeenUrlStore(state_dir / "seen_urls.json", settings.seen_url_max_age_days),
+    )
+
+
+def _prepare(articles: List[Dict], state: FetchState | None) -> List[Dict]:
+    """Drop already-sent articles and collapse near-duplicates."""
+    settings = get_settings()
+    if state is not None:
+        fetched = len(articles)
+        articles = state[1].filter_unseen(articles)
+        logger.info("Dropped %d already-sent articles", fetched - len(articles))
+        metrics.incr("articles_dropped", fetched - len(articles), reason="already_sent")
+    if settings.near_dup_enabled:
+        before = len(articles)
+        with metrics.span("near_dup_clustering"):
+            articles = cluster_near_duplicates(articles, settings.near_dup_threshold)
+        metrics.incr(
+            "articles_dropped", before - len(articles), reason="near_duplicate"
+        )
+    return articles
+
+
+def _commit_state(state: FetchState | None, articles: List[Dict]) -> None:
+    """Remember what was actually delivered."""
+    if state is None:
+        return
+    watermarks, seen_urls = state
+    watermarks.advance(articles)
+    seen_urls.add(
+        alt.get("url") for art in articles for alt in [art, *art.get("alternates", [])]
+    )
+    watermarks.save()
+    seen_urls.save()
+
+
+def _send(subject: str, body: str, recipients: Sequence[str] | None) -> Dict[str, str]:
+    """Post-process *body* (when enabled) and send it via Brevo.
+
+    Returns the per-recipient statuses of :func:`send_email_brevo_bulk`;
+    *recipients* defaults to ``EMAIL_TO``.
+    """
+    settings = get_settings()
+    if recipients is None:
+        recipients = [addr.strip() for addr in settings.email_to.split(",")]
+    text_body = None
+    if settings.html_postprocess_enabled:
+        processed = postprocess_html(body)
+        body, text_body = processed.html, processed.text
+    # Imported here so brevo_python only loads when a digest is sent.
+    from src.news_mailer.service.mail import send_email_brevo_bulk
+
+    return send_email_brevo_bulk(subject, body, recipients, text_body=text_body)
+
+
+def _failures(statuses: Mapping[str, str]) -> Dict[str, str]:
+    return {email: s for email, s in statuses.items() if s.startswith("failed")}
+
+
+def _group_recipients(
+    recipients: Sequence[str],
+    subscriptions: Mapping[str, Sequence[str]],
+    known_topics: Sequence[str],
+    available_topics: Sequence[str],
+) -> Dict[Tuple[str, ...], List[str]]:
+    """Group *recipients* by the (ordered) topics they receive today.
+
+    Recipients without a subscription, or subscribed only to unknown topics,
+    get every available topic. Subscribers whose topics have no articles
+    today are left out.
+    """
+    groups: Dict[Tuple[str, ...], List[str]] = {}
+    for email in recipients:
+        wanted = subscriptions.get(email)
+        if wanted is not None:
+            unknown = sorted(set(wanted) - set(known_topics))
+            if unknown:
+                logger.warning("Ignoring unknown topics %s for %s", unknown, email)
+            if len(unknown) == len(set(wanted)):
+                wanted = None
+        if wanted is None:
+            selected = tuple(available_topics)
+        else:
+            selected = tuple(t for t in available_topics if t in wanted)
+            if not selected:
+                logger.info("No news today for %s's topics; not sending", email)
+                continue
+        groups.setdefault(selected, []).append(email)
+    return groups
+
+
+class _PartialDelivery(RuntimeError):
+    """Some recipient groups failed; *delivered* lists what the others were sent."""
+
+    def __init__(self, delivered: List[Dict], message: str):
+        super().__init__(message)
+        self.delivered = delivered
+
+
+def _send_personalized(
+    fragments: DigestFragments,
+    recipients: Sequence[str],
+    subscriptions: Mapping[str, Sequence[str]],
+    known_topics: Sequence[str],
+) -> List[Dict]:
+    """Render one body per distinct topic selection and send it to that group.
+
+    Returns the articles cited in the digests that were delivered; if any
+    group failed, :class:`_PartialDelivery` is raised once all were tried.
+    """
+    groups = _group_recipients(
+        recipients, subscriptions, known_topics, fragments.topics
+    )
+    logger.info(
+        "Sending %d personalised variants to %d recipients",
+        len(groups),
+        sum(len(group) for group in groups.values()),
+    )
+    delivered: Dict[str, Dict] = {}
+    errors = []
+    for topics, group in groups.items():
+        with metrics.span("render_digest"):
+            body, cited = fragments.render(topics)
+        try:
+            statuses = _send(fragments.subject, body, group)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+            continue
+        failed = _failures(statuses)
+        if failed:
+            errors.append(f"Failed to send email via Brevo to: {failed}")
+        if len(failed) < len(statuses):
+            delivered.update((art["url"], art) for art in cited)
+    if errors:
+        raise _PartialDelivery(list(delivered.values()), "; ".join(errors))
+    return list(delivered.values())
+
+
+def _deliver(
+    articles: List[Dict],
+    state: FetchState | None,
+    region: str | None = None,
+    topic_queries: Mapping[str, str] | None = None,
+    recipients: Sequence[str] | None = None,
+    subscriptions: Mapping[str, Sequence[str]] | None = None,
+) -> None:
+    articles = _prepare(articles, state)
+    if not articles:
+        logger.warning("No articles fetched for %s; aborting email send.", region)
+        return
+
+    composer = EmailComposer(region=region, topic_queries=topic_queries)
+    if not subscriptions:
+        subject, body = composer.compose_email(articles)
+        statuses = _send(subject, body, recipients)
+        failed = _failures(statuses)
+        # Anyone who got today's digest must not get it again on the next run.
+        if len(failed) < len(statuses):
+            _commit_state(state, composer.cited_articles)
+        if failed:
+            raise RuntimeError(f"Failed to send email via Brevo to: {failed}")
+        logger.info("Email sent via Brevo API to %d recipients", len(statuses))
+        return
+
+    # One Gemini call per topic (plus the frame), however many recipients.
+    fragments = composer.compose_fragments(articles)
+    if recipients is None:
+        recipients = [addr.strip() for addr in get_settings().email_to.split(",")]
+    try:
+        delivered = _send_personalized(
+            fragments, recipients, subscriptions, composer.topics
+        )
+    except _PartialDelivery as exc:
+        _commit_state(state, exc.delivered)
+        raise
+    _commit_state(state, delivered)
 
-def run() -> None:
-    """Orchestrate the pipeline: fetch news -> compose email -> send."""
+
+def _store_articles(articles: List[Dict]) -> None:
+    """Upsert freshly fetched articles into the SQLite history, if enabled."""
     try:
-        articles = fetch_latest_news(page_size_per_topic=5)
-        if not articles:
-            logger.warning("No articles fetched; aborting email send.")
+        store = get_article_store()
+        if store is None:
             return
+        with metrics.span("store_upsert"):
+            written = store.upsert(articles)
+        logger.info("Stored %d articles in %s", written, store.path)
+    except sqlite3.Error as exc:
+        logger.warning("Could not update the article store: %s", exc)
+
+
+def _from_store(topic_queries: Mapping[str, str], per_topic: int) -> List[Dict]:
+    """Load recent stored articles for *topic_queries* instead of fetching."""
+    settings = get_settings()
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+        hours=settings.article_store_lookback_hours
+    )
+    try:
+        store = get_article_store()
+        if store is None:
+            raise RuntimeError(
+                "ARTICLE_STORE_ENABLED is off; cannot compose from the article store."
+            )
+        by_topic = store.for_topics(
+            topic_queries, per_topic, since=cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")
+        )
+    except sqlite3.Error as exc:
+        raise RuntimeError(f"Cannot compose from the article store: {exc}") from exc
+    return merge_articles(by_topic.values())
 
-        composer = EmailComposer()
-        subject, body = composer.compose_email(articles)
 
-        send_email_brevo(subject, body)
+def _export_metrics(run_name: str) -> None:
+    metrics_dir = get_settings().metrics_dir
+    if metrics_dir:
+        metrics.export(metrics_dir, run_name)
+
+
+def run(from_store: bool = False) -> None:
+    """Orchestrate the pipeline: fetch news -> compose email -> send.
+
+    With *from_store* the digest is built from the local article store
+    (no NewsAPI requests); otherwise fetched articles are added to it.
+    """
+    metrics.reset()
+    try:
+        with metrics.span("run"):
+            settings = get_settings()
+            state = _open_state(settings.region)
+
+            if from_store:
+                with metrics.span("store_load"):
+                    articles = _from_store(get_topic_queries(), per_topic=5)
+            else:
+                with metrics.span("fetch"):
+                    articles = fetch_latest_news(
+                        page_size_per_topic=5,
+                        watermarks=state[0].as_dict() if state else None,
+                    )
+                _store_articles(articles)
+            if not articles:
+                logger.warning("No articles fetched; aborting email send.")
+                return
+
+            _deliver(articles, state, subscriptions=load_recipient_topics())
     except Exception as exc:
+        metrics.incr("run_failures")
         logger.exception("Unhandled exception: %s", exc)
         raise
+    finally:
+        _export_metrics("run")
+
+
+def _fetch_regions(
+    profiles: Sequence[RegionProfile], states: Mapping[str, FetchState | None]
+) -> Dict[str, List[Dict]]:
+    """Fetch every region's topics with one request per distinct query."""
+    # Key the union by query string so identical queries are fetched once.
+    since: Dict[str, str | None] = {}
+    # Stored articles are saved under the profiles' topic keys, not the query.
+    stored_topics: Dict[str, List[str]] = {}
+    for profile in profiles:
+        state = states[profile.region]
+        for topic, query in profile.topic_queries.items():
+            if topic not in stored_topics.setdefault(query, []):
+                stored_topics[query].append(topic)
+            mark = state[0].get(topic) if state else None
+            if query not in since:
+                since[query] = mark
+            elif since[query] is None or mark is None:
+                since[query] = None
+            else:
+                since[query] = min(since[query], mark)
+    page_size = max(p.page_size_per_topic for p in profiles)
+    with metrics.span("fetch"):
+        by_query = fetch_topics(
+            {query: query for query in since},
+            page_size_per_topic=page_size,
+            watermarks={q: mark for q, mark in since.items() if mark},
+            stored_topics=stored_topics,
+        )
+    # Regions overlap, so count URL duplicates once over the whole fetch.
+    merge_articles(by_query.values())
+    return {
+        profile.region: merge_articles(
+            (
+                [art.with_topic(topic) for art in by_query.get(query, [])]
+                for topic, query in profile.topic_queries.items()
+            ),
+            count_dropped=False,
+        )
+        for profile in profiles
+    }
+
+
+def run_regions(
+    profiles: Sequence[RegionProfile] | None = None, from_store: bool = False
+) -> None:
+    """Fetch the union of every region's queries once, then compose and send each digest.
+
+    Queries shared between regions are requested a single time. The fetch
+    starts from the oldest watermark any region holds for that query, and each
+    region then filters out what it has already sent. Regional digests are
+    composed and sent concurrently. *from_store* reads every region's
+    articles from the local article store instead of fetching.
+    """
+    metrics.reset()
+    started = time.perf_counter()
+    try:
+        profiles = list(profiles) if profiles is not None else load_region_profiles()
+        states = {p.region: _open_state(p.region) for p in profiles}
+
+        if not profiles:
+            logger.warning("No region profiles configured; nothing to send.")
+            return
+
+        if from_store:
+            with metrics.span("store_load"):
+                regional = {
+                    p.region: _from_store(p.topic_queries, p.page_size_per_topic)
+                    for p in profiles
+                }
+        else:
+            regional = _fetch_regions(profiles, states)
+            _store_articles([art for arts in regional.values() for art in arts])
+
+        with ThreadPoolExecutor(
+            max_workers=len(profiles), thread_name_prefix="region"
+        ) as pool:
+            futures = {
+                profile.region: pool.submit(
+                    _deliver,
+                    regional[profile.region],
+                    states[profile.region],
+                    profile.region,
+                    profile.topic_queries,
+                    profile.recipients,
+                    profile.subscriptions,
+                )
+                for profile in profiles
+            }
+        failed = []
+        for region, future in futures.items():
+            try:
+                future.result()
+            except Exception as exc:
+                logger.exception("Region %s failed: %s", region, exc)
+                failed.append(region)
+                metrics.incr("region_failures", region=region)
+        if failed:
+            raise RuntimeError(f"Digest delivery failed for: {', '.join(failed)}")
+    except Exception as exc:
+        metrics.incr("run_failures")
+        logger.exception("Unhandled exception: %s", exc)
+        raise
+    finally:
+        metrics.observe("run", time.perf_counter() - started)
+        _export_metrics("regions")
+
 
 if __name__ == "__main__":
-    run()
+    from_store = "--from-store" in sys.argv[1:]
+    if "--regions" in sys.argv[1:]:
+        run_regions(from_store=from_store)
+    else:
+        run(from_store=from_store)
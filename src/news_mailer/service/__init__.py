@@ -1,7 +1,22 @@
-"""Service layer packages (auth, mail, news)."""
+"""Service layer packages (auth, mail, news).
 
-from .auth import oauth
-from .mail import email_composer, email_sender_gmail
-from .news import news_fetcher
+Submodules are imported on first attribute access so that importing one
+service (e.g. news) does not pull in the SDKs used by the others.
+"""
+
+from importlib import import_module
+
+_SUBMODULES = {
+    "oauth": ".auth.oauth",
+    "email_composer": ".mail.email_composer",
+    "email_sender_gmail": ".mail.email_sender_gmail",
+    "news_fetcher": ".news.news_fetcher",
+}
 
 __all__ = ["oauth", "email_composer", "email_sender_gmail", "news_fetcher"]
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return import_module(_SUBMODULES[name], __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,13 +8,10 @@ from typing import Sequence
 
 from google.auth.exceptions import GoogleAuthError
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
+from src.news_mailer.config import load_env
 from src.news_mailer.utils import get_logger
 
-from dotenv import load_dotenv
-
-load_dotenv(override=True)
 logger = get_logger(__name__)
 
 SCOPES: Sequence[str] = ("https://www.googleapis.com/auth/gmail.send",)
@@ -29,6 +26,8 @@ def load_user_credentials() -> Credentials | None:
     open a local browser window for the user to grant consent. The resulting
     refresh token is stored in `token.json`.
     """
+    # ``.env`` wins over stale GOOGLE_* / TOKEN_* variables in the shell.
+    load_env(override=True)
     creds: Credentials | None = None
 
     if TOKEN_FILE.exists():
@@ -67,6 +66,9 @@ def load_user_credentials() -> Credentials | None:
 
 def refresh_user_credentials() -> Credentials | None:
     if CLIENT_SECRETS.exists():
+        # Only the interactive consent flow needs oauthlib; import it on demand.
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
         flow = InstalledAppFlow.from_client_secrets_file(str(CLIENT_SECRETS), SCOPES)
         creds = flow.run_local_server(
             port=0,
@@ -1,7 +1,25 @@
-"""Mail service."""
+"""Mail service.
 
-from .email_composer import EmailComposer
-from .email_sender_gmail import send_email_gmail
-from .email_sender_brevo import send_email_brevo
+Exports are resolved lazily: each sender pulls in its own SDK (Gemini,
+Gmail, Brevo) only when it is first used.
+"""
 
-__all__ = ["EmailComposer", "send_email_gmail", "send_email_brevo"]
+from importlib import import_module
+
+_EXPORTS = {
+    "EmailComposer": ".email_composer",
+    "DigestFragments": ".fragments",
+    "postprocess_html": ".html_postprocess",
+    "GmailSender": ".email_sender_gmail",
+    "send_email_gmail": ".email_sender_gmail",
+    "send_email_brevo": ".email_sender_brevo",
+    "send_email_brevo_bulk": ".email_sender_brevo",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
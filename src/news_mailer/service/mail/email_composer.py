@@ -1,17 +1,51 @@
-from dotenv import load_dotenv
-from os import getenv
-from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, List, Dict, Mapping, Tuple
 import datetime
-
-import google.generativeai as genai
+import re
 
 from src.news_mailer.config import get_settings
 from src.news_mailer.utils import get_logger
-from src.news_mailer.service.news import TOPIC_QUERIES
+from src.news_mailer.utils.disk_cache import DiskCache
+from src.news_mailer.utils.metrics import metrics
+from src.news_mailer.utils.rate_limit import get_rate_limiter
+from src.news_mailer.utils.singleton import locked_cache
+from src.news_mailer.service.news import get_topic_queries
+from src.news_mailer.service.mail.fragments import (
+    SECTIONS_MARKER,
+    DigestFragments,
+    sources_html,
+)
+from src.news_mailer.service.mail.generation import (
+    HedgedGenerator,
+    LatencyHistograms,
+    is_rate_limited,
+)
+from src.news_mailer.service.mail.prompt_packer import (
+    PackedArticles,
+    estimate_tokens,
+    format_article,
+    pack_articles,
+)
 
-load_dotenv()
 logger = get_logger(__name__)
 
+# Gemini 429 messages read "... Please retry in 23.4s."
+_RETRY_IN_RE = re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE)
+RATE_LIMIT_RETRIES = 2
+
+
+def _rate_limit_hint(exc: Exception) -> Dict[str, str] | None:
+    """Headers describing a Gemini 429, or ``None`` if *exc* is not one."""
+    if not is_rate_limited(exc):
+        return None
+    response = getattr(exc, "response", None)
+    headers = dict(getattr(response, "headers", None) or {})
+    match = _RETRY_IN_RE.search(str(exc))
+    if match and "Retry-After" not in headers:
+        headers["Retry-After"] = match.group(1)
+    return headers
+
 
 def _pretty_topic(key: str) -> str:
     """Convert snake_case topic keys to display form like 'US Stock Market'."""
@@ -19,13 +53,10 @@ def _pretty_topic(key: str) -> str:
         word.upper() if len(word) <= 3 else word.capitalize() for word in key.split("_")
     )
 
-REGION = getenv("REGION") if getenv("REGION") else "Global"
-
-DISPLAY_TOPICS = ", ".join(_pretty_topic(k) for k in TOPIC_QUERIES.keys())
 
 SNIPPET_CHARS = 400
 
-PROMPT_TEMPLATE = f"""
+_PROMPT_TEMPLATE = """
 You are an expert financial and global news analyst tasked with creating an engaging and informative HTML email digest. Your goal is to deliver the most critical and latest time-sensitive news, providing insightful context and analysis that helps the reader understand the "why" and "what's next." Your digest MUST include at least one numbered section for EACH of these topics: {DISPLAY_TOPICS}.
 
 The email should be structured with clear headings, subheadings, and bullet points, using simple inline styles for readability and broad email client compatibility. Do NOT wrap the output in <html><body>; just produce the inner HTML fragment.
@@ -55,36 +86,305 @@ The email should be structured with clear headings, subheadings, and bullet poin
 **News Articles (for detailed analysis):**
 [INSERT_NEWS_ARTICLES_HERE]
 """
+
+SECTION_PROMPT_TEMPLATE = """
+You are an expert financial and global news analyst writing ONE part of a larger HTML email digest: the numbered news sections for the topic "[TOPIC]". Other topics, the introduction, the outlook and the closing are written separately, so produce ONLY the sections described below. Do NOT wrap the output in <html><body>, do NOT add a greeting, headline for the topic, outlook or closing.
+
+Tone: professional, insightful, slightly urgent, easy to understand for a general audience.
+
+For each of the provided news articles, create a distinct section:
+* Start with an `<h3>` heading holding the section number, the news item's title and its citation tag in square brackets, e.g. "[NUMBER]. [News Title] [<a href='URL'>[CITATION]</a>]". Number the sections consecutively starting at [START]. Use EXACTLY the citation number given in square brackets before each article below; never renumber citations.
+* Under each `<h3>`, use the following structure with `<p>` tags and inline styles:
+    * `<p style="font-weight: bold;">What Happened:</p>`: A concise, one-sentence summary of the news event.
+    * `<p style="font-weight: bold;">Simple Explanation:</p>`: Briefly explain the news in layman's terms, including any relevant background if necessary.
+    * `<p style="font-weight: bold;">The Results:</p>`: State the immediate, concrete outcomes or data points from the news.
+    * `<p style="font-weight: bold;">Why it Matters:</p>`: Explain the significance and broader implications of the news.
+    * `<p style="font-weight: bold;">Simple Implication (If... Then...):</p>`: Provide a clear "if-then" statement to illustrate potential future impacts or market reactions.
+    * `<p style="font-weight: bold;">Expert Opinion:</p>`: Craft a single, rich paragraph (3–4 sentences) offering a nuanced expert perspective. Focus on substance over filler.
+    * Conclude the section with a `<p>` relating the news to broader market movements, following any statistics or claims with the matching citation tag, e.g. "[<a href='URL'>2</a>]".
+
+**News Articles:**
+[INSERT_NEWS_ARTICLES_HERE]
+"""
+
+FRAME_PROMPT_TEMPLATE = """
+You are an expert financial and global news analyst writing the framing of an HTML email digest. The detailed news sections are written separately and will be inserted where you place the exact marker <!-- SECTIONS -->. Do NOT write the news sections yourself and do NOT wrap the output in <html><body>.
+
+Produce, in this order:
+1.  **Introduction:** A friendly, date-aware greeting in a `<p>` tag (e.g., "Good morning/afternoon/evening from Jakarta!") that highlights the overall market mood or the most dominant theme of the day.
+2.  **Contextual Overview:** A brief, high-level `<p>` summary of the day's significant events, emphasizing any prevailing "wait-and-see" attitudes, upcoming major announcements, or key ongoing discussions.
+3.  An `<h2>` reading "Let's break it down."
+4.  The marker <!-- SECTIONS --> on its own line.
+5.  **"All Eyes Are Now on Tomorrow" Section:** An `<h3>` section listing key upcoming events in a `<ul>` where each `<li>` describes the event and its potential impact, followed by a `<p>` explaining why these events matter for global markets (stocks, bonds, currencies, crypto, etc.).
+6.  **Closing:** A polite, forward-looking `<p>` summarizing the day's overall mood and hinting at what's to come.
+
+Today's headlines, by topic (cite with the given numbers as "[<a href='URL'>N</a>]" if you reference one):
+[INSERT_HEADLINES_HERE]
+"""
+
+
+def _headline(idx: int, article: Dict) -> str:
+    """One article's line in the framing prompt's headline list."""
+    return f"  [{idx}] {article['title']} ({article['url']})"
+
+
+def build_prompt_template(topic_queries: Mapping[str, str]) -> str:
+    """Return the digest prompt requiring a section for each topic in *topic_queries*."""
+    display_topics = ", ".join(_pretty_topic(k) for k in topic_queries.keys())
+    return _PROMPT_TEMPLATE.replace("{DISPLAY_TOPICS}", display_topics)
+
+
+def __getattr__(name: str):
+    # Derived from ``TOPIC_QUERIES``, so only built when first asked for.
+    if name == "DISPLAY_TOPICS":
+        return ", ".join(_pretty_topic(k) for k in get_topic_queries().keys())
+    if name == "PROMPT_TEMPLATE":
+        return build_prompt_template(get_topic_queries())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 MODEL_NAME = "gemini-2.5-flash-preview-05-20"
 
+GENERATION_CONFIG: Dict[str, Any] = {}
+
+
+@locked_cache
+def get_generation_cache() -> DiskCache | None:
+    """Return the on-disk Gemini generation cache, or ``None`` when disabled."""
+    settings = get_settings()
+    if not settings.generation_cache_enabled:
+        return None
+    return DiskCache(
+        Path(settings.cache_dir) / "gemini",
+        ttl_seconds=settings.generation_cache_ttl_seconds,
+        max_bytes=settings.generation_cache_max_bytes,
+    )
+
+
+@locked_cache
+def get_genai():
+    """Import and configure the Gemini SDK once per process.
+
+    ``genai.configure`` drops the SDK's cached clients, so calling it per
+    composer would throw away warm connections between digests.
+    """
+    # The Gemini SDK is heavy to import; only pay for it when composing.
+    import google.generativeai as genai
+
+    settings = get_settings()
+    if settings.gemini_api_endpoint:
+        # The gRPC transport cannot talk to a plain HTTP endpoint.
+        genai.configure(
+            api_key=settings.gemini_api_key,
+            transport="rest",
+            client_options={"api_endpoint": settings.gemini_api_endpoint},
+        )
+    else:
+        genai.configure(api_key=settings.gemini_api_key)
+    return genai
+
+
+@locked_cache
+def get_latency_histograms() -> LatencyHistograms:
+    """Return the process-wide Gemini latency histograms (persisted under STATE_DIR)."""
+    return LatencyHistograms(Path(get_settings().state_dir) / "gemini_latency.json")
+
+
 class EmailComposer:
-    """Compose email content using Gemini Pro 2.5."""
+    """Compose email content with Gemini through a :class:`HedgedGenerator`.
+
+    Generations go to ``MODEL_NAME`` and are hedged to
+    ``GEMINI_FALLBACK_MODEL`` (or ``MODEL_NAME`` again) when slow or failing.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        region: str | None = None,
+        topic_queries: Mapping[str, str] | None = None,
+    ):
+        genai = get_genai()
         settings = get_settings()
-        genai.configure(api_key=settings.gemini_api_key)
         self.model = genai.GenerativeModel(MODEL_NAME)
+        self.model_name = MODEL_NAME
+        models = {MODEL_NAME: self.model}
+        fallback = settings.gemini_fallback_model
+        if fallback and fallback not in models:
+            models[fallback] = genai.GenerativeModel(fallback)
+        self.generator = HedgedGenerator(
+            models,
+            primary=MODEL_NAME,
+            fallback=fallback,
+            histograms=get_latency_histograms(),
+            ttft_deadline=settings.gemini_ttft_deadline,
+            overall_deadline=settings.gemini_overall_deadline,
+            hedge_percentile=settings.gemini_hedge_percentile,
+            hedge_delay=settings.gemini_hedge_delay,
+            hedge_enabled=settings.gemini_hedge_enabled,
+            limiter=get_rate_limiter("gemini"),
+        )
+        self.generation_config = dict(GENERATION_CONFIG)
+        self.region = region or settings.region or "Global"
+        topic_queries = topic_queries or get_topic_queries()
+        self.topics = list(topic_queries)
+        self.cited_articles: List[Dict] = []
+        self.prompt_template = build_prompt_template(topic_queries)
 
-    def compose_email(self, articles: List[Dict]) -> Tuple[str, str]:
-        """Generate email subject and body from a list of articles.
+    def _generate(self, prompt: str) -> Tuple[str, Any]:
+        """Run *prompt* through Gemini, reusing a cached body for identical inputs.
 
-        Args:
-            articles: List of article dicts with `title` and `url`.
+        The cache key is a hash of the model name, the final prompt and the
+        generation config, so any change to one of them forces a fresh call.
+        Lookups use the primary model; a body produced by the fallback model
+        after a hedge is stored under the fallback's name, so it is never
+        served later as the primary's output. Returns the text and the
+        response's ``usage_metadata`` (``None`` on a cache hit).
+        """
+        cache = get_generation_cache()
+        if cache is not None:
+            cached = cache.get(self._cache_key(self.model_name, prompt))
+            if cached is not None:
+                logger.info("Gemini generation cache hit (%s)", cache.stats)
+                metrics.incr("generation_cache_hits")
+                return cached, None
+            logger.info("Gemini generation cache miss (%s)", cache.stats)
 
-        Returns:
-            subject, body
+        limiter = get_rate_limiter("gemini")
+        attempt = 0
+        while True:
+            try:
+                # Waits out RPM/TPM budgets and any 429 cool-down first.
+                with limiter.slot(tokens=estimate_tokens(prompt)), metrics.span(
+                    "gemini_call", model=self.model_name
+                ):
+                    text, usage, model_name = self.generator.generate(
+                        prompt, self.generation_config or None
+                    )
+            except Exception as exc:
+                headers = _rate_limit_hint(exc)
+                if headers is None:
+                    raise
+                limiter.record(429, headers)
+                if attempt >= RATE_LIMIT_RETRIES:
+                    raise
+                attempt += 1
+                continue
+            limiter.record(200)
+            break
+        text = text.strip()
+        if cache is not None:
+            cache.set(self._cache_key(model_name, prompt), text)
+        return text, usage
+
+    def _cache_key(self, model_name: str, prompt: str) -> str:
+        return DiskCache.make_key(
+            {
+                "model": model_name,
+                "prompt": prompt,
+                "generation_config": self.generation_config,
+            }
+        )
+
+    def _generate_fragments(
+        self, date_preface: str, packed: PackedArticles
+    ) -> Tuple[str, Dict[str, str], Dict[str, List[Dict]], List[Any]]:
+        """Write each topic's sections in parallel, plus a short framing pass.
+
+        Articles keep the citation numbers they were given in the Sources
+        order; each topic prompt is told those numbers and which section
+        number to start from, so the stitched body reads as one digest.
+        Returns the frame, the sections and cited articles per topic (in
+        topic order) and the usage metadata of every call.
         """
-        news_lines = []
-        for idx, article in enumerate(articles, start=1):
-            snippet = article.get("content") or article.get("description") or ""
-            snippet = snippet.strip()
-            if len(snippet) > SNIPPET_CHARS:
-                snippet = snippet[:SNIPPET_CHARS].rstrip() + "…"
-            news_lines.append(
-                f"- [{idx}] {article['title']}\n  {snippet}\n  {article['url']}\n"
+        by_topic: Dict[str, List[Tuple[int, Dict, str]]] = {}
+        for idx, (article, snippet) in enumerate(
+            zip(packed.articles, packed.snippets), start=1
+        ):
+            by_topic.setdefault(article.get("topic") or "other", []).append(
+                (idx, article, snippet)
+            )
+        ordered = [t for t in self.topics if t in by_topic] + [
+            t for t in by_topic if t not in self.topics
+        ]
+
+        section_prompts = []
+        start = 1
+        for topic in ordered:
+            block = "\n".join(
+                format_article(idx, art, snippet)
+                for idx, art, snippet in by_topic[topic]
+            )
+            section_prompts.append(
+                date_preface
+                + SECTION_PROMPT_TEMPLATE.replace("[TOPIC]", _pretty_topic(topic))
+                .replace("[START]", str(start))
+                .replace("[INSERT_NEWS_ARTICLES_HERE]", block)
             )
-        news_block = "\n".join(news_lines)
+            start += len(by_topic[topic])
+
+        headlines = "\n".join(
+            f"{_pretty_topic(topic)}:\n"
+            + "\n".join(_headline(idx, art) for idx, art, _ in by_topic[topic])
+            for topic in ordered
+        )
+        frame_prompt = date_preface + FRAME_PROMPT_TEMPLATE.replace(
+            "[INSERT_HEADLINES_HERE]", headlines
+        )
 
+        workers = max(1, get_settings().compose_max_concurrency)
+        logger.info(
+            "Composing %d topic sections with up to %d parallel calls",
+            len(section_prompts),
+            workers,
+        )
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="compose"
+        ) as pool:
+            frame_future = pool.submit(self._generate, frame_prompt)
+            section_results = list(pool.map(self._generate, section_prompts))
+            frame, frame_usage = frame_future.result()
+
+        sections = {topic: text for topic, (text, _) in zip(ordered, section_results)}
+        cited = {topic: [art for _, art, _ in by_topic[topic]] for topic in ordered}
+        usages = [frame_usage] + [usage for _, usage in section_results]
+        return frame, sections, cited, usages
+
+    def _compose_map_reduce(
+        self, date_preface: str, packed: PackedArticles
+    ) -> Tuple[str, List[Any]]:
+        """Generate topic fragments and stitch them into the frame."""
+        frame, sections, _, usages = self._generate_fragments(date_preface, packed)
+        joined = "\n".join(sections.values())
+        if SECTIONS_MARKER in frame:
+            body = frame.replace(SECTIONS_MARKER, joined, 1)
+        else:
+            logger.warning("Framing pass omitted the sections marker; appending them")
+            body = frame + "\n" + joined
+        return body, usages
+
+    def _split_fixed_text(self, date_preface: str, articles: List[Dict]) -> str:
+        """The fixed parts of every section prompt plus the framing prompt."""
+        present = {art.get("topic") or "other" for art in articles}
+        topics = [t for t in self.topics if t in present] + sorted(
+            present - set(self.topics)
+        )
+        section = date_preface + SECTION_PROMPT_TEMPLATE.replace(
+            "[INSERT_NEWS_ARTICLES_HERE]", ""
+        )
+        return (
+            "".join(section.replace("[TOPIC]", _pretty_topic(t)) for t in topics)
+            + date_preface
+            + FRAME_PROMPT_TEMPLATE.replace("[INSERT_HEADLINES_HERE]", "")
+            + "".join(f"{_pretty_topic(t)}:\n" for t in topics)
+        )
+
+    def _pack(
+        self, articles: List[Dict], split: bool = False
+    ) -> Tuple[str, str, PackedArticles]:
+        """Return the display date, the date preface and the packed articles.
+
+        With *split* the budget covers the per-topic section prompts and the
+        framing prompt together, as sent by :meth:`_generate_fragments`.
+        """
         jakarta_now = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
             hours=7
         )
@@ -92,34 +392,111 @@ class EmailComposer:
 
         date_preface = f"Today's date in Jakarta is {current_date_str}. Use this exact date in the greeting WITHOUT additional styling. For any other components other than date, you are allowed to style it"
 
-        prompt = date_preface + PROMPT_TEMPLATE.replace(
-            "[INSERT_NEWS_ARTICLES_HERE]", news_block
+        if split:
+            fixed_text = self._split_fixed_text(date_preface, articles)
+        else:
+            fixed_text = date_preface + self.prompt_template.replace(
+                "[INSERT_NEWS_ARTICLES_HERE]", ""
+            )
+        with metrics.span("prompt_build"):
+            packed = pack_articles(
+                articles,
+                fixed_text,
+                budget_tokens=get_settings().prompt_token_budget,
+                topics=self.topics,
+                max_snippet_chars=SNIPPET_CHARS,
+                listed_again=_headline if split else None,
+            )
+        self.cited_articles = packed.articles
+        metrics.incr("articles_dropped", packed.dropped, reason="token_budget")
+        metrics.incr("articles_cited", len(packed.articles), region=self.region)
+
+        logger.info(
+            "Composing email with %d articles (~%d prompt tokens)",
+            len(packed.articles),
+            packed.estimated_tokens,
         )
-        logger.info("Composing email with %d articles", len(articles))
-        response = self.model.generate_content(prompt)
-        body = response.text.strip()
-
-        sources_html_lines = [
-            "<hr>",
-            '<p style="font-weight:bold;">Sources:</p>',
-            "<ul>",
-        ]
-        for idx, article in enumerate(articles, start=1):
-            url = article.get("url")
-            title = article.get("title", url)
-            sources_html_lines.append(f'<li>[{idx}] <a href="{url}">{title}</a></li>')
-        sources_html_lines.append("</ul>")
+        return current_date_str, date_preface, packed
+
+    @staticmethod
+    def _log_usage(packed: PackedArticles, usages: List[Any]) -> None:
+        usages = [u for u in usages if u is not None]
+        metrics.incr("prompt_tokens_estimated", packed.estimated_tokens)
+        if usages:
+            prompt_tokens = sum(
+                getattr(u, "prompt_token_count", 0) or 0 for u in usages
+            )
+            output_tokens = sum(
+                getattr(u, "candidates_token_count", 0) or 0 for u in usages
+            )
+            metrics.incr("prompt_tokens", prompt_tokens)
+            metrics.incr("output_tokens", output_tokens)
+            logger.info(
+                "Prompt tokens: estimated %d, actual %d; output tokens: %d",
+                packed.estimated_tokens,
+                prompt_tokens,
+                output_tokens,
+            )
 
+    def _footer_html(self) -> str:
         settings = get_settings()
         author_name = (
             getattr(settings, "author_name", None) or settings.email_from.split("@")[0]
         )
-        footer_html = (
+        return (
             f'<p style="font-size:0.8em;">News feed generated by Gemini, authored by '
             f"{author_name} &lt;{settings.email_from}&gt;</p>"
         )
 
-        body += "\n" + "\n".join(sources_html_lines) + "\n" + footer_html
+    def _subject(self, current_date_str: str) -> str:
+        return f"Your {self.region} Daily News Digest - {current_date_str}"
+
+    def compose_fragments(self, articles: List[Dict]) -> DigestFragments:
+        """Generate the shared frame and one section fragment per topic.
+
+        The Gemini cost is one call per topic plus the frame, however many
+        recipients later get a personalised :meth:`DigestFragments.render`.
+        """
+        current_date_str, date_preface, packed = self._pack(articles, split=True)
+        with metrics.span("generation", mode="fragments"):
+            frame, sections, cited, usages = self._generate_fragments(
+                date_preface, packed
+            )
+        self._log_usage(packed, usages)
+        return DigestFragments(
+            subject=self._subject(current_date_str),
+            frame=frame,
+            footer=self._footer_html(),
+            sections=sections,
+            articles=cited,
+        )
+
+    def compose_email(self, articles: List[Dict]) -> Tuple[str, str]:
+        """Generate email subject and body from a list of articles.
+
+        Args:
+            articles: List of article dicts with `title` and `url`.
+
+        Returns:
+            subject, body
+
+        The articles that made it into the prompt (and the Sources list) are
+        left on ``self.cited_articles``.
+        """
+        compose_mode = get_settings().compose_mode
+        current_date_str, date_preface, packed = self._pack(
+            articles, split=compose_mode == "map_reduce"
+        )
+        with metrics.span("generation", mode=compose_mode):
+            if compose_mode == "map_reduce":
+                body, usages = self._compose_map_reduce(date_preface, packed)
+            else:
+                prompt = date_preface + self.prompt_template.replace(
+                    "[INSERT_NEWS_ARTICLES_HERE]", packed.news_block
+                )
+                body, usage = self._generate(prompt)
+                usages = [usage]
+        self._log_usage(packed, usages)
 
-        subject = f"Your {REGION} Daily News Digest - {current_date_str}"
-        return subject, body
+        body += "\n" + sources_html(packed.articles) + "\n" + self._footer_html()
+        return self._subject(current_date_str), body
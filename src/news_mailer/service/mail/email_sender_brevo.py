@@ -1,68 +1,176 @@
 from __future__ import annotations
 
-from typing import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence
 
 import brevo_python
+import urllib3
 from brevo_python.rest import ApiException
 
 from src.news_mailer.config import get_settings
 from src.news_mailer.utils import get_logger
+from src.news_mailer.utils.metrics import metrics
+from src.news_mailer.utils.rate_limit import RateLimited, get_rate_limiter
+from src.news_mailer.utils.singleton import locked_cache
 
 logger = get_logger(__name__)
 
 
-def send_email_brevo(
-    subject: str, body: str, to_addresses: Sequence[str] | None = None
-) -> None:
-    """Send an HTML email via the Brevo API.
-
-    This function uses the Brevo Transactional Email API to send emails.
-    The API key is resolved from the `BREVO_API_KEY` environment variable.
-    The sender email is resolved from the `BREVO_EMAIL_PROVIDER` environment variable.
-
-    If *to_addresses* is omitted the comma-separated `EMAIL_TO` addresses from settings are used.
-    """
+@locked_cache
+def get_brevo_api() -> brevo_python.TransactionalEmailsApi:
+    """Return a process-wide Brevo client sharing one pooled HTTP connection manager."""
     settings = get_settings()
-
-    # Get Brevo-specific settings
-    brevo_api_key = settings.brevo_api_key
-    brevo_sender_email = settings.brevo_email_provider
-
-    if not brevo_api_key:
+    if not settings.brevo_api_key:
         raise RuntimeError(
             "BREVO_API_KEY is not set. Please provide it in your .env file."
         )
 
-    if not brevo_sender_email:
-        raise RuntimeError(
-            "BREVO_EMAIL_PROVIDER is not set. Please provide it in your .env file."
-        )
-
     # Configure API key authorization
     configuration = brevo_python.Configuration()
-    configuration.api_key["api-key"] = brevo_api_key
+    configuration.api_key["api-key"] = settings.brevo_api_key
+    configuration.connection_pool_maxsize = max(1, settings.brevo_max_concurrency)
+    if settings.brevo_api_host:
+        configuration.host = settings.brevo_api_host
 
-    # Create an instance of the API class
-    api_instance = brevo_python.TransactionalEmailsApi(
-        brevo_python.ApiClient(configuration)
-    )
+    return brevo_python.TransactionalEmailsApi(brevo_python.ApiClient(configuration))
 
-    recipients = to_addresses or [addr.strip() for addr in settings.email_to.split(",")]
 
-    logger.info("Sending Brevo API email to %s", recipients)
+# Extra attempts for a batch Brevo answered with 429.
+RATE_LIMIT_RETRIES = 2
+
 
-    # Create the email message
+def _sender_email() -> str:
+    brevo_sender_email = get_settings().brevo_email_provider
+    if not brevo_sender_email:
+        raise RuntimeError(
+            "BREVO_EMAIL_PROVIDER is not set. Please provide it in your .env file."
+        )
+    return brevo_sender_email
+
+
+def _send_batch(
+    subject: str, body: str, text_body: str | None, batch: List[str]
+) -> Dict[str, str]:
+    """Send one request whose message versions each address a single recipient."""
     send_smtp_email = brevo_python.SendSmtpEmail(
-        sender={"email": brevo_sender_email},
-        to=[{"email": email} for email in recipients],
+        sender={"email": _sender_email()},
         subject=subject,
         html_content=body,
-        text_content=None,  # Optional: can add plain text version if needed
+        text_content=text_body,
+        message_versions=[{"to": [{"email": email}]} for email in batch],
+    )
+    limiter = get_rate_limiter("brevo")
+    attempt = 0
+    while True:
+        try:
+            # Paced by BREVO_RATE_PER_SECOND; the daily quota counts emails.
+            with limiter.slot(cost=len(batch)), metrics.span("send_brevo_batch"):
+                api_response = get_brevo_api().send_transac_email(send_smtp_email)
+        except RateLimited as e:
+            logger.error("Brevo batch of %d not sent: %s", len(batch), e)
+            return {email: f"failed: {e}" for email in batch}
+        except ApiException as e:
+            # A rejected batch sends no emails, so it does not count towards
+            # the daily quota.
+            limiter.refund(len(batch))
+            limiter.record(e.status, e.headers)
+            if e.status == 429 and attempt < RATE_LIMIT_RETRIES:
+                attempt += 1
+                continue
+            logger.error("Error sending Brevo batch of %d: %s", len(batch), e)
+            return {email: f"failed: {e.status} {e.reason}" for email in batch}
+        except (urllib3.exceptions.HTTPError, OSError) as e:
+            # Timeouts and dropped connections fail this batch only, so the
+            # statuses of batches already sent are not lost.
+            limiter.refund(len(batch))
+            logger.error("Brevo batch of %d not sent: %r", len(batch), e)
+            return {email: f"failed: {e!r}" for email in batch}
+        limiter.record(200)
+        break
+
+    message_ids = getattr(api_response, "message_ids", None) or []
+    if len(message_ids) != len(batch):
+        message_ids = [api_response.message_id] * len(batch)
+    return {email: f"sent: {mid}" for email, mid in zip(batch, message_ids)}
+
+
+def send_email_brevo_bulk(
+    subject: str,
+    body: str,
+    recipients: Sequence[str],
+    text_body: str | None = None,
+    batch_size: int | None = None,
+) -> Dict[str, str]:
+    """Deliver one body to many recipients through Brevo ``messageVersions``.
+
+    Recipients are split into batches of *batch_size* message versions (one
+    recipient per version, so nobody sees the other addresses). Batches are
+    sent concurrently over a shared client through the ``brevo`` rate limiter
+    (``BREVO_RATE_PER_SECOND`` requests per second, ``BREVO_DAILY_QUOTA``
+    emails per day, retried after a 429's back-off).
+
+    Returns a mapping of recipient address to ``"sent: <message id>"`` or
+    ``"failed: <reason>"``.
+    """
+    settings = get_settings()
+    # Fail fast on missing configuration rather than once per batch.
+    get_brevo_api()
+    _sender_email()
+    batch_size = batch_size or settings.brevo_batch_size
+    unique = list(dict.fromkeys(addr.strip() for addr in recipients if addr.strip()))
+    batches = [unique[i : i + batch_size] for i in range(0, len(unique), batch_size)]
+    if not batches:
+        return {}
+
+    logger.info(
+        "Sending Brevo email to %d recipients in %d batches", len(unique), len(batches)
     )
+    workers = min(len(batches), max(1, settings.brevo_max_concurrency))
+    statuses: Dict[str, str] = {}
+    with metrics.span("send", provider="brevo"), ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="brevo"
+    ) as pool:
+        for result in pool.map(
+            lambda batch: _send_batch(subject, body, text_body, batch), batches
+        ):
+            statuses.update(result)
+
+    failed = sum(1 for status in statuses.values() if status.startswith("failed"))
+    metrics.incr("emails_sent", len(statuses) - failed, provider="brevo")
+    metrics.incr("emails_failed", failed, provider="brevo")
+    metrics.incr(
+        "html_bytes_sent",
+        len(body.encode("utf-8")) * (len(statuses) - failed),
+        provider="brevo",
+    )
+    logger.info(
+        "Brevo delivery finished: %d sent, %d failed", len(statuses) - failed, failed
+    )
+    return statuses
+
+
+def send_email_brevo(
+    subject: str,
+    body: str,
+    to_addresses: Sequence[str] | None = None,
+    text_body: str | None = None,
+) -> None:
+    """Send an HTML email via the Brevo API.
+
+    This function uses the Brevo Transactional Email API to send emails.
+    The API key is resolved from the `BREVO_API_KEY` environment variable.
+    The sender email is resolved from the `BREVO_EMAIL_PROVIDER` environment variable.
+
+    If *to_addresses* is omitted the comma-separated `EMAIL_TO` addresses from settings are used.
+    *text_body* is sent as the plain-text alternative.
+    Each recipient gets their own copy (see :func:`send_email_brevo_bulk`); a
+    ``RuntimeError`` is raised if any of them could not be sent.
+    """
+    settings = get_settings()
+    recipients = to_addresses or [addr.strip() for addr in settings.email_to.split(",")]
 
-    try:
-        api_response = api_instance.send_transac_email(send_smtp_email)
-        logger.info("Email sent via Brevo API. Message ID: %s", api_response.message_id)
-    except ApiException as e:
-        logger.error("Error sending email via Brevo API: %s", e)
-        raise RuntimeError(f"Failed to send email via Brevo: {e}")
+    statuses = send_email_brevo_bulk(subject, body, recipients, text_body=text_body)
+    failed = {email: s for email, s in statuses.items() if s.startswith("failed")}
+    if failed:
+        raise RuntimeError(f"Failed to send email via Brevo to: {failed}")
+    logger.info("Email sent via Brevo API to %d recipients", len(statuses))
@@ -1,19 +1,173 @@
 from __future__ import annotations
 
 import base64
+import datetime
+import threading
 from email.message import EmailMessage
-from typing import Sequence
+from typing import Callable, Dict, Sequence
 
+import httplib2
+from google.auth.exceptions import GoogleAuthError
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 
 from src.news_mailer.config import get_settings
 from src.news_mailer.utils import get_logger
+from src.news_mailer.utils.metrics import metrics
+from src.news_mailer.utils.singleton import locked_cache
 from src.news_mailer.service.auth import load_user_credentials
 
 logger = get_logger(__name__)
 
 SCOPES = ["https://www.googleapis.com/auth/gmail.send"]
 
+# Google recommends keeping Gmail batches at or below 50 calls.
+GMAIL_BATCH_SIZE = 50
+
+
+def _encode_message(from_address: str, to: str, subject: str, body: str) -> Dict:
+    message = EmailMessage()
+    message["From"] = from_address
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(body, subtype="html")
+    return {"raw": base64.urlsafe_b64encode(message.as_bytes()).decode()}
+
+
+class GmailSender:
+    """Reusable Gmail API sender that keeps its service and credentials warm.
+
+    The discovery-built service is created once per instance. Credentials are
+    held in memory and only refreshed when they are within *refresh_margin*
+    seconds of expiry, so repeated sends skip both the token round trip and
+    the ``token.json`` rewrite done by :func:`load_user_credentials`.
+    """
+
+    def __init__(
+        self,
+        credentials_loader: Callable[[], Credentials | None] = load_user_credentials,
+        refresh_margin: float = 300,
+    ):
+        self._credentials_loader = credentials_loader
+        self._refresh_margin = datetime.timedelta(seconds=refresh_margin)
+        self._creds: Credentials | None = None
+        self._service = None
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, creds: Credentials) -> bool:
+        if not creds.valid:
+            return False
+        if creds.expiry is None:
+            return True
+        # google-auth keeps ``expiry`` as a naive UTC datetime.
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        return creds.expiry - now >= self._refresh_margin
+
+    def _credentials(self) -> Credentials:
+        creds = self._creds
+        if creds is not None and self._is_fresh(creds):
+            return creds
+        if creds is not None and creds.refresh_token:
+            try:
+                creds.refresh(Request())
+                return creds
+            except GoogleAuthError as exc:
+                logger.warning("Gmail token refresh failed (%s); reloading", exc)
+
+        self._creds = self._credentials_loader()
+        self._service = None
+        if self._creds is None:
+            raise RuntimeError(
+                "No Gmail credentials available. Provide service-account vars in .env or client_secrets.json for user OAuth."
+            )
+        return self._creds
+
+    @property
+    def service(self):
+        with self._lock:
+            creds = self._credentials()
+            if self._service is None:
+                self._service = build(
+                    "gmail", "v1", credentials=creds, cache_discovery=False
+                )
+            return self._service
+
+    def send(self, subject: str, body: str, recipients: Sequence[str]) -> None:
+        """Send one message addressed to all *recipients*."""
+        settings = get_settings()
+        logger.info("Sending Gmail API email to %s", recipients)
+        send_request = _encode_message(
+            settings.email_from, ", ".join(recipients), subject, body
+        )
+        with metrics.span("send", provider="gmail"):
+            self.service.users().messages().send(
+                userId="me", body=send_request
+            ).execute()
+        metrics.incr("emails_sent", len(recipients), provider="gmail")
+        metrics.incr("html_bytes_sent", len(body.encode("utf-8")), provider="gmail")
+        logger.info("Email sent via Gmail API")
+
+    def send_individually(
+        self, subject: str, body: str, recipients: Sequence[str]
+    ) -> Dict[str, str]:
+        """Send a separate copy to each recipient through Gmail batch requests.
+
+        Up to ``GMAIL_BATCH_SIZE`` sends are multiplexed into one HTTP request.
+        Returns a mapping of address to ``"sent: <id>"`` or ``"failed: <reason>"``.
+        """
+        settings = get_settings()
+        service = self.service
+        statuses: Dict[str, str] = {}
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                statuses[request_id] = f"failed: {exception}"
+            else:
+                statuses[request_id] = f"sent: {response.get('id')}"
+
+        unique = list(
+            dict.fromkeys(addr.strip() for addr in recipients if addr.strip())
+        )
+        messages = service.users().messages()
+        with metrics.span("send", provider="gmail"):
+            for start in range(0, len(unique), GMAIL_BATCH_SIZE):
+                chunk = unique[start : start + GMAIL_BATCH_SIZE]
+                batch = service.new_batch_http_request(callback=callback)
+                for address in chunk:
+                    raw = _encode_message(settings.email_from, address, subject, body)
+                    batch.add(messages.send(userId="me", body=raw), request_id=address)
+                try:
+                    batch.execute()
+                except (HttpError, httplib2.HttpLib2Error, OSError) as exc:
+                    # Fail this batch only, so the statuses of batches already
+                    # sent are kept and the remaining batches are still tried.
+                    logger.error("Gmail batch of %d not sent: %r", len(chunk), exc)
+                    for address in chunk:
+                        statuses.setdefault(address, f"failed: {exc!r}")
+
+        failed = sum(1 for status in statuses.values() if status.startswith("failed"))
+        metrics.incr("emails_sent", len(statuses) - failed, provider="gmail")
+        metrics.incr("emails_failed", failed, provider="gmail")
+        metrics.incr(
+            "html_bytes_sent",
+            len(body.encode("utf-8")) * (len(statuses) - failed),
+            provider="gmail",
+        )
+        logger.info(
+            "Gmail batch delivery finished: %d sent, %d failed",
+            len(statuses) - failed,
+            failed,
+        )
+        return statuses
+
+
+@locked_cache
+def get_gmail_sender() -> GmailSender:
+    """Return the process-wide warm :class:`GmailSender`."""
+    return GmailSender()
+
 
 def send_email_gmail(
     subject: str, body: str, to_addresses: Sequence[str] | None = None
@@ -28,32 +182,8 @@ def send_email_gmail(
        `GMAIL_SERVICE_ACCOUNT_FILE` and `GMAIL_DELEGATED_USER` in the environment.
 
     If *to_addresses* is omitted the comma-separated `EMAIL_TO` addresses from settings are used.
+    The underlying service and credentials are reused across calls (see :class:`GmailSender`).
     """
     settings = get_settings()
-    creds = load_user_credentials()
-
-    if creds is None:
-        raise RuntimeError(
-            "No Gmail credentials available. Provide service-account vars in .env or client_secrets.json for user OAuth."
-        )
-
-    service = build("gmail", "v1", credentials=creds)
-
     recipients = to_addresses or [addr.strip() for addr in settings.email_to.split(",")]
-
-    logger.info("Sending Gmail API email to %s", recipients)
-
-    message = EmailMessage()
-    message["From"] = settings.email_from
-    message["To"] = ", ".join(recipients)
-    message["Subject"] = subject
-    message.set_content(body, subtype="html")
-
-    encoded_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
-
-    send_request = {
-        "raw": encoded_message,
-    }
-
-    service.users().messages().send(userId="me", body=send_request).execute()
-    logger.info("Email sent via Gmail API")
+    get_gmail_sender().send(subject, body, recipients)
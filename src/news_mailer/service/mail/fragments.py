@@ -0,0 +1,103 @@
+"""Per-recipient digests assembled from topic fragments generated once per run."""
+
+from __future__ import annotations
+
+import html
+import itertools
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+from src.news_mailer.utils import get_logger
+
+logger = get_logger(__name__)
+
+SECTIONS_MARKER = "<!-- SECTIONS -->"
+
+# ``[<a href='URL'>N</a>]`` citation tags as requested in the prompts; the
+# surrounding brackets are optional so bare anchors are caught too.
+_CITATION_RE = re.compile(
+    r"\[?\s*<a\s[^>]*?href\s*=\s*(['\"])(?P<url>.*?)\1[^>]*>\s*\d+\s*</a>\s*\]?",
+    re.IGNORECASE,
+)
+_SECTION_NUMBER_RE = re.compile(r"(<h3[^>]*>\s*)\d+\.", re.IGNORECASE)
+
+
+def sources_html(articles: Sequence[Dict]) -> str:
+    """Numbered Sources list (``[1]``, ``[2]`` …) including near-duplicate alternates."""
+    lines = ["<hr>", '<p style="font-weight:bold;">Sources:</p>', "<ul>"]
+    for idx, article in enumerate(articles, start=1):
+        url = article.get("url")
+        title = article.get("title", url)
+        also = ", ".join(
+            f'<a href="{alt["url"]}">{alt.get("source") or alt["url"]}</a>'
+            for alt in article.get("alternates", [])
+        )
+        also_html = f" (also: {also})" if also else ""
+        lines.append(f'<li>[{idx}] <a href="{url}">{title}</a>{also_html}</li>')
+    lines.append("</ul>")
+    return "\n".join(lines)
+
+
+def renumber_citations(fragment: str, numbers: Mapping[str, int]) -> str:
+    """Point every citation tag at its article's number in *numbers* (keyed by URL).
+
+    Citations of articles the reader will not receive are removed.
+    """
+
+    def replace(match: re.Match) -> str:
+        url = html.unescape(match.group("url"))
+        number = numbers.get(url)
+        if number is None:
+            return ""
+        return f"[<a href='{match.group('url')}'>{number}</a>]"
+
+    return _CITATION_RE.sub(replace, fragment)
+
+
+def renumber_sections(body: str) -> str:
+    """Number the ``<h3>N.`` section headings consecutively from 1."""
+    counter = itertools.count(1)
+    return _SECTION_NUMBER_RE.sub(lambda m: f"{m.group(1)}{next(counter)}.", body)
+
+
+@dataclass
+class DigestFragments:
+    """One run's generated pieces: a shared frame plus one HTML fragment per topic.
+
+    ``frame`` holds :data:`SECTIONS_MARKER` where the selected topics'
+    sections go. ``articles`` lists each topic's cited articles in order.
+    """
+
+    subject: str
+    frame: str
+    footer: str
+    sections: Dict[str, str] = field(default_factory=dict)
+    articles: Dict[str, List[Dict]] = field(default_factory=dict)
+
+    @property
+    def topics(self) -> List[str]:
+        return list(self.sections)
+
+    def render(self, topics: Sequence[str] | None = None) -> Tuple[str, List[Dict]]:
+        """Return the body for a reader of *topics* (all when ``None``) and its sources.
+
+        Sections keep the run's topic order; citations and section numbers
+        are renumbered to match the reader's own Sources list.
+        """
+        wanted = set(self.sections if topics is None else topics)
+        selected = [t for t in self.sections if t in wanted]
+        cited = [art for topic in selected for art in self.articles.get(topic, [])]
+        numbers = {art["url"]: i for i, art in enumerate(cited, start=1)}
+
+        sections = "\n".join(
+            renumber_citations(self.sections[topic], numbers) for topic in selected
+        )
+        frame = renumber_citations(self.frame, numbers)
+        if SECTIONS_MARKER in frame:
+            body = frame.replace(SECTIONS_MARKER, sections, 1)
+        else:
+            body = frame + "\n" + sections
+        body = renumber_sections(body)
+        body += "\n" + sources_html(cited) + "\n" + self.footer
+        return body, cited
@@ -0,0 +1,352 @@
+"""Deadline-bounded, hedged streaming generation for Gemini models."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.news_mailer.utils import get_logger
+from src.news_mailer.utils.disk_cache import atomic_write_bytes
+from src.news_mailer.utils.rate_limit import ProviderLimiter
+from src.news_mailer.service.mail.prompt_packer import estimate_tokens
+
+logger = get_logger(__name__)
+
+# Upper bounds (seconds) of the recorded latency buckets; the last is +Inf.
+LATENCY_BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 300, float("inf"))
+MAX_SAMPLES = 200
+MIN_SAMPLES_FOR_PERCENTILE = 10
+
+
+class GenerationTimeout(RuntimeError):
+    """Raised when no attempt finishes within the generation deadlines."""
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """Whether *exc* is a Gemini 429 or quota error (``ResourceExhausted``)."""
+    return (
+        getattr(exc, "code", None) == 429 or type(exc).__name__ == "ResourceExhausted"
+    )
+
+
+class LatencyHistograms:
+    """Per-model latency histograms plus a window of recent samples, kept on disk.
+
+    Only completed generations are observed; attempts dropped at the
+    time-to-first-token deadline are counted separately by
+    :meth:`record_timeout` so they do not drag the hedge percentile up.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raw = {}
+        self._counts: Dict[str, List[int]] = {
+            model: data.get("counts", [0] * len(LATENCY_BUCKETS))
+            for model, data in raw.items()
+        }
+        self._samples: Dict[str, deque] = {
+            model: deque(data.get("samples", []), maxlen=MAX_SAMPLES)
+            for model, data in raw.items()
+        }
+        self._timeouts: Dict[str, int] = {
+            model: data.get("timeouts", 0) for model, data in raw.items()
+        }
+
+    def observe(self, model: str, seconds: float) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(model, [0] * len(LATENCY_BUCKETS))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    counts[i] += 1
+                    break
+            self._samples.setdefault(model, deque(maxlen=MAX_SAMPLES)).append(
+                round(seconds, 3)
+            )
+
+    def record_timeout(self, model: str) -> None:
+        with self._lock:
+            self._timeouts[model] = self._timeouts.get(model, 0) + 1
+
+    def timeouts(self, model: str) -> int:
+        with self._lock:
+            return self._timeouts.get(model, 0)
+
+    def percentile(self, model: str, q: float) -> float | None:
+        """Return the *q* quantile (0-1) of recent samples, if there are enough."""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < MIN_SAMPLES_FOR_PERCENTILE:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def save(self) -> None:
+        with self._lock:
+            data = {
+                model: {
+                    "buckets": [str(b) for b in LATENCY_BUCKETS],
+                    "counts": self._counts.get(model, [0] * len(LATENCY_BUCKETS)),
+                    "samples": list(self._samples.get(model, ())),
+                    "timeouts": self._timeouts.get(model, 0),
+                }
+                for model in sorted(self._counts.keys() | self._timeouts.keys())
+            }
+        try:
+            atomic_write_bytes(self.path, json.dumps(data, indent=2).encode("utf-8"))
+        except OSError as exc:
+            logger.warning("Could not persist latency histograms: %s", exc)
+
+
+class _Attempt:
+    """One streaming generation running on a daemon thread.
+
+    :meth:`cancel` closes the open stream so the thread ends instead of
+    blocking on a response nobody will read; *timeout* bounds the wait for
+    the stream to open.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        name: str,
+        prompt: str,
+        config: Any,
+        timeout: float,
+        on_done: Callable[[], None] | None = None,
+    ):
+        self.name = name
+        self.started = time.monotonic()
+        self.first_token = threading.Event()
+        self.cancelled = threading.Event()
+        self.future: Future = Future()
+        self._response: Any = None
+        self._on_done = on_done
+        threading.Thread(
+            target=self._run,
+            args=(model, prompt, config, timeout),
+            name=f"gemini-{name}",
+            daemon=True,
+        ).start()
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+        if self._response is not None:
+            _close_stream(self._response)
+
+    def _run(self, model: Any, prompt: str, config: Any, timeout: float) -> None:
+        try:
+            response = model.generate_content(
+                prompt,
+                generation_config=config,
+                stream=True,
+                request_options={"timeout": timeout},
+            )
+            self._response = response
+            if self.cancelled.is_set():
+                _close_stream(response)
+                return
+            parts = []
+            for chunk in response:
+                if self.cancelled.is_set():
+                    return
+                self.first_token.set()
+                parts.append(chunk.text)
+            self.future.set_result(
+                ("".join(parts), getattr(response, "usage_metadata", None))
+            )
+        except BaseException as exc:
+            if not self.cancelled.is_set():
+                self.future.set_exception(exc)
+        finally:
+            if self._on_done is not None:
+                self._on_done()
+
+
+def _close_stream(response: Any) -> None:
+    # Both the gRPC and REST stream iterators behind the SDK response expose
+    # ``cancel()``, which closes the underlying connection.
+    stream = getattr(response, "_iterator", None)
+    cancel = getattr(stream, "cancel", None) or getattr(stream, "close", None)
+    if cancel is None:
+        return
+    try:
+        cancel()
+    except Exception as exc:
+        logger.debug("Could not close Gemini stream: %s", exc)
+
+
+class HedgedGenerator:
+    """Stream a generation under deadlines, hedging slow calls.
+
+    The primary model is streamed first. If it has not produced a first
+    token within *ttft_deadline* seconds, fails, or simply runs past the hedge
+    delay (the *hedge_percentile* of its recorded latencies, or
+    *hedge_delay* until enough samples exist), a second request is sent to
+    the fallback model (or the primary again when no fallback is set).
+    Whichever attempt completes first wins and :meth:`generate` returns its
+    text, usage metadata and model name; if nothing completes within
+    *overall_deadline*, :class:`GenerationTimeout` is raised.
+
+    Rate-limit and quota errors are never hedged: they are re-raised at once
+    so the caller's rate limiter can back off. With a *limiter* the hedged
+    request is charged to it like any other call (the caller holds the
+    primary's slot); when no slot or budget is free right now the hedge is
+    skipped. Attempts that are dropped or
+    lose the race are cancelled, closing their streams.
+    """
+
+    def __init__(
+        self,
+        models: Dict[str, Any],
+        primary: str,
+        fallback: str | None,
+        histograms: LatencyHistograms,
+        ttft_deadline: float,
+        overall_deadline: float,
+        hedge_percentile: float,
+        hedge_delay: float,
+        hedge_enabled: bool = True,
+        limiter: ProviderLimiter | None = None,
+    ):
+        self.models = models
+        self.primary = primary
+        self.fallback = fallback or primary
+        self.histograms = histograms
+        self.ttft_deadline = ttft_deadline
+        self.overall_deadline = overall_deadline
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay
+        self.hedge_enabled = hedge_enabled
+        self.limiter = limiter
+
+    def _hedge_after(self) -> float:
+        observed = self.histograms.percentile(self.primary, self.hedge_percentile)
+        return observed if observed is not None else self.hedge_delay
+
+    def generate(
+        self, prompt: str, generation_config: Any = None
+    ) -> Tuple[str, Any, str]:
+        started = time.monotonic()
+        deadline = started + self.overall_deadline
+        hedge_at = started + self._hedge_after()
+        attempts = [
+            _Attempt(
+                self.models[self.primary],
+                self.primary,
+                prompt,
+                generation_config,
+                self.overall_deadline,
+            )
+        ]
+        hedged = not self.hedge_enabled
+        errors: List[BaseException] = []
+
+        try:
+            while True:
+                now = time.monotonic()
+                live = [
+                    a
+                    for a in attempts
+                    if not a.future.done() and not a.cancelled.is_set()
+                ]
+                for attempt in attempts:
+                    if attempt.future.done() and attempt.future.exception() is None:
+                        return self._finish(attempt)
+
+                # Drop attempts that never produced a first token in time.
+                for attempt in live:
+                    if (
+                        not attempt.first_token.is_set()
+                        and now - attempt.started >= self.ttft_deadline
+                    ):
+                        logger.warning(
+                            "%s produced no tokens within %.1fs",
+                            attempt.name,
+                            self.ttft_deadline,
+                        )
+                        attempt.cancel()
+                        self.histograms.record_timeout(attempt.name)
+                live = [a for a in live if not a.cancelled.is_set()]
+                errors = [
+                    a.future.exception()
+                    for a in attempts
+                    if a.future.done() and a.future.exception() is not None
+                ]
+                for exc in errors:
+                    if is_rate_limited(exc):
+                        raise exc
+
+                if not hedged and (not live or now >= hedge_at):
+                    hedged = True
+                    limiter = self.limiter
+                    if limiter is not None and not limiter.try_acquire(
+                        tokens=estimate_tokens(prompt)
+                    ):
+                        logger.info(
+                            "Not hedging Gemini request: no %s budget free",
+                            limiter.name,
+                        )
+                        continue
+                    logger.info(
+                        "Hedging Gemini request to %s after %.1fs",
+                        self.fallback,
+                        now - started,
+                    )
+                    attempts.append(
+                        _Attempt(
+                            self.models[self.fallback],
+                            self.fallback,
+                            prompt,
+                            generation_config,
+                            max(0.0, deadline - now),
+                            limiter.release if limiter is not None else None,
+                        )
+                    )
+                    continue
+
+                if not live:
+                    raise (
+                        errors[-1]
+                        if errors
+                        else GenerationTimeout(
+                            "All Gemini attempts missed the time-to-first-token deadline"
+                        )
+                    )
+                if now >= deadline:
+                    raise GenerationTimeout(
+                        f"Gemini generation exceeded {self.overall_deadline:.0f}s"
+                    )
+
+                checkpoints = [deadline]
+                if not hedged:
+                    checkpoints.append(hedge_at)
+                checkpoints += [
+                    a.started + self.ttft_deadline
+                    for a in live
+                    if not a.first_token.is_set()
+                ]
+                timeout = max(0.0, min(checkpoints) - now)
+                wait(
+                    [a.future for a in live],
+                    timeout=timeout,
+                    return_when=FIRST_COMPLETED,
+                )
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+            self.histograms.save()
+
+    def _finish(self, attempt: _Attempt) -> Tuple[str, Any, str]:
+        elapsed = time.monotonic() - attempt.started
+        self.histograms.observe(attempt.name, elapsed)
+        logger.info("Gemini %s completed in %.2fs", attempt.name, elapsed)
+        text, usage = attempt.future.result()
+        return text, usage, attempt.name
@@ -0,0 +1,395 @@
+"""Single-pass size optimisation of the composed digest HTML, plus a plain-text part.
+
+The composed body is streamed once through :class:`html.parser.HTMLParser`.
+For every token the same pass:
+
+* collapses insignificant whitespace (kept verbatim inside ``<pre>`` and
+  ``<code>``, in the HTML and the plain text alike),
+* compacts inline styles: normalised, de-duplicated declarations, shorter
+  values, no declarations the tag already implies, and
+  ``<span style="font-weight:bold">`` rewritten as ``<b>``,
+* strips unsafe or unused markup: scripts, frames, forms, comments, event
+  handlers, ``javascript:`` URLs and attribute-less ``<span>`` wrappers,
+* writes the plain-text alternative.
+
+Bytes saved are attributed to each of those stages.
+"""
+
+from __future__ import annotations
+
+import html
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, List, Sequence, Tuple
+
+from src.news_mailer.utils import get_logger
+from src.news_mailer.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+# Gmail clips message bodies beyond roughly this size.
+GMAIL_CLIP_BYTES = 102 * 1024
+
+STAGES = ("whitespace", "styles", "stripped")
+
+VOID_TAGS = frozenset(
+    "area base br col embed hr img input link meta param source track wbr".split()
+)
+# Whitespace next to these tags never renders.
+BLOCK_TAGS = frozenset(
+    """address article aside blockquote body br caption dd div dl dt figcaption
+    figure footer h1 h2 h3 h4 h5 h6 head header hr html li main nav ol p pre
+    section table tbody td tfoot th thead title tr ul""".split()
+)
+# Followed by a blank line in the plain-text part.
+PARAGRAPH_TAGS = frozenset("p h1 h2 h3 h4 h5 h6 table blockquote".split())
+# Dropped together with everything inside them.
+UNSAFE_CONTENT_TAGS = frozenset(
+    "script iframe object applet embed frame frameset noscript template svg math".split()
+)
+# Dropped, but their content is kept.
+UNSAFE_TAGS = frozenset(
+    "form input button select option textarea base link meta".split()
+)
+URL_ATTRIBUTES = frozenset("href src action formaction background poster".split())
+_UNSAFE_URL = re.compile(r"^\s*(javascript|vbscript|data):", re.IGNORECASE)
+
+# Inline styles a tag implies on its own.
+_IMPLIED_STYLES = {
+    "font-weight": ({"b", "strong", "th", "h1", "h2", "h3", "h4", "h5", "h6"}, "700"),
+    "font-style": ({"i", "em"}, "italic"),
+}
+# ``<span>`` whose only style is one of these becomes the matching tag.
+_SPAN_SHORTHAND = {"font-weight:700": "b", "font-style:italic": "i"}
+
+_FONT_WEIGHTS = {"bold": "700", "normal": "400"}
+_HEX_COLOR = re.compile(r"#([0-9a-f])\1([0-9a-f])\2([0-9a-f])\3\b", re.IGNORECASE)
+_ZERO_UNIT = re.compile(r"(?<![\d.])0(?:px|em|rem|pt|%)(?![\w%])")
+_LEADING_ZERO = re.compile(r"(?<![\d.])0\.(\d)")
+_NUMERIC = re.compile(r"\d+")
+_WS = re.compile(r"\s+")
+# Whitespace inside these is significant.
+PREFORMATTED_TAGS = frozenset(("pre", "code"))
+# Stands in for preformatted text while the plain text is normalised.
+_VERBATIM = "\ue000"
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def compact_style(value: str, tag: str = "") -> str:
+    """Return *value* as the shortest equivalent ``prop:val;prop:val`` list."""
+    if "(" in value and ";" in value.split("(", 1)[1]:
+        # ``url(data:...;...)`` and friends: splitting on ";" is not safe.
+        return _WS.sub(" ", value).strip().rstrip(";")
+    declarations: Dict[str, str] = {}
+    for declaration in value.split(";"):
+        prop, _, val = declaration.partition(":")
+        prop = prop.strip().lower()
+        val = _WS.sub(" ", val).strip()
+        if not prop or not val:
+            continue
+        val = val.replace(" !important", "!important")
+        if prop == "font-weight":
+            val = _FONT_WEIGHTS.get(val.lower(), val)
+        val = _HEX_COLOR.sub(r"#\1\2\3", val)
+        val = _ZERO_UNIT.sub("0", val)
+        val = _LEADING_ZERO.sub(r".\1", val)
+        implied = _IMPLIED_STYLES.get(prop)
+        if implied and tag in implied[0] and val.lower() == implied[1]:
+            declarations.pop(prop, None)
+            continue
+        # The last occurrence wins, at its own position (shorthands care).
+        declarations.pop(prop, None)
+        declarations[prop] = val
+    return ";".join(f"{prop}:{val}" for prop, val in declarations.items())
+
+
+def _keep_attribute(name: str, value: str | None) -> bool:
+    if name.startswith("on"):
+        return False
+    if name in ("style", "class") and not value:
+        return False
+    if name in URL_ATTRIBUTES and value and _UNSAFE_URL.match(value):
+        # Inline images are the one data: URL worth keeping.
+        return name == "src" and value.lstrip().lower().startswith("data:image/")
+    return True
+
+
+def _render_tag(tag: str, attrs: Sequence[Tuple[str, str | None]]) -> str:
+    parts = [tag]
+    for name, value in attrs:
+        if value is None:
+            parts.append(name)
+        else:
+            parts.append(f'{name}="{html.escape(value, quote=True)}"')
+    return "<" + " ".join(parts) + ">"
+
+
+@dataclass
+class ProcessedHtml:
+    html: str
+    text: str
+    original_bytes: int
+    saved: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def final_bytes(self) -> int:
+        return _size(self.html)
+
+    def summary(self) -> str:
+        stages = ", ".join(f"{stage} -{self.saved.get(stage, 0)}" for stage in STAGES)
+        return f"{self.original_bytes} -> {self.final_bytes} bytes ({stages})"
+
+
+class _Processor(HTMLParser):
+    def __init__(self):
+        # Entities are passed through verbatim instead of being re-encoded.
+        super().__init__(convert_charrefs=False)
+        self.out: List[str] = []
+        self.text: List[str] = []
+        self._verbatim: List[str] = []
+        self.saved = dict.fromkeys(STAGES, 0)
+        self._skip_depth = 0
+        self._skip_tag = ""
+        self._pre_depth = 0
+        self._hidden_depth = 0  # <style>/<head>/<title>: kept, but not text
+        self._pending_space = False
+        self._after_block = True
+        self._spans: List[str | None] = []
+        self._lists: List[int | None] = []
+        self._links: List[Tuple[str | None, int]] = []
+
+    # -- output helpers -------------------------------------------------
+
+    def _emit_tag(self, markup: str, tag: str) -> None:
+        if tag in BLOCK_TAGS:
+            self._pending_space = False
+            self._after_block = True
+        else:
+            self._flush_space()
+            self._after_block = False
+        self.out.append(markup)
+
+    def _flush_space(self) -> None:
+        if self._pending_space:
+            self.out.append(" ")
+            self.saved["whitespace"] -= 1
+            self._pending_space = False
+
+    def _text(self, value: str) -> None:
+        if self._hidden_depth:
+            return
+        if self._pre_depth:
+            self._verbatim.append(value)
+            value = _VERBATIM
+        self.text.append(value)
+
+    def _text_break(self, newlines: str) -> None:
+        if not self._hidden_depth:
+            self.text.append(newlines)
+
+    # -- tags -----------------------------------------------------------
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, str | None]]) -> None:
+        raw = self.get_starttag_text() or _render_tag(tag, attrs)
+        if self._skip_depth:
+            self.saved["stripped"] += _size(raw)
+            if tag == self._skip_tag and tag not in VOID_TAGS:
+                self._skip_depth += 1
+            return
+        if tag in UNSAFE_CONTENT_TAGS:
+            self.saved["stripped"] += _size(raw)
+            if tag not in VOID_TAGS:
+                self._skip_tag, self._skip_depth = tag, 1
+            return
+        if tag in UNSAFE_TAGS:
+            self.saved["stripped"] += _size(raw)
+            return
+
+        canonical = _render_tag(tag, attrs)
+        self.saved["whitespace"] += _size(raw) - _size(canonical)
+
+        name = tag
+        styled = []
+        for attr, value in attrs:
+            if attr == "style" and value is not None:
+                value = compact_style(value, tag)
+            styled.append((attr, value))
+        if tag == "span":
+            styles = [v for a, v in styled if a == "style"]
+            if len(styled) == 1 and styles and styles[0] in _SPAN_SHORTHAND:
+                name, styled = _SPAN_SHORTHAND[styles[0]], []
+        compacted = _render_tag(name, styled)
+        self.saved["styles"] += _size(canonical) - _size(compacted)
+
+        kept = [(attr, value) for attr, value in styled if _keep_attribute(attr, value)]
+        if tag == "span":
+            self._spans.append(name if kept or name != "span" else None)
+            if not kept and name == "span":
+                self.saved["stripped"] += _size(compacted)
+                return
+        markup = _render_tag(name, kept)
+        self.saved["stripped"] += _size(compacted) - _size(markup)
+        self._emit_tag(markup, tag)
+        self._start_text(tag, dict(kept))
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, str | None]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._skip_depth:
+            self.saved["stripped"] += len(tag) + 3
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+            return
+        if tag in UNSAFE_CONTENT_TAGS or tag in UNSAFE_TAGS or tag in VOID_TAGS:
+            self.saved["stripped"] += len(tag) + 3
+            return
+        name = tag
+        if tag == "span" and self._spans:
+            renamed = self._spans.pop()
+            if renamed is None:
+                self.saved["stripped"] += len(tag) + 3
+                return
+            self.saved["styles"] += len(tag) - len(renamed)
+            name = renamed
+        self._emit_tag(f"</{name}>", tag)
+        self._end_text(tag)
+
+    # -- plain-text alternative ----------------------------------------
+
+    def _start_text(self, tag: str, attrs: Dict[str, str | None]) -> None:
+        if tag in ("style", "head", "title"):
+            self._hidden_depth += 1
+        elif tag in PREFORMATTED_TAGS:
+            self._pre_depth += 1
+        if tag == "br":
+            self._text_break("\n")
+        elif tag == "hr":
+            self._text_break("\n\n----\n\n")
+        elif tag in ("ul", "ol"):
+            self._lists.append(0 if tag == "ol" else None)
+            self._text_break("\n")
+        elif tag == "li":
+            prefix = "- "
+            if self._lists and self._lists[-1] is not None:
+                self._lists[-1] += 1
+                prefix = f"{self._lists[-1]}. "
+            self._text_break("\n" + prefix)
+        elif tag in ("td", "th"):
+            self._text(" ")
+        elif tag == "a":
+            self._links.append((attrs.get("href"), len(self.text)))
+        elif tag in BLOCK_TAGS:
+            self._text_break("\n\n" if tag in PARAGRAPH_TAGS else "\n")
+
+    def _end_text(self, tag: str) -> None:
+        if tag in ("style", "head", "title"):
+            self._hidden_depth = max(0, self._hidden_depth - 1)
+        elif tag in PREFORMATTED_TAGS:
+            self._pre_depth = max(0, self._pre_depth - 1)
+        if tag in ("ul", "ol"):
+            if self._lists:
+                self._lists.pop()
+            self._text_break("\n\n")
+        elif tag == "a" and self._links:
+            href, start = self._links.pop()
+            label = "".join(self.text[start:]).strip()
+            # Inline citations ("[3]") point into the Sources list already.
+            if href and href != label and not _NUMERIC.fullmatch(label):
+                self._text(f" ({href})")
+        elif tag in BLOCK_TAGS and tag not in ("br", "hr", "li"):
+            self._text_break("\n\n" if tag in PARAGRAPH_TAGS else "\n")
+
+    # -- character data ------------------------------------------------
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth:
+            self.saved["stripped"] += _size(data)
+            return
+        if self._pre_depth:
+            self._flush_space()
+            self.out.append(data)
+            self._after_block = False
+            self._text(data)
+            return
+        collapsed = _WS.sub(" ", data)
+        core = collapsed.strip()
+        # Counted as dropped here; spaces actually written are given back.
+        self.saved["whitespace"] += _size(data) - _size(core)
+        if collapsed.startswith(" ") and not self._after_block:
+            self._pending_space = True
+        if core:
+            self._flush_space()
+            self.out.append(core)
+            self._pending_space = collapsed.endswith(" ")
+            self._after_block = False
+        self._text(collapsed)
+
+    def handle_entityref(self, name: str) -> None:
+        self._raw_text(f"&{name};")
+
+    def handle_charref(self, name: str) -> None:
+        self._raw_text(f"&#{name};")
+
+    def _raw_text(self, ref: str) -> None:
+        if self._skip_depth:
+            self.saved["stripped"] += len(ref)
+            return
+        self._flush_space()
+        self.out.append(ref)
+        self._after_block = False
+        self._text(html.unescape(ref))
+
+    def handle_comment(self, data: str) -> None:
+        self.saved["stripped"] += _size(data) + 7
+
+    def handle_decl(self, decl: str) -> None:
+        self.saved["stripped"] += _size(decl) + 3
+
+    def handle_pi(self, data: str) -> None:
+        self.saved["stripped"] += _size(data) + 3
+
+    def unknown_decl(self, data: str) -> None:
+        self.saved["stripped"] += _size(data) + 5
+
+    def result_text(self) -> str:
+        text = "".join(self.text).replace("\xa0", " ")
+        text = re.sub(r"[ \t]+", " ", text)
+        text = re.sub(r" *\n *", "\n", text)
+        text = re.sub(r"\n{3,}", "\n\n", text)
+        verbatim = iter(self._verbatim)
+        text = re.sub(_VERBATIM, lambda _: next(verbatim), text.strip())
+        return text + "\n"
+
+
+def postprocess_html(body: str) -> ProcessedHtml:
+    """Minify *body* and derive its plain-text alternative in one parse.
+
+    Bytes saved per stage are logged and counted as ``html_bytes_saved``.
+    """
+    processor = _Processor()
+    with metrics.span("html_postprocess"):
+        processor.feed(body)
+        processor.close()
+    result = ProcessedHtml(
+        html="".join(processor.out).strip(),
+        text=processor.result_text(),
+        original_bytes=_size(body),
+        saved=processor.saved,
+    )
+    for stage, saved in result.saved.items():
+        metrics.incr("html_bytes_saved", saved, stage=stage)
+    logger.info("HTML post-processing: %s", result.summary())
+    if result.final_bytes > GMAIL_CLIP_BYTES:
+        logger.warning(
+            "Digest is %d bytes; Gmail clips messages over ~%d bytes",
+            result.final_bytes,
+            GMAIL_CLIP_BYTES,
+        )
+    return result
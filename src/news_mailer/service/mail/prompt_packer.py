@@ -0,0 +1,138 @@
+"""Fit the article list into a prompt token budget."""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List
+
+from src.news_mailer.utils import get_logger
+
+logger = get_logger(__name__)
+
+CHARS_PER_TOKEN = 4
+MIN_SNIPPET_CHARS = 80
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English prose)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def trim_snippet(text: str, max_chars: int) -> str:
+    text = text.strip()
+    if len(text) > max_chars:
+        return text[:max_chars].rstrip() + "…"
+    return text
+
+
+def format_article(idx: int, article: Dict, snippet: str) -> str:
+    """Render one article the way the digest prompt lists it."""
+    return f"- [{idx}] {article['title']}\n  {snippet}\n  {article['url']}\n"
+
+
+@dataclass
+class PackedArticles:
+    articles: List[Dict] = field(default_factory=list)
+    snippets: List[str] = field(default_factory=list)
+    news_block: str = ""
+    estimated_tokens: int = 0
+    dropped: int = 0
+    trimmed: int = 0
+
+
+def pack_articles(
+    articles: List[Dict],
+    fixed_text: str,
+    budget_tokens: int,
+    topics: Iterable[str],
+    max_snippet_chars: int,
+    listed_again: Callable[[int, Dict], str] | None = None,
+) -> PackedArticles:
+    """Choose and trim *articles* so the prompt stays within *budget_tokens*.
+
+    *fixed_text* is everything in the prompt except the article list (template
+    plus date preface). The newest article of each topic in *topics* is always
+    kept, with its snippet shortened or removed if that is what it takes; the
+    rest are added newest first while they fit, trimmed down to
+    ``MIN_SNIPPET_CHARS`` before being dropped. Selected articles keep their
+    original order and are numbered from 1, so citation numbers line up with
+    the Sources list built from ``PackedArticles.articles``. A non-positive
+    budget disables packing beyond the per-snippet cap.
+
+    When the articles are sent over several prompts, *fixed_text* should hold
+    all of their fixed parts, and *listed_again* renders the extra line each
+    article adds outside its own listing (e.g. a headline in a framing
+    prompt), so the budget still caps everything that is sent.
+    """
+
+    def again(idx: int, art: Dict) -> int:
+        return estimate_tokens(listed_again(idx, art)) + 1 if listed_again else 0
+
+    remaining = (
+        budget_tokens - estimate_tokens(fixed_text) if budget_tokens > 0 else math.inf
+    )
+    # Sizing with the widest index keeps the estimate an upper bound.
+    width_idx = max(len(articles), 1)
+
+    required: List[int] = []
+    topic_seen: set[str] = set()
+    wanted = set(topics)
+    for pos, art in enumerate(articles):
+        topic = art.get("topic")
+        if topic in wanted and topic not in topic_seen:
+            topic_seen.add(topic)
+            required.append(pos)
+    required_set = set(required)
+    optional = [pos for pos in range(len(articles)) if pos not in required_set]
+
+    snippets: Dict[int, str] = {}
+    trimmed = 0
+    for pos in required + optional:
+        art = articles[pos]
+        raw = (art.get("content") or art.get("description") or "").strip()
+        snippet = trim_snippet(raw, max_snippet_chars)
+        extra = again(width_idx, art)
+        cost = estimate_tokens(format_article(width_idx, art, snippet)) + 1 + extra
+        if cost > remaining:
+            bare = estimate_tokens(format_article(width_idx, art, "")) + 1 + extra
+            room_chars = (remaining - bare) * CHARS_PER_TOKEN - 1
+            if room_chars >= MIN_SNIPPET_CHARS:
+                snippet = trim_snippet(raw, room_chars)
+            elif pos in required_set:
+                snippet = ""
+            else:
+                continue
+            cost = estimate_tokens(format_article(width_idx, art, snippet)) + 1 + extra
+            trimmed += 1
+        snippets[pos] = snippet
+        remaining -= cost
+
+    selected = sorted(snippets)
+    lines = [
+        format_article(idx, articles[pos], snippets[pos])
+        for idx, pos in enumerate(selected, start=1)
+    ]
+    news_block = "\n".join(lines)
+    listed_tokens = sum(
+        again(idx, articles[pos]) for idx, pos in enumerate(selected, start=1)
+    )
+    packed = PackedArticles(
+        articles=[articles[pos] for pos in selected],
+        snippets=[snippets[pos] for pos in selected],
+        news_block=news_block,
+        estimated_tokens=estimate_tokens(fixed_text)
+        + estimate_tokens(news_block)
+        + listed_tokens,
+        dropped=len(articles) - len(selected),
+        trimmed=trimmed,
+    )
+    if packed.dropped or packed.trimmed:
+        logger.info(
+            "Prompt packer kept %d/%d articles (%d trimmed) for a %d-token budget",
+            len(selected),
+            len(articles),
+            trimmed,
+            budget_tokens,
+        )
+    return packed
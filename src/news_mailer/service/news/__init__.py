@@ -1,5 +1,36 @@
 """News service."""
 
-from .news_fetcher import fetch_latest_news, TOPIC_QUERIES
+from .article import Article
+from .article_store import ArticleStore, get_article_store
+from .classifier import TopicClassifier
+from .dedupe import cluster_near_duplicates
+from .news_fetcher import (
+    fetch_combined,
+    fetch_latest_news,
+    fetch_topics,
+    merge_articles,
+)
+from .state import SeenUrlStore, WatermarkStore
+from .utils import get_topic_queries
 
-__all__ = ["fetch_latest_news", "TOPIC_QUERIES"]
+__all__ = [
+    "Article",
+    "fetch_latest_news",
+    "fetch_topics",
+    "fetch_combined",
+    "merge_articles",
+    "TOPIC_QUERIES",
+    "get_topic_queries",
+    "SeenUrlStore",
+    "WatermarkStore",
+    "cluster_near_duplicates",
+    "TopicClassifier",
+    "ArticleStore",
+    "get_article_store",
+]
+
+
+def __getattr__(name: str):
+    if name == "TOPIC_QUERIES":
+        return get_topic_queries()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
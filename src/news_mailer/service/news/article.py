@@ -0,0 +1,193 @@
+"""Compact article records and incremental decoding of NewsAPI responses."""
+
+from __future__ import annotations
+
+import codecs
+import dataclasses
+import json
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+# Longest ``content`` kept per article. The composer quotes at most a
+# ~400-character snippet, so anything past this is never read.
+MAX_CONTENT_CHARS = 600
+
+# ``Article`` attribute behind each NewsAPI-style key it exposes.
+_FIELDS = {
+    "url": "url",
+    "title": "title",
+    "description": "description",
+    "content": "content",
+    "publishedAt": "published_at",
+    "source": "source",
+    "topic": "topic",
+    "alternates": "alternates",
+}
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def _intern(value: Any) -> str | None:
+    return sys.intern(value) if isinstance(value, str) and value else None
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Article(Mapping):
+    """One news article, holding only the fields the pipeline reads.
+
+    Read-only ``Mapping`` access by NewsAPI key (``art["publishedAt"]``,
+    ``art.get("source")``) keeps dict-based callers working. Source names
+    and topics are interned, since a run holds many articles from the same
+    few outlets.
+    """
+
+    url: str
+    title: str | None = None
+    description: str | None = None
+    content: str | None = None
+    published_at: str = ""
+    source: str | None = None
+    topic: str | None = None
+    # Near-duplicates folded into this article: ``{"url", "title", "source"}``.
+    alternates: Tuple[Dict[str, Any], ...] = ()
+
+    @classmethod
+    def from_json(cls, data: Mapping[str, Any]) -> "Article":
+        """Build from a NewsAPI article or :meth:`to_dict` output, trimming ``content``."""
+        source = data.get("source")
+        if isinstance(source, Mapping):
+            source = source.get("name")
+        content = data.get("content")
+        if content and len(content) > MAX_CONTENT_CHARS:
+            content = content[:MAX_CONTENT_CHARS]
+        return cls(
+            url=data.get("url") or "",
+            title=data.get("title"),
+            description=data.get("description"),
+            content=content,
+            published_at=data.get("publishedAt") or "",
+            source=_intern(source),
+            topic=_intern(data.get("topic")),
+            alternates=tuple(data.get("alternates") or ()),
+        )
+
+    def with_topic(self, topic: str) -> "Article":
+        if topic == self.topic:
+            return self
+        return dataclasses.replace(self, topic=sys.intern(topic))
+
+    def with_alternates(self, alternates: Iterable[Dict[str, Any]]) -> "Article":
+        return dataclasses.replace(self, alternates=self.alternates + tuple(alternates))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serialisable NewsAPI-shaped dict (``source`` as ``{"name": ...}``)."""
+        return dict(self)
+
+    def __getitem__(self, key: str) -> Any:
+        attr = _FIELDS.get(key)
+        if attr is None:
+            raise KeyError(key)
+        value = getattr(self, attr)
+        if key == "source":
+            return {"name": value} if value else None
+        if key == "alternates":
+            return list(value)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_FIELDS)
+
+    def __len__(self) -> int:
+        return len(_FIELDS)
+
+
+class _Reader:
+    """Text buffer over an iterator of byte chunks, refilled on demand."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+
+    def fill(self) -> bool:
+        """Append the next chunk, dropping consumed text; ``False`` at the end."""
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            if text:
+                self.buf = self.buf[self.pos :] + text
+                self.pos = 0
+                return True
+        tail = self._utf8.decode(b"", final=True)
+        if tail:
+            self.buf = self.buf[self.pos :] + tail
+            self.pos = 0
+            return True
+        return False
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at the end of input)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON response, found {found!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode one complete JSON value, reading more input until it parses."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number cut off at the chunk boundary also "parses"; make sure
+            # the value is followed by more input before trusting it.
+            if end == len(self.buf) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_articles(chunks: Iterable[bytes]) -> Iterator[Article]:
+    """Yield the ``articles`` of a NewsAPI JSON response as they are decoded.
+
+    *chunks* is the raw response body (e.g. ``resp.iter_content()``). Only
+    one article's raw dict is alive at a time; other top-level fields are
+    skipped. Raises ``ValueError`` on malformed JSON.
+    """
+    reader = _Reader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "articles" and reader.peek() == "[":
+            reader.expect("[")
+            if reader.peek() != "]":
+                while True:
+                    yield Article.from_json(reader.value())
+                    if reader.peek() != ",":
+                        break
+                    reader.pos += 1
+            reader.expect("]")
+        else:
+            reader.value()
+        if reader.peek() != ",":
+            break
+        reader.pos += 1
+    reader.expect("}")
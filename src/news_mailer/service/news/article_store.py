@@ -0,0 +1,206 @@
+"""Durable SQLite store of fetched articles with an FTS5 full-text index.
+
+Every fetched article is upserted keyed by a hash of its URL, so reruns,
+regional variants and backfills can be composed from history instead of
+hitting NewsAPI again (see ``main.run(from_store=True)``).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping
+
+from src.news_mailer.config import get_settings
+from src.news_mailer.utils import get_logger
+from src.news_mailer.utils.singleton import locked_cache
+from src.news_mailer.service.news.article import Article
+from src.news_mailer.service.news.classifier import parse_query_terms
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url_hash     TEXT PRIMARY KEY,
+    url          TEXT NOT NULL,
+    topic        TEXT,
+    title        TEXT,
+    description  TEXT,
+    content      TEXT,
+    published_at TEXT,
+    fetched_at   REAL NOT NULL,
+    data         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_published ON articles (published_at);
+CREATE INDEX IF NOT EXISTS articles_topic_published ON articles (topic, published_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, description, content, content='articles', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, description, content)
+    VALUES (new.rowid, new.title, new.description, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, description, content)
+    VALUES ('delete', old.rowid, old.title, old.description, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, description, content)
+    VALUES ('delete', old.rowid, old.title, old.description, old.content);
+    INSERT INTO articles_fts (rowid, title, description, content)
+    VALUES (new.rowid, new.title, new.description, new.content);
+END;
+"""
+
+_UPSERT = """
+INSERT INTO articles
+    (url_hash, url, topic, title, description, content, published_at, fetched_at, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (url_hash) DO UPDATE SET
+    topic = excluded.topic,
+    title = excluded.title,
+    description = excluded.description,
+    content = excluded.content,
+    published_at = excluded.published_at,
+    fetched_at = excluded.fetched_at,
+    data = excluded.data
+"""
+
+
+def url_hash(url: str) -> str:
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def fts_query(query: str) -> str:
+    """Turn a NewsAPI-style query into an FTS5 ``"phrase" OR "phrase"`` expression."""
+    return " OR ".join(f'"{" ".join(term)}"' for term in parse_query_terms(query))
+
+
+class ArticleStore:
+    """Thread-safe wrapper around one SQLite database file."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def upsert(self, articles: Iterable[Article]) -> int:
+        """Insert or refresh *articles* in one transaction; return how many were written."""
+        now = time.time()
+        rows = [
+            (
+                url_hash(art["url"]),
+                art["url"],
+                art.get("topic"),
+                art.get("title"),
+                art.get("description"),
+                art.get("content"),
+                art.get("publishedAt"),
+                now,
+                json.dumps(dict(art), ensure_ascii=False),
+            )
+            for art in articles
+            if art.get("url")
+        ]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def _select(self, sql: str, params: List) -> List[Article]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [Article.from_json(json.loads(row["data"])) for row in rows]
+
+    def recent(
+        self, topic: str | None = None, since: str | None = None, limit: int = 50
+    ) -> List[Article]:
+        """Newest articles, optionally for one *topic* and from *since* onwards."""
+        clauses, params = [], []
+        if topic is not None:
+            clauses.append("topic = ?")
+            params.append(topic)
+        if since:
+            clauses.append("published_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._select(
+            f"SELECT data FROM articles {where} ORDER BY published_at DESC LIMIT ?",
+            params + [limit],
+        )
+
+    def search(
+        self, match: str, since: str | None = None, limit: int = 50
+    ) -> List[Article]:
+        """Full-text search (FTS5 *match* syntax), best matches first."""
+        sql = (
+            "SELECT a.data FROM articles_fts f JOIN articles a ON a.rowid = f.rowid "
+            "WHERE articles_fts MATCH ?"
+        )
+        params: List = [match]
+        if since:
+            sql += " AND a.published_at >= ?"
+            params.append(since)
+        sql += " ORDER BY bm25(articles_fts), a.published_at DESC LIMIT ?"
+        try:
+            return self._select(sql, params + [limit])
+        except sqlite3.OperationalError as exc:
+            logger.warning("Article store search %r failed: %s", match, exc)
+            return []
+
+    def for_topics(
+        self, topic_queries: Mapping[str, str], per_topic: int, since: str | None
+    ) -> Dict[str, List[Article]]:
+        """Stored articles per topic, tagged with that topic.
+
+        Articles saved under the same topic key are used first; topics never
+        stored (e.g. a new regional profile) are filled by a full-text search
+        on their query instead.
+        """
+        result = {}
+        for topic, query in topic_queries.items():
+            articles = self.recent(topic, since, per_topic)
+            if not articles and fts_query(query):
+                articles = self.search(fts_query(query), since, per_topic)
+            result[topic] = [art.with_topic(topic) for art in articles]
+        return result
+
+    def prune(self, max_age_days: float) -> int:
+        """Delete articles fetched more than *max_age_days* ago."""
+        cutoff = time.time() - max_age_days * 86400
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM articles WHERE fetched_at < ?", (cutoff,)
+            )
+        return cursor.rowcount
+
+
+@locked_cache
+def get_article_store() -> ArticleStore | None:
+    """Return the shared article store, or ``None`` when disabled."""
+    settings = get_settings()
+    if not settings.article_store_enabled:
+        return None
+    store = ArticleStore(
+        settings.article_store_path or Path(settings.state_dir) / "articles.sqlite3"
+    )
+    removed = store.prune(settings.article_store_max_age_days)
+    if removed:
+        logger.info("Pruned %d stored articles", removed)
+    return store
@@ -0,0 +1,201 @@
+"""Local topic assignment for articles fetched with combined queries.
+
+Each topic's NewsAPI query (``"oil OR gold OR \\"commodity prices\\""``) is
+compiled once into weighted terms: single words and quoted or multi-word
+phrases, matched as word n-grams. Articles are scored against every topic
+with a sparse TF-IDF dot product driven by an inverted term index, so the
+cost grows with article length rather than with the number of topics.
+"""
+
+from __future__ import annotations
+
+import datetime
+import math
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+from src.news_mailer.utils import get_logger
+from src.news_mailer.service.news.article import Article
+
+logger = get_logger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9&'.]*[a-z0-9]|[a-z0-9]")
+_QUERY_PART_RE = re.compile(r'[+-]?"[^"]*"|\(|\)|[^\s()]+')
+_OPERATORS = {"OR", "AND", "NOT"}
+
+TITLE_WEIGHT = 2.0
+
+Term = Tuple[str, ...]
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def parse_query_terms(query: str) -> List[Term]:
+    """Return the positive search terms of a NewsAPI query as token tuples.
+
+    ``OR``/``AND`` only separate terms here; ``NOT`` and ``-`` excluded
+    terms are skipped. Adjacent bare words form one phrase, matching how
+    ``generative AI`` reads in a topic query.
+    """
+    terms: List[Term] = []
+    phrase: List[str] = []
+    negate = False
+
+    def flush() -> None:
+        if phrase and not negate:
+            terms.append(tuple(phrase))
+        phrase.clear()
+
+    for part in _QUERY_PART_RE.findall(query):
+        if part in _OPERATORS or part in "()":
+            flush()
+            negate = part == "NOT"
+            continue
+        if part.startswith("-"):
+            flush()
+            negate = False
+            continue
+        part = part.lstrip("+")
+        if part.startswith('"'):
+            flush()
+            tokens = tokenize(part.strip('"'))
+            if tokens and not negate:
+                terms.append(tuple(tokens))
+            negate = False
+            continue
+        phrase.extend(tokenize(part))
+    flush()
+    return list(dict.fromkeys(terms))
+
+
+def _parse_published(value: str | None) -> datetime.datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class TopicClassifier:
+    """Assigns articles to the topic whose query terms they match best."""
+
+    def __init__(self, topic_queries: Mapping[str, str]):
+        self.topics = list(topic_queries)
+        self._index: Dict[Term, List[int]] = defaultdict(list)
+        self._term_counts = [0] * len(self.topics)
+        for topic_id, query in enumerate(topic_queries.values()):
+            for term in parse_query_terms(query):
+                self._index[term].append(topic_id)
+                self._term_counts[topic_id] += 1
+        self._max_n = max((len(term) for term in self._index), default=1)
+
+    def _term_frequencies(self, article: Article) -> Tuple[Counter, float]:
+        """Weighted counts of indexed n-grams in the title and description."""
+        counts: Counter = Counter()
+        length = 0.0
+        for text, weight in (
+            (article.get("title") or "", TITLE_WEIGHT),
+            (article.get("description") or "", 1.0),
+        ):
+            tokens = tokenize(text)
+            length += weight * len(tokens)
+            for n in range(1, self._max_n + 1):
+                for i in range(len(tokens) - n + 1):
+                    gram = tuple(tokens[i : i + n])
+                    if gram in self._index:
+                        counts[gram] += weight
+        return counts, length
+
+    def score(self, articles: Sequence[Article]) -> List[List[float]]:
+        """Return one relevance score per topic for each article.
+
+        IDF is computed over *articles* themselves, so terms that every
+        candidate mentions (the shared words of a combined query) count for
+        little.
+        """
+        frequencies = [self._term_frequencies(art) for art in articles]
+        document_frequency: Counter = Counter()
+        for counts, _ in frequencies:
+            document_frequency.update(counts.keys())
+        total = len(articles)
+        idf = {
+            term: math.log((total + 1) / (df + 1)) + 1.0
+            for term, df in document_frequency.items()
+        }
+
+        scores = []
+        for counts, length in frequencies:
+            row = [0.0] * len(self.topics)
+            for term, tf in counts.items():
+                weight = tf * idf[term]
+                for topic_id in self._index[term]:
+                    row[topic_id] += weight
+            norm = math.sqrt(max(length, 1.0))
+            scores.append(
+                [
+                    value / (norm * math.sqrt(self._term_counts[i])) if value else 0.0
+                    for i, value in enumerate(row)
+                ]
+            )
+        return scores
+
+    def assign(
+        self,
+        articles: Sequence[Article],
+        top_n: int,
+        half_life_hours: float = 24.0,
+        since: Mapping[str, str] | None = None,
+        now: datetime.datetime | None = None,
+    ) -> Dict[str, List[Article]]:
+        """Tag each article with its best topic and keep the top *top_n* per topic.
+
+        Articles are ranked by relevance times a recency decay that halves
+        every *half_life_hours*. Articles matching no topic, or published
+        before their topic's *since* watermark, are dropped.
+        """
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        since = since or {}
+        ranked: Dict[str, List[Tuple[float, Article]]] = {t: [] for t in self.topics}
+        unmatched = 0
+        for article, row in zip(articles, self.score(articles)):
+            best = max(range(len(row)), key=row.__getitem__, default=None)
+            if best is None or row[best] <= 0:
+                unmatched += 1
+                continue
+            topic = self.topics[best]
+            if (article.get("publishedAt") or "") < (since.get(topic) or ""):
+                continue
+            published = _parse_published(article.get("publishedAt"))
+            recency = 1.0
+            if published and half_life_hours > 0:
+                age_hours = max(0.0, (now - published).total_seconds() / 3600)
+                recency = 0.5 ** (age_hours / half_life_hours)
+            ranked[topic].append((row[best] * recency, article.with_topic(topic)))
+
+        result = {}
+        for topic, items in ranked.items():
+            items.sort(key=lambda item: item[0], reverse=True)
+            result[topic] = [art for _, art in items[:top_n]]
+        logger.info(
+            "Classified %d articles into %d topics (%d unmatched, kept %d)",
+            len(articles),
+            sum(1 for items in result.values() if items),
+            unmatched,
+            sum(len(items) for items in result.values()),
+        )
+        return result
+
+
+@lru_cache(maxsize=32)
+def _cached_classifier(items: Tuple[Tuple[str, str], ...]) -> TopicClassifier:
+    return TopicClassifier(dict(items))
+
+
+def get_classifier(topic_queries: Mapping[str, str]) -> TopicClassifier:
+    """Return a classifier for *topic_queries*, compiled once per distinct mapping."""
+    return _cached_classifier(tuple(topic_queries.items()))
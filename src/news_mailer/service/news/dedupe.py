@@ -0,0 +1,131 @@
+"""Near-duplicate article clustering using MinHash signatures with LSH banding."""
+
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+from src.news_mailer.utils import get_logger
+from src.news_mailer.service.news.article import Article
+
+logger = get_logger(__name__)
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1337)  # fixed seed: signatures must be stable across runs
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _shingles(text: str, size: int = 3) -> set[str]:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text: str) -> tuple[int, ...]:
+    """Return the MinHash signature of the word 3-gram shingles of *text*."""
+    hashes = [
+        int.from_bytes(
+            hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big"
+        )
+        for s in _shingles(text)
+    ]
+    if not hashes:
+        return (_MAX_HASH,) * NUM_PERM
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def _similarity(left: Sequence[int], right: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(left, right) if x == y) / NUM_PERM
+
+
+def _fingerprint_text(article: Article) -> str:
+    return f"{article.get('title') or ''} {article.get('description') or ''}"
+
+
+def cluster_near_duplicates(
+    articles: List[Article], threshold: float = 0.6
+) -> List[Article]:
+    """Collapse articles whose title+description shingles overlap by *threshold* or more.
+
+    The first article of each cluster (i.e. the newest, given the fetcher's
+    ordering) is kept as the representative; the others are recorded on it
+    under ``alternates`` as ``{"url", "title", "source"}`` dicts so they can
+    still be cited. Articles with no title or description words have nothing
+    to compare and are always kept as their own representatives.
+
+    Signatures are split into ``BANDS`` bands of ``ROWS`` rows and each band is
+    hashed into a bucket, so an article is only compared against the few
+    representatives that share a bucket with it rather than against every
+    article kept so far.
+    """
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    kept: List[Article] = []
+    signatures: List[tuple[int, ...]] = []
+    alternates: Dict[int, List[Dict]] = defaultdict(list)
+
+    for art in articles:
+        text = _fingerprint_text(art)
+        if not _shingles(text):
+            # An empty signature would match every other empty one.
+            kept.append(art)
+            signatures.append(())
+            continue
+        sig = minhash(text)
+        keys = [(band, sig[band * ROWS : (band + 1) * ROWS]) for band in range(BANDS)]
+
+        match = None
+        checked: set[int] = set()
+        for key in keys:
+            for idx in buckets.get(key, ()):
+                if idx in checked:
+                    continue
+                checked.add(idx)
+                if _similarity(signatures[idx], sig) >= threshold:
+                    match = idx
+                    break
+            if match is not None:
+                break
+
+        if match is None:
+            for key in keys:
+                buckets[key].append(len(kept))
+            kept.append(art)
+            signatures.append(sig)
+            continue
+
+        alternates[match].append(
+            {
+                "url": art.get("url"),
+                "title": art.get("title"),
+                "source": (art.get("source") or {}).get("name"),
+            }
+        )
+
+    # Articles are immutable; attach each cluster's alternates in one go.
+    for idx, alts in alternates.items():
+        kept[idx] = kept[idx].with_alternates(alts)
+
+    if len(kept) < len(articles):
+        logger.info(
+            "Collapsed %d near-duplicate articles into %d clusters",
+            len(articles) - len(kept),
+            len(alternates),
+        )
+    return kept
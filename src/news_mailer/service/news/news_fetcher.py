@@ -1,29 +1,257 @@
-import requests
-from typing import List, Dict
+import heapq
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Sequence
 
 from src.news_mailer.config import get_settings
 from src.news_mailer.utils import get_logger
-from src.news_mailer.service.news.utils import try_or_return_default_topic_queries
+from src.news_mailer.utils.disk_cache import DiskCache
+from src.news_mailer.utils.http import HostLimiter, get_session, get_with_retry
+from src.news_mailer.utils.metrics import metrics
+from src.news_mailer.utils.rate_limit import RateLimited, get_rate_limiter
+from src.news_mailer.utils.singleton import locked_cache
+from src.news_mailer.service.news.article import Article, iter_articles
+from src.news_mailer.service.news.article_store import get_article_store
+from src.news_mailer.service.news.classifier import get_classifier
+from src.news_mailer.service.news.utils import get_topic_queries
 
 logger = get_logger(__name__)
 
-NEWS_API_EVERYTHING = "https://newsapi.org/v2/everything"
+NEWS_API_EVERYTHING_PATH = "/v2/everything"
 
-TOPIC_QUERIES = try_or_return_default_topic_queries()
 
-def fetch_latest_news(page_size_per_topic: int = 3, language: str = "en") -> List[Dict]:
-    """Fetch latest news across predefined topics.
+def _everything_url() -> str:
+    return get_settings().news_api_base_url.rstrip("/") + NEWS_API_EVERYTHING_PATH
+
+
+def __getattr__(name: str):
+    # ``TOPIC_QUERIES`` is resolved on first access so importing this module
+    # does not read the environment.
+    if name == "TOPIC_QUERIES":
+        return get_topic_queries()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@locked_cache
+def get_news_cache() -> DiskCache | None:
+    """Return the shared NewsAPI response cache, or ``None`` when disabled."""
+    settings = get_settings()
+    if not settings.news_cache_enabled:
+        return None
+    return DiskCache(
+        Path(settings.cache_dir) / "newsapi",
+        ttl_seconds=settings.news_cache_ttl_seconds,
+        max_bytes=settings.news_cache_max_bytes,
+    )
+
+
+def _cache_key(params: Dict) -> str:
+    """Key a request by its normalised query params, never by the API key."""
+    normalised = {
+        key.lower(): " ".join(str(value).split())
+        for key, value in params.items()
+        if key.lower() != "apikey"
+    }
+    normalised["endpoint"] = _everything_url()
+    return DiskCache.make_key(normalised)
+
+
+def _fetch_topic(
+    topic: str,
+    params: Dict,
+    limiter: HostLimiter,
+) -> List[Article] | None:
+    """Fetch a single topic, logging its latency. Failures yield an empty list.
+
+    Every returned article is tagged with its ``topic`` key. ``None`` means
+    the NewsAPI budget ran out (quota or a long rate-limit back-off) and the
+    topic should be deferred rather than treated as empty.
+    """
+    settings = get_settings()
+    cache = get_news_cache()
+    key = _cache_key(params)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info(
+                "Topic '%s' served from cache (%d articles)", topic, len(cached)
+            )
+            metrics.incr("newsapi_cache_hits")
+            metrics.incr("articles_fetched", len(cached), topic=topic)
+            return _tag((Article.from_json(art) for art in cached), topic)
+
+    logger.info("Fetching topic '%s'", topic)
+    started = time.perf_counter()
+    try:
+        with metrics.span("fetch_topic", topic=topic):
+            resp = get_with_retry(
+                _everything_url(),
+                params=params,
+                session=get_session(settings.news_fetch_per_host_limit),
+                limiter=limiter,
+                rate_limiter=get_rate_limiter("newsapi"),
+                timeout=settings.news_fetch_timeout,
+                max_retries=settings.news_fetch_max_retries,
+                max_retry_after=settings.rate_limit_max_wait,
+                stream=True,
+            )
+            with resp:
+                # Decoded article by article; ``content`` is trimmed on the way.
+                articles = _tag(iter_articles(resp.iter_content(64 * 1024)), topic)
+    except RateLimited as exc:
+        logger.warning("Deferring topic '%s': %s", topic, exc)
+        return None
+    except Exception as exc:
+        metrics.incr("newsapi_errors", topic=topic)
+        logger.warning(
+            "Topic '%s' fetch failed after %.2fs: %s",
+            topic,
+            time.perf_counter() - started,
+            exc,
+        )
+        return []
+    metrics.incr("newsapi_requests")
+    metrics.incr("articles_fetched", len(articles), topic=topic)
+    if cache is not None:
+        cache.set(key, [art.to_dict() for art in articles])
+    logger.info(
+        "Fetched topic '%s': %d articles in %.2fs",
+        topic,
+        len(articles),
+        time.perf_counter() - started,
+    )
+    return articles
 
-    For each topic defined in ``TOPIC_QUERIES`` this function queries the
-    NewsAPI *Everything* endpoint and grabs the ``page_size_per_topic`` most
-    recent articles. Results are de-duplicated by URL and returned ordered by
-    publication date (descending).
+
+def _tag(articles: Iterable[Article], topic: str) -> List[Article]:
+    return [art.with_topic(topic) for art in articles]
+
+
+def _by_priority(topic_queries: Mapping[str, str]) -> List[str]:
+    """Order topic keys for fetching: topics an earlier run deferred go first.
+
+    Deferrals are keyed by query string, which stays the same whether the
+    topic comes from ``TOPIC_QUERIES`` or a region profile.
+    """
+    deferred = get_rate_limiter("newsapi").store.deferred("newsapi")
+    by_query: Dict[str, List[str]] = {}
+    for topic, query in topic_queries.items():
+        by_query.setdefault(query, []).append(topic)
+    first = [topic for query in deferred for topic in by_query.pop(query, [])]
+    seen = set(first)
+    return first + [topic for topic in topic_queries if topic not in seen]
+
+
+def _fill_deferred(
+    by_topic: Dict[str, List[Article]],
+    deferred: Sequence[str],
+    topic_queries: Mapping[str, str],
+    page_size: int,
+    watermarks: Mapping[str, str],
+    stored_topics: Mapping[str, Sequence[str]] | None = None,
+) -> None:
+    """Remember *deferred* topics for the next run and fill them from the article store.
+
+    Only this fetch's topics are touched in the shared deferred list: the
+    served ones are removed, the deferred ones added, and entries left by
+    other topic sets (e.g. another region's daemon job) are kept.
+    Stored articles are looked up under ``stored_topics[topic]`` (the topic
+    key itself by default); store errors are logged and leave the topic empty.
+    """
+    limiter = get_rate_limiter("newsapi")
+    limiter.store.update_deferred(
+        "newsapi",
+        add=[topic_queries[topic] for topic in deferred],
+        remove=[q for t, q in topic_queries.items() if t not in deferred],
+    )
+    limiter.store.save()
+    if not deferred:
+        return
+    metrics.incr("topics_deferred", len(deferred))
+    stored_topics = stored_topics or {}
+    try:
+        store = get_article_store()
+    except sqlite3.Error as exc:
+        logger.warning("Could not open the article store: %s", exc)
+        store = None
+    for topic in deferred:
+        stored: List[Article] = []
+        if store is not None:
+            try:
+                stored = merge_articles(
+                    store.recent(key, since=watermarks.get(topic), limit=page_size)
+                    for key in stored_topics.get(topic, (topic,))
+                )[:page_size]
+            except sqlite3.Error as exc:
+                logger.warning("Could not read the article store: %s", exc)
+        if not by_topic.get(topic):
+            by_topic[topic] = _tag(stored, topic)
+        logger.warning(
+            "Topic '%s' deferred to the next run (%d stored articles used)",
+            topic,
+            len(stored),
+        )
+
+
+def fetch_topics(
+    topic_queries: Mapping[str, str],
+    page_size_per_topic: int = 3,
+    language: str = "en",
+    concurrent: bool = True,
+    watermarks: Mapping[str, str] | None = None,
+    stored_topics: Mapping[str, Sequence[str]] | None = None,
+) -> Dict[str, List[Article]]:
+    """Fetch every topic in *topic_queries* and return the articles per topic.
+
+    With ``concurrent`` (the default) topics are fetched on a bounded thread
+    pool sharing one keep-alive session; ``NEWS_FETCH_MAX_WORKERS`` and
+    ``NEWS_FETCH_PER_HOST_LIMIT`` bound the parallelism. Responses are cached
+    on disk (see :func:`get_news_cache`) so repeated or overlapping runs within
+    ``NEWS_CACHE_TTL_SECONDS`` skip the network.
+
+    ``watermarks`` maps topic keys to the newest ``publishedAt`` already mailed;
+    when given, NewsAPI is only asked for articles from that point on. Each
+    returned article carries the ``topic`` it was fetched for.
+
+    Requests go through the shared ``newsapi`` rate limiter. When today's
+    quota cannot cover one request per topic, the run switches to combined
+    queries if those fit, counting every page they may follow; topics that
+    still cannot be fetched are deferred (fetched first next run) and filled
+    from the article store meanwhile.
+    ``stored_topics`` maps a key to the topic keys its articles are stored
+    under, when those differ (e.g. :func:`main.run_regions` fetches by query).
     """
     settings = get_settings()
-    all_articles: list[Dict] = []
+    remaining = get_rate_limiter("newsapi").remaining()
+    use_combined = settings.news_fetch_mode == "combined"
+    if not use_combined and remaining is not None and remaining < len(topic_queries):
+        groups = combine_queries(topic_queries, settings.news_combined_query_chars)
+        # Each combined query may follow up to NEWS_COMBINED_MAX_PAGES pages.
+        needed = len(groups) * max(1, settings.news_combined_max_pages)
+        if needed <= remaining:
+            logger.warning(
+                "Only %d NewsAPI requests left today; using %d combined queries",
+                remaining,
+                len(groups),
+            )
+            use_combined = True
+    if use_combined:
+        return fetch_combined(
+            topic_queries,
+            top_n_per_topic=page_size_per_topic,
+            language=language,
+            concurrent=concurrent,
+            watermarks=watermarks,
+            stored_topics=stored_topics,
+        )
+    limiter = HostLimiter(settings.news_fetch_per_host_limit)
+    watermarks = watermarks or {}
 
-    headers = {"User-Agent": "news-mailer/1.0"}
-    for topic, query in TOPIC_QUERIES.items():
+    requests_by_topic = {}
+    for topic in _by_priority(topic_queries):
+        query = topic_queries[topic]
         params = {
             "q": query,
             "language": language,
@@ -31,23 +259,235 @@ def fetch_latest_news(page_size_per_topic: int = 3, language: str = "en") -> Lis
             "pageSize": page_size_per_topic,
             "apiKey": settings.news_api_key,
         }
-        logger.info("Fetching topic '%s'", topic)
-        try:
-            resp = requests.get(
-                NEWS_API_EVERYTHING, params=params, headers=headers, timeout=10
+        if watermarks.get(topic):
+            params["from"] = watermarks[topic]
+        requests_by_topic[topic] = params
+
+    started = time.perf_counter()
+    workers = min(settings.news_fetch_max_workers, len(requests_by_topic)) or 1
+    if concurrent and workers > 1:
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="news-fetch"
+        ) as pool:
+            # ``map`` preserves topic order so tie-breaking when merging
+            # matches the sequential path.
+            results = list(
+                pool.map(
+                    lambda item: _fetch_topic(item[0], item[1], limiter),
+                    requests_by_topic.items(),
+                )
+            )
+    else:
+        results = [
+            _fetch_topic(topic, params, limiter)
+            for topic, params in requests_by_topic.items()
+        ]
+    logger.info(
+        "Fetched %d topics in %.2fs (%s)",
+        len(requests_by_topic),
+        time.perf_counter() - started,
+        "concurrent" if concurrent and workers > 1 else "sequential",
+    )
+    cache = get_news_cache()
+    if cache is not None:
+        logger.info("NewsAPI cache: %s", cache.stats)
+
+    fetched = dict(zip(requests_by_topic, results))
+    deferred = [topic for topic, articles in fetched.items() if articles is None]
+    by_topic = {topic: fetched[topic] or [] for topic in topic_queries}
+    _fill_deferred(
+        by_topic,
+        deferred,
+        topic_queries,
+        page_size_per_topic,
+        watermarks,
+        stored_topics,
+    )
+    return by_topic
+
+
+def combine_queries(
+    topic_queries: Mapping[str, str], max_chars: int
+) -> List[List[str]]:
+    """Group topic keys so each group's ``(q1) OR (q2) ...`` stays within *max_chars*."""
+    groups: List[List[str]] = []
+    length = 0
+    for topic, query in topic_queries.items():
+        cost = len(query) + 2  # parentheses
+        if groups and length + len(" OR ") + cost <= max_chars:
+            groups[-1].append(topic)
+            length += len(" OR ") + cost
+        else:
+            if cost > max_chars:
+                logger.warning(
+                    "Query for '%s' alone exceeds %d characters", topic, max_chars
+                )
+            groups.append([topic])
+            length = cost
+    return groups
+
+
+def _fetch_pages(
+    label: str, params: Dict, max_pages: int, limiter: HostLimiter
+) -> List[Article] | None:
+    """Fetch up to *max_pages* pages; ``None`` if the first page was deferred."""
+    articles: List[Article] = []
+    for page in range(1, max_pages + 1):
+        batch = _fetch_topic(label, dict(params, page=page), limiter)
+        if batch is None:
+            return None if page == 1 else articles
+        articles.extend(batch)
+        if len(batch) < params["pageSize"]:
+            break
+    return articles
+
+
+def fetch_combined(
+    topic_queries: Mapping[str, str],
+    top_n_per_topic: int = 3,
+    language: str = "en",
+    concurrent: bool = True,
+    watermarks: Mapping[str, str] | None = None,
+    stored_topics: Mapping[str, Sequence[str]] | None = None,
+) -> Dict[str, List[Article]]:
+    """Fetch all topics through a few combined OR-queries and classify locally.
+
+    Topic queries are packed into ``(q1) OR (q2) ...`` requests of at most
+    ``NEWS_COMBINED_QUERY_CHARS`` characters. Each request asks for
+    ``NEWS_COMBINED_PAGE_SIZE`` articles and follows up to
+    ``NEWS_COMBINED_MAX_PAGES`` pages. The pooled candidates are then
+    assigned to topics by :class:`TopicClassifier`, and the best
+    *top_n_per_topic* of each topic by relevance and recency are kept.
+    Returns the same shape as :func:`fetch_topics`; ``stored_topics`` is
+    passed on to the deferred-topic fallback as there.
+    """
+    settings = get_settings()
+    limiter = HostLimiter(settings.news_fetch_per_host_limit)
+    watermarks = watermarks or {}
+    groups = combine_queries(topic_queries, settings.news_combined_query_chars)
+
+    # Groups holding topics deferred by earlier runs are requested first.
+    priority = _by_priority(topic_queries)
+    groups.sort(key=lambda group: min(priority.index(topic) for topic in group))
+    requests = []
+    for i, group in enumerate(groups):
+        params = {
+            "q": " OR ".join(f"({topic_queries[topic]})" for topic in group),
+            "language": language,
+            "sortBy": "publishedAt",
+            "pageSize": settings.news_combined_page_size,
+            "apiKey": settings.news_api_key,
+        }
+        marks = [watermarks.get(topic) for topic in group]
+        # The oldest watermark covers every topic in the group.
+        if all(marks):
+            params["from"] = min(marks)
+        requests.append((f"combined-{i}", params))
+
+    started = time.perf_counter()
+    max_pages = max(1, settings.news_combined_max_pages)
+    workers = min(settings.news_fetch_max_workers, len(requests)) or 1
+    if concurrent and workers > 1:
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="news-fetch"
+        ) as pool:
+            batches = list(
+                pool.map(
+                    lambda item: _fetch_pages(item[0], item[1], max_pages, limiter),
+                    requests,
+                )
             )
-            resp.raise_for_status()
-            for art in resp.json().get("articles", []):
-                all_articles.append(art)
-        except Exception as exc:
-            logger.warning("Topic '%s' fetch failed: %s", topic, exc)
-
-    seen = {}
-    for art in sorted(
-        all_articles, key=lambda a: a.get("publishedAt", ""), reverse=True
+    else:
+        batches = [
+            _fetch_pages(label, params, max_pages, limiter)
+            for label, params in requests
+        ]
+    candidates = merge_articles(batch or [] for batch in batches)
+    logger.info(
+        "Fetched %d candidates for %d topics with %d combined queries in %.2fs",
+        len(candidates),
+        len(topic_queries),
+        len(requests),
+        time.perf_counter() - started,
+    )
+
+    with metrics.span("classify"):
+        by_topic = get_classifier(topic_queries).assign(
+            candidates,
+            top_n=top_n_per_topic,
+            half_life_hours=settings.news_recency_half_life_hours,
+            since=watermarks,
+        )
+    deferred = [
+        topic
+        for group, batch in zip(groups, batches)
+        if batch is None
+        for topic in group
+    ]
+    _fill_deferred(
+        by_topic, deferred, topic_queries, top_n_per_topic, watermarks, stored_topics
+    )
+    return by_topic
+
+
+def _published(article: Mapping) -> str:
+    return article.get("publishedAt") or ""
+
+
+def _newest_first(batch: Iterable[Article]) -> List[Article]:
+    batch = list(batch)
+    if any(_published(a) < _published(b) for a, b in zip(batch, batch[1:])):
+        # NewsAPI batches already arrive newest first; others (e.g. ranked by
+        # relevance) are sorted on their own, which is stable like before.
+        batch.sort(key=_published, reverse=True)
+    return batch
+
+
+def merge_articles(
+    batches: Iterable[Iterable[Article]], count_dropped: bool = True
+) -> List[Article]:
+    """De-duplicate *batches* by URL and order them by ``publishedAt`` (newest first).
+
+    Batches are combined with a k-way heap merge rather than a sort of the
+    concatenation; on equal timestamps earlier batches win, as before.
+    Duplicates are counted in ``articles_dropped`` unless *count_dropped* is
+    false (for callers that merge overlapping views of one fetch).
+    """
+    seen: Dict[str, Article] = {}
+    total = 0
+    for art in heapq.merge(
+        *(_newest_first(batch) for batch in batches), key=_published, reverse=True
     ):
+        total += 1
         url = art.get("url")
         if url and url not in seen:
             seen[url] = art
 
+    if count_dropped:
+        metrics.incr("articles_dropped", total - len(seen), reason="url_dedupe")
     return list(seen.values())
+
+
+def fetch_latest_news(
+    page_size_per_topic: int = 3,
+    language: str = "en",
+    concurrent: bool = True,
+    watermarks: Mapping[str, str] | None = None,
+    topic_queries: Mapping[str, str] | None = None,
+) -> List[Article]:
+    """Fetch latest news across predefined topics.
+
+    For each topic defined in ``topic_queries`` (``TOPIC_QUERIES`` by default)
+    this function queries the NewsAPI *Everything* endpoint and grabs the
+    ``page_size_per_topic`` most recent articles. Results are de-duplicated by
+    URL and returned ordered by publication date (descending). See
+    :func:`fetch_topics` for concurrency, caching and ``watermarks``.
+    """
+    by_topic = fetch_topics(
+        topic_queries if topic_queries is not None else get_topic_queries(),
+        page_size_per_topic=page_size_per_topic,
+        language=language,
+        concurrent=concurrent,
+        watermarks=watermarks,
+    )
+    return merge_articles(by_topic.values())
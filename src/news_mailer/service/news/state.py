@@ -0,0 +1,93 @@
+"""Persistent fetch state: per-topic ``publishedAt`` watermarks and already-sent URLs."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from src.news_mailer.utils import get_logger
+from src.news_mailer.utils.disk_cache import atomic_write_bytes
+
+logger = get_logger(__name__)
+
+
+def _load_json(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring unreadable state file %s: %s", path, exc)
+        return {}
+
+
+class WatermarkStore:
+    """Newest ``publishedAt`` already mailed, per topic.
+
+    NewsAPI timestamps are ISO-8601 UTC strings (``2024-05-01T12:00:00Z``), so
+    plain string comparison orders them correctly.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._marks: Dict[str, str] = _load_json(self.path)
+
+    def get(self, topic: str) -> str | None:
+        return self._marks.get(topic)
+
+    def as_dict(self) -> Dict[str, str]:
+        return dict(self._marks)
+
+    def advance(self, articles: Iterable[Dict]) -> None:
+        """Move each topic's watermark up to the newest article seen for it."""
+        for art in articles:
+            topic, published = art.get("topic"), art.get("publishedAt")
+            if topic and published and published > self._marks.get(topic, ""):
+                self._marks[topic] = published
+
+    def save(self) -> None:
+        atomic_write_bytes(self.path, json.dumps(self._marks, indent=2).encode("utf-8"))
+
+
+class SeenUrlStore:
+    """Compact set of URLs already sent, expiring entries after *max_age_days*.
+
+    URLs are stored as 64-bit BLAKE2b digests mapped to the time they were
+    added, which keeps the file small even with tens of thousands of entries.
+    """
+
+    def __init__(self, path: str | Path, max_age_days: float = 7):
+        self.path = Path(path)
+        self.max_age_seconds = max_age_days * 86400
+        self._seen: Dict[str, float] = _load_json(self.path)
+        self._expire()
+
+    @staticmethod
+    def _digest(url: str) -> str:
+        return hashlib.blake2b(url.encode("utf-8"), digest_size=8).hexdigest()
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.max_age_seconds
+        self._seen = {h: ts for h, ts in self._seen.items() if ts >= cutoff}
+
+    def __contains__(self, url: str) -> bool:
+        return self._digest(url) in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def filter_unseen(self, articles: Iterable[Dict]) -> List[Dict]:
+        return [art for art in articles if art.get("url") not in self]
+
+    def add(self, urls: Iterable[str]) -> None:
+        now = time.time()
+        for url in urls:
+            if url:
+                self._seen[self._digest(url)] = now
+
+    def save(self) -> None:
+        self._expire()
+        atomic_write_bytes(self.path, json.dumps(self._seen).encode("utf-8"))
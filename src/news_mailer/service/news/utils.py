@@ -1,15 +1,23 @@
 import json
+from functools import lru_cache
 from typing import Any
-from dotenv import load_dotenv
 from os import getenv
 
+from src.news_mailer.config import load_env
 from src.news_mailer.service.news.type.topic_queries import TopicQueries
 from src.news_mailer.utils import get_logger
 
-load_dotenv()
 logger = get_logger(__name__)
 
+
+@lru_cache()
+def get_topic_queries() -> dict[str, Any]:
+    """Parse ``TOPIC_QUERIES`` once, on first use."""
+    return try_or_return_default_topic_queries()
+
+
 def try_or_return_default_topic_queries() -> dict[str, Any]:
+    load_env()
     try:
         return TopicQueries(**json.loads(getenv("TOPIC_QUERIES"))).model_dump()
     except Exception as exc:
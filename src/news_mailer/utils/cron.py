@@ -0,0 +1,103 @@
+"""Minimal five-field cron expressions: ``minute hour day-of-month month day-of-week``."""
+
+from __future__ import annotations
+
+import datetime
+from typing import FrozenSet
+
+ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+
+# (low, high) per field; day-of-week also accepts 7 for Sunday.
+_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+# Five years covers every valid combination, including 29 February.
+_SEARCH_LIMIT = datetime.timedelta(days=5 * 366)
+
+
+def _parse_field(text: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        base, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if step < 1:
+            raise ValueError(f"Invalid cron step in {part!r}")
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start, end = (int(v) for v in base.split("-", 1))
+        else:
+            start = int(base)
+            end = high if step_text else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"Cron field {part!r} is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """A parsed cron expression, evaluated in the timezone of the datetimes passed in.
+
+    As in classic (Vixie) cron, when both day-of-month and day-of-week are
+    restricted a day matching *either* one fires; a field starting with
+    ``*`` (e.g. ``*/2``) counts as unrestricted.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(
+                f"Cron expression {expression!r} must have five fields "
+                "(minute hour day-of-month month day-of-week)"
+            )
+        (
+            self.minutes,
+            self.hours,
+            self.days,
+            self.months,
+            weekdays,
+        ) = (_parse_field(f, *r) for f, r in zip(fields, _RANGES))
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+        self._any_day = fields[2].startswith("*")
+        self._any_weekday = fields[4].startswith("*")
+
+    def __repr__(self) -> str:
+        return f"CronSchedule({self.expression!r})"
+
+    def _day_matches(self, moment: datetime.datetime) -> bool:
+        in_month = moment.day in self.days
+        # isoweekday(): Monday=1 … Sunday=7; cron: Sunday=0.
+        in_week = moment.isoweekday() % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, moment: datetime.datetime) -> datetime.datetime:
+        """Return the first fire time strictly after *moment*."""
+        candidate = moment.replace(second=0, microsecond=0) + datetime.timedelta(
+            minutes=1
+        )
+        limit = candidate + _SEARCH_LIMIT
+        while candidate < limit:
+            if candidate.month not in self.months:
+                first = candidate.replace(day=1, hour=0, minute=0)
+                candidate = (first + datetime.timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + datetime.timedelta(
+                    days=1
+                )
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + datetime.timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += datetime.timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
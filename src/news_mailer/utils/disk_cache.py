@@ -0,0 +1,135 @@
+"""Small persistent JSON cache with TTL, size-bounded LRU eviction and atomic writes."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Mapping
+
+from src.news_mailer.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def atomic_write_bytes(path: str | os.PathLike, data: bytes) -> None:
+    """Write *data* to *path* via a sibling temp file and ``os.replace``."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes_saved: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"hits={self.hits} misses={self.misses} stores={self.stores} "
+            f"evictions={self.evictions} bytes_saved={self.bytes_saved}"
+        )
+
+
+class DiskCache:
+    """Store JSON-serialisable values as one file per key under *directory*.
+
+    Entries older than *ttl_seconds* are treated as misses and removed. Every
+    hit bumps the file's mtime, so when the directory grows past *max_bytes*
+    the least recently used entries are evicted first. Writes go through a
+    temporary file and ``os.replace`` so concurrent runs never observe a
+    half-written entry.
+    """
+
+    SUFFIX = ".json"
+
+    def __init__(
+        self, directory: str | os.PathLike, ttl_seconds: float, max_bytes: int
+    ):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(parts: Mapping[str, Any]) -> str:
+        """Return a stable hex digest for *parts* (order-insensitive)."""
+        canonical = json.dumps(
+            parts, sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.SUFFIX}"
+
+    def get(self, key: str) -> Any | None:
+        path = self._path(key)
+        try:
+            raw = path.read_bytes()
+            entry = json.loads(raw)
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats.misses += 1
+            return None
+
+        if time.time() - entry.get("created", 0) > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self.stats.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.stats.hits += 1
+            self.stats.bytes_saved += len(raw)
+        return entry.get("value")
+
+    def set(self, key: str, value: Any) -> None:
+        payload = json.dumps({"created": time.time(), "value": value}).encode("utf-8")
+        try:
+            atomic_write_bytes(self._path(key), payload)
+        except OSError as exc:
+            logger.warning("Cache write to %s failed: %s", self.directory, exc)
+            return
+        with self._lock:
+            self.stats.stores += 1
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for path in self.directory.glob(f"*{self.SUFFIX}"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self.stats.evictions += 1
+            if total <= self.max_bytes:
+                break
@@ -0,0 +1,185 @@
+"""Shared HTTP helpers: pooled session, per-host concurrency caps and retries."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from contextlib import ExitStack
+from typing import Any, Mapping
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from src.news_mailer.utils.logger import get_logger
+from src.news_mailer.utils.rate_limit import (
+    ProviderLimiter,
+    RateLimited,
+    parse_retry_after,
+)
+from src.news_mailer.utils.singleton import locked_cache
+
+logger = get_logger(__name__)
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+@locked_cache
+def get_session(pool_size: int = 10) -> requests.Session:
+    """Return a process-wide keep-alive session with a connection pool of *pool_size*."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": "news-mailer/1.0"})
+    return session
+
+
+class HostLimiter:
+    """Cap the number of in-flight requests per host."""
+
+    def __init__(self, per_host: int):
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._semaphores: dict[str, threading.BoundedSemaphore] = {}
+
+    def for_url(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Full-jitter exponential backoff for the given zero-based *attempt*."""
+    return random.uniform(0, min(cap, base * (2**attempt)))
+
+
+def get_with_retry(
+    url: str,
+    params: Mapping[str, Any] | None = None,
+    *,
+    session: requests.Session | None = None,
+    limiter: HostLimiter | None = None,
+    rate_limiter: ProviderLimiter | None = None,
+    headers: Mapping[str, str] | None = None,
+    timeout: float = 10,
+    max_retries: int = 3,
+    max_retry_after: float = 30.0,
+    stream: bool = False,
+) -> requests.Response:
+    """GET *url*, retrying 429/5xx responses and connection errors with jittered backoff.
+
+    ``Retry-After`` is honoured when the server sends one; if it asks us to wait
+    longer than *max_retry_after* seconds we give up instead of stalling the run.
+    The final response is returned with ``raise_for_status`` already applied;
+    with *stream* its body is left unread for the caller to iterate, and the
+    caller must close it (``with resp:``) to free the host and rate-limit slots.
+
+    With a *rate_limiter* every attempt is scheduled through it and its
+    responses are fed back (attempts whose connection could not be opened
+    are not charged to the quota); a 429 that cannot be retried then raises
+    :class:`~src.news_mailer.utils.rate_limit.RateLimited` instead, and the
+    wait before retrying a 429 is left to the limiter's shared cool-down.
+    """
+    session = session or get_session()
+    attempt = 0
+    while True:
+        try:
+            resp = _get(
+                session, url, params, headers, timeout, limiter, rate_limiter, stream
+            )
+            if rate_limiter is not None:
+                retry_after = rate_limiter.record(
+                    resp.status_code, resp.headers
+                ) or _retry_after(resp)
+            else:
+                retry_after = _retry_after(resp)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            if rate_limiter is not None and _never_sent(exc):
+                rate_limiter.refund()
+            if attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            logger.info("GET %s failed (%s); retrying in %.2fs", url, exc, delay)
+        else:
+            too_long = retry_after is not None and retry_after > max_retry_after
+            if (
+                resp.status_code not in RETRYABLE_STATUS
+                or attempt >= max_retries
+                or too_long
+            ):
+                if rate_limiter is not None and resp.status_code == 429:
+                    resp.close()
+                    raise RateLimited(rate_limiter.name, retry_after)
+                if not resp.ok:
+                    resp.close()
+                resp.raise_for_status()
+                return resp
+            resp.close()
+            if rate_limiter is not None and resp.status_code == 429:
+                delay = 0.0
+            elif retry_after is not None:
+                delay = retry_after
+            else:
+                delay = backoff_delay(attempt)
+            logger.info(
+                "GET %s returned %d; retrying in %.2fs", url, resp.status_code, delay
+            )
+        attempt += 1
+        time.sleep(delay)
+
+
+def _get(
+    session: requests.Session,
+    url: str,
+    params: Mapping[str, Any] | None,
+    headers: Mapping[str, str] | None,
+    timeout: float,
+    limiter: HostLimiter | None,
+    rate_limiter: ProviderLimiter | None,
+    stream: bool,
+) -> requests.Response:
+    """Send one GET while holding the provider and per-host slots.
+
+    A streamed response keeps both slots until it is closed, so the caps
+    also bound how many bodies are downloading at once (and never exceed
+    the connection pool).
+    """
+    kwargs = dict(params=params, headers=headers, timeout=timeout, stream=stream)
+    with ExitStack() as slots:
+        if rate_limiter is not None:
+            slots.enter_context(rate_limiter.slot())
+        if limiter is not None:
+            slots.enter_context(limiter.for_url(url))
+        resp = session.get(url, **kwargs)
+        if stream:
+            _release_on_close(resp, slots.pop_all())
+    return resp
+
+
+def _release_on_close(resp: requests.Response, slots: ExitStack) -> None:
+    close = resp.close
+
+    def release() -> None:
+        try:
+            close()
+        finally:
+            slots.close()
+
+    resp.close = release
+
+
+def _retry_after(resp: requests.Response) -> float | None:
+    return parse_retry_after(resp.headers.get("Retry-After"))
+
+
+def _never_sent(exc: requests.RequestException) -> bool:
+    """Whether *exc* means no connection was opened, so the server never saw the request."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, NewConnectionError)
@@ -0,0 +1,147 @@
+"""Lightweight in-process timers and counters with JSON / Prometheus export."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from src.news_mailer.utils.disk_cache import atomic_write_bytes
+from src.news_mailer.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PROM_PREFIX = "news_mailer"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+class Metrics:
+    """Collects stage timings and counters for one pipeline run.
+
+    ``span(stage, **labels)`` times a block; ``incr(name, value, **labels)``
+    adds to a counter. Both are thread-safe so worker pools can report into
+    the same instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.time()
+            self._spans: Dict[Tuple[str, LabelKey], List[float]] = {}
+            self._counters: Dict[Tuple[str, LabelKey], float] = {}
+
+    @contextmanager
+    def span(self, stage: str, **labels: object) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def observe(self, stage: str, seconds: float, **labels: object) -> None:
+        with self._lock:
+            self._spans.setdefault((stage, _label_key(labels)), []).append(seconds)
+
+    def incr(self, name: str, value: float = 1, **labels: object) -> None:
+        with self._lock:
+            key = (name, _label_key(labels))
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def samples(self) -> Dict[str, List[float]]:
+        """Return every recorded duration per stage, across all label sets."""
+        with self._lock:
+            merged: Dict[str, List[float]] = {}
+            for (stage, _), values in self._spans.items():
+                merged.setdefault(stage, []).extend(values)
+        return merged
+
+    def counter(self, name: str) -> float:
+        """Return the total of counter *name* across all label sets."""
+        with self._lock:
+            return sum(v for (n, _), v in self._counters.items() if n == name)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            spans = [
+                {
+                    "stage": stage,
+                    "labels": dict(labels),
+                    "count": len(values),
+                    "total_seconds": round(sum(values), 6),
+                    "max_seconds": round(max(values), 6),
+                }
+                for (stage, labels), values in self._spans.items()
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self._counters.items()
+            ]
+        return {
+            "started": self.started,
+            "finished": time.time(),
+            "spans": spans,
+            "counters": counters,
+        }
+
+    def to_prometheus(self) -> str:
+        summary = self.summary()
+        stage_metric = f"{PROM_PREFIX}_stage_seconds"
+        lines = [f"# TYPE {stage_metric} summary"]
+        for span in summary["spans"]:
+            key = _label_key({"stage": span["stage"], **span["labels"]})
+            labels = _prom_labels(key)
+            lines.append(f"{stage_metric}_sum{labels} {span['total_seconds']}")
+            lines.append(f"{stage_metric}_count{labels} {span['count']}")
+        seen_types = set()
+        # Samples of one metric family must be contiguous in the text format.
+        for counter in sorted(summary["counters"], key=lambda c: c["name"]):
+            metric = f"{PROM_PREFIX}_{counter['name']}_total"
+            if metric not in seen_types:
+                lines.append(f"# TYPE {metric} counter")
+                seen_types.add(metric)
+            labels = _prom_labels(_label_key(counter["labels"]))
+            lines.append(f"{metric}{labels} {counter['value']}")
+        last_run = f"{PROM_PREFIX}_last_run_timestamp_seconds"
+        lines.append(f"# TYPE {last_run} gauge")
+        lines.append(f"{last_run} {summary['finished']:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory: str | Path, run_name: str = "run") -> None:
+        """Write ``<run_name>.json`` and ``<run_name>.prom`` into *directory*."""
+        directory = Path(directory)
+        try:
+            atomic_write_bytes(
+                directory / f"{run_name}.json",
+                json.dumps(self.summary(), indent=2).encode("utf-8"),
+            )
+            atomic_write_bytes(
+                directory / f"{run_name}.prom", self.to_prometheus().encode("utf-8")
+            )
+        except OSError as exc:
+            logger.warning("Could not export metrics to %s: %s", directory, exc)
+            return
+        logger.info("Metrics written to %s", directory)
+
+
+metrics = Metrics()
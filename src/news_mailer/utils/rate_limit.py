@@ -0,0 +1,451 @@
+"""Thread-safe token buckets and the per-provider scheduler shared by outbound API calls.
+
+Every provider (NewsAPI, Gemini, Brevo) gets one :class:`ProviderLimiter`
+combining a request-rate bucket, an optional token-per-minute bucket, an
+adaptive concurrency cap and a daily quota. Quota use, server-imposed
+cool-downs and deferred work are persisted in a :class:`QuotaStore`, so
+consecutive runs (and the daemon) share one budget.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping
+
+from src.news_mailer.config import get_settings
+from src.news_mailer.utils.disk_cache import atomic_write_bytes
+from src.news_mailer.utils.logger import get_logger
+from src.news_mailer.utils.metrics import metrics
+from src.news_mailer.utils.singleton import locked_cache
+
+logger = get_logger(__name__)
+
+# Seconds to back off after a 429 that carries no Retry-After / reset hint.
+DEFAULT_COOLDOWN = 5.0
+
+
+class TokenBucket:
+    """Allow *rate* acquisitions per second on average, with bursts up to *burst*."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until *tokens* are available; return the seconds spent waiting."""
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate if self.rate > 0 else 1.0
+            time.sleep(delay)
+            waited += delay
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take *tokens* if they are available right now, without waiting."""
+        tokens = min(tokens, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def give_back(self, tokens: float = 1.0) -> None:
+        """Return *tokens* taken by an acquisition that was not used."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + min(tokens, self.capacity))
+
+
+class RateLimited(RuntimeError):
+    """A provider asked us to back off for longer than we are willing to wait."""
+
+    def __init__(self, provider: str, retry_after: float | None, message: str = ""):
+        super().__init__(
+            message
+            or f"{provider} is rate limited"
+            + (f" for another {retry_after:.0f}s" if retry_after else "")
+        )
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class QuotaExceeded(RateLimited):
+    """The provider's daily quota is used up."""
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+def _header_number(headers: Mapping[str, str], *names: str) -> float | None:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            # ``RateLimit-Remaining`` may list several policies: "5, 100;w=60".
+            return float(str(value).split(",")[0].split(";")[0].strip())
+        except ValueError:
+            continue
+    return None
+
+
+def _today() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d")
+
+
+class QuotaStore:
+    """Per-provider quota use for the current UTC day, cool-downs and deferred items."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            self._data: Dict[str, Dict] = json.loads(
+                self.path.read_text(encoding="utf-8")
+            )
+        except (OSError, ValueError):
+            self._data = {}
+
+    def _entry(self, provider: str) -> Dict:
+        entry = self._data.setdefault(provider, {})
+        if entry.get("day") != _today():
+            entry.update(day=_today(), used=0)
+        return entry
+
+    def used(self, provider: str) -> int:
+        with self._lock:
+            return self._entry(provider)["used"]
+
+    def add(self, provider: str, amount: int) -> None:
+        with self._lock:
+            self._entry(provider)["used"] += amount
+
+    def try_reserve(self, provider: str, cost: int, quota: int) -> bool:
+        """Add *cost* to today's use unless that would exceed *quota* (0 = unlimited)."""
+        with self._lock:
+            entry = self._entry(provider)
+            if quota and entry["used"] + cost > quota:
+                return False
+            entry["used"] += cost
+            return True
+
+    def refund(self, provider: str, amount: int) -> None:
+        with self._lock:
+            entry = self._entry(provider)
+            entry["used"] = max(0, entry["used"] - amount)
+
+    def set_used(self, provider: str, used: int) -> None:
+        with self._lock:
+            entry = self._entry(provider)
+            entry["used"] = max(entry["used"], used)
+
+    def cooldown_until(self, provider: str) -> float:
+        """Wall-clock time before which *provider* should not be called."""
+        with self._lock:
+            return self._data.get(provider, {}).get("cooldown_until", 0.0)
+
+    def set_cooldown(self, provider: str, until: float) -> None:
+        with self._lock:
+            entry = self._data.setdefault(provider, {})
+            entry["cooldown_until"] = max(entry.get("cooldown_until", 0.0), until)
+
+    def deferred(self, provider: str) -> List[str]:
+        with self._lock:
+            return list(self._data.get(provider, {}).get("deferred", []))
+
+    def update_deferred(
+        self, provider: str, add: Iterable[str], remove: Iterable[str] = ()
+    ) -> List[str]:
+        """Merge *add* into the deferred items and drop *remove*; return the new list.
+
+        Callers with different item sets (e.g. daemon jobs for different
+        regions) only touch their own entries.
+        """
+        add, remove = list(add), set(remove)
+        with self._lock:
+            entry = self._data.setdefault(provider, {})
+            items = [
+                item
+                for item in entry.get("deferred", [])
+                if item not in remove and item not in add
+            ]
+            entry["deferred"] = items + add
+            return list(entry["deferred"])
+
+    def save(self) -> None:
+        with self._lock:
+            data = json.dumps(self._data, indent=2).encode("utf-8")
+        try:
+            atomic_write_bytes(self.path, data)
+        except OSError as exc:
+            logger.warning("Could not persist API quota usage: %s", exc)
+
+
+@dataclass(frozen=True)
+class ProviderBudget:
+    """Limits for one provider; zero means unlimited."""
+
+    requests_per_second: float = 0.0
+    burst: int | None = None
+    tokens_per_minute: float = 0.0
+    max_concurrency: int = 4
+    daily_quota: int = 0
+    # Longest cool-down we sit out before giving up with ``RateLimited``.
+    max_wait: float = 60.0
+
+
+class ProviderLimiter:
+    """Schedule calls to one provider within its :class:`ProviderBudget`.
+
+    Use :meth:`slot` around each request and report the outcome with
+    :meth:`record`. A 429 halves the concurrency cap and pauses every caller
+    until ``Retry-After`` (or the rate-limit reset) has passed; successful
+    calls grow the cap back by one per round of requests.
+    """
+
+    def __init__(self, name: str, budget: ProviderBudget, store: QuotaStore):
+        self.name = name
+        self.budget = budget
+        self.store = store
+        self._requests = (
+            TokenBucket(budget.requests_per_second, budget.burst)
+            if budget.requests_per_second > 0
+            else None
+        )
+        self._tokens = (
+            TokenBucket(budget.tokens_per_minute / 60, int(budget.tokens_per_minute))
+            if budget.tokens_per_minute > 0
+            else None
+        )
+        self._max_concurrency = max(1, budget.max_concurrency)
+        self._limit = float(self._max_concurrency)
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def concurrency(self) -> int:
+        with self._cond:
+            return max(1, int(self._limit))
+
+    def remaining(self) -> int | None:
+        """Calls left in today's quota, or ``None`` when unlimited."""
+        if not self.budget.daily_quota:
+            return None
+        return max(0, self.budget.daily_quota - self.store.used(self.name))
+
+    def _wait_for_cooldown(self) -> float:
+        delay = self.store.cooldown_until(self.name) - time.time()
+        if delay <= 0:
+            return 0.0
+        if delay > self.budget.max_wait:
+            raise RateLimited(self.name, delay)
+        logger.info("%s is cooling down; waiting %.1fs", self.name, delay)
+        time.sleep(delay)
+        return delay
+
+    def _reserve(self, cost: int) -> None:
+        if not self.store.try_reserve(self.name, cost, self.budget.daily_quota):
+            raise QuotaExceeded(
+                self.name,
+                None,
+                f"{self.name} daily quota of {self.budget.daily_quota} is used up",
+            )
+        self.store.save()
+
+    def refund(self, cost: int = 1) -> None:
+        """Give back quota reserved by :meth:`slot` for a request that never went out."""
+        self.store.refund(self.name, cost)
+        self.store.save()
+
+    @contextmanager
+    def slot(self, cost: int = 1, tokens: int = 0) -> Iterator[None]:
+        """Hold one concurrency slot for a request that uses *cost* quota units.
+
+        Blocks for cool-downs, free slots and rate buckets. Raises
+        :class:`QuotaExceeded` when today's quota cannot cover *cost* and
+        :class:`RateLimited` when the cool-down exceeds ``max_wait``.
+
+        The quota is charged up front so concurrent callers cannot overshoot
+        it. Callers that know the request never reached the provider (e.g.
+        the connection could not be opened) hand it back with :meth:`refund`.
+        """
+        started = time.monotonic()
+        self._wait_for_cooldown()
+        self._reserve(cost)
+        with self._cond:
+            while self._in_flight >= max(1, int(self._limit)):
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            if self._requests is not None:
+                self._requests.acquire()
+            if self._tokens is not None and tokens:
+                self._tokens.acquire(tokens)
+            metrics.observe(
+                "rate_limit_wait", time.monotonic() - started, provider=self.name
+            )
+            yield
+        finally:
+            self.release()
+
+    def try_acquire(self, cost: int = 1, tokens: int = 0) -> bool:
+        """Take a slot, rate budget and quota only if all are free right now.
+
+        The non-blocking counterpart of :meth:`slot` for optional work such
+        as a hedged request: returns ``False`` (charging nothing) instead of
+        waiting. A successful call must be paired with :meth:`release`.
+        """
+        if self.store.cooldown_until(self.name) > time.time():
+            return False
+        with self._cond:
+            if self._in_flight >= max(1, int(self._limit)):
+                return False
+            self._in_flight += 1
+        taken = []
+        for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+            if bucket is None or not amount:
+                continue
+            if not bucket.try_acquire(amount):
+                break
+            taken.append((bucket, amount))
+        else:
+            if self.store.try_reserve(self.name, cost, self.budget.daily_quota):
+                self.store.save()
+                return True
+        for bucket, amount in taken:
+            bucket.give_back(amount)
+        self.release()
+        return False
+
+    def release(self) -> None:
+        """Free the slot taken by a successful :meth:`try_acquire`."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def record(
+        self, status: int | None, headers: Mapping[str, str] | None = None
+    ) -> float | None:
+        """Feed a response back; return the back-off in seconds after a 429.
+
+        ``X-RateLimit-Remaining`` / ``RateLimit-Remaining`` headers resync the
+        daily quota with the provider's own count.
+        """
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        remaining = _header_number(
+            headers, "x-ratelimit-remaining", "ratelimit-remaining"
+        )
+        if remaining is not None and self.budget.daily_quota:
+            self.store.set_used(self.name, self.budget.daily_quota - int(remaining))
+
+        if status != 429:
+            if status is not None and status < 400:
+                with self._cond:
+                    if self._limit < self._max_concurrency:
+                        self._limit = min(
+                            self._max_concurrency, self._limit + 1 / self._limit
+                        )
+                        self._cond.notify_all()
+            return None
+
+        metrics.incr("rate_limited", provider=self.name)
+        with self._cond:
+            self._limit = max(1.0, self._limit / 2)
+        retry_after = parse_retry_after(headers.get("retry-after"))
+        if retry_after is None:
+            reset = _header_number(headers, "x-ratelimit-reset", "ratelimit-reset")
+            if reset is not None:
+                # Either an epoch timestamp or seconds until the window resets.
+                retry_after = max(0.0, reset - time.time()) if reset > 1e9 else reset
+        if retry_after is None and self.budget.daily_quota and remaining is None:
+            # No hint at all from a daily-quota API: assume the quota is spent.
+            self.store.set_used(self.name, self.budget.daily_quota)
+        retry_after = DEFAULT_COOLDOWN if retry_after is None else retry_after
+        self.store.set_cooldown(self.name, time.time() + retry_after)
+        self.store.save()
+        logger.warning(
+            "%s rate limited; backing off %.1fs (concurrency now %d)",
+            self.name,
+            retry_after,
+            self.concurrency,
+        )
+        return retry_after
+
+
+@locked_cache
+def get_quota_store() -> QuotaStore:
+    """Return the process-wide quota store (``STATE_DIR/api_quota.json``)."""
+    return QuotaStore(Path(get_settings().state_dir) / "api_quota.json")
+
+
+def _budget(provider: str) -> ProviderBudget:
+    settings = get_settings()
+    max_wait = settings.rate_limit_max_wait
+    if provider == "newsapi":
+        return ProviderBudget(
+            requests_per_second=settings.newsapi_rate_per_second,
+            max_concurrency=settings.news_fetch_per_host_limit,
+            daily_quota=settings.newsapi_daily_quota,
+            max_wait=max_wait,
+        )
+    if provider == "gemini":
+        rpm = settings.gemini_requests_per_minute
+        return ProviderBudget(
+            requests_per_second=rpm / 60,
+            burst=max(1, int(rpm)),
+            tokens_per_minute=settings.gemini_tokens_per_minute,
+            max_concurrency=settings.gemini_max_concurrency,
+            daily_quota=settings.gemini_daily_quota,
+            max_wait=max_wait,
+        )
+    if provider == "brevo":
+        return ProviderBudget(
+            requests_per_second=settings.brevo_rate_per_second,
+            max_concurrency=settings.brevo_max_concurrency,
+            daily_quota=settings.brevo_daily_quota,
+            max_wait=max_wait,
+        )
+    raise ValueError(f"Unknown API provider {provider!r}")
+
+
+@locked_cache
+def get_rate_limiter(provider: str) -> ProviderLimiter:
+    """Return the shared limiter for ``"newsapi"``, ``"gemini"`` or ``"brevo"``."""
+    return ProviderLimiter(provider, _budget(provider), get_quota_store())
@@ -0,0 +1,29 @@
+"""Thread-safe ``lru_cache`` for process-wide clients and limiters."""
+
+from __future__ import annotations
+
+import functools
+import threading
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def locked_cache(func: Callable[..., T]) -> Callable[..., T]:
+    """Like ``functools.lru_cache()``, but build each value only once across threads.
+
+    ``lru_cache`` lets two threads that miss at the same time both call
+    *func*, each getting its own instance. Here concurrent first calls wait
+    for the one that is building. ``cache_clear`` and ``cache_info`` are kept.
+    """
+    cached = functools.lru_cache()(func)
+    lock = threading.RLock()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with lock:
+            return cached(*args, **kwargs)
+
+    wrapper.cache_clear = cached.cache_clear
+    wrapper.cache_info = cached.cache_info
+    return wrapper
@@ -0,0 +1,43 @@
+"""Shared fixtures: an isolated environment and fresh process-wide singletons."""
+
+import pytest
+
+from src.news_mailer.config import get_settings
+from src.news_mailer.service.mail.email_composer import get_generation_cache
+from src.news_mailer.service.news.article_store import get_article_store
+from src.news_mailer.service.news.news_fetcher import get_news_cache
+from src.news_mailer.utils.rate_limit import get_quota_store, get_rate_limiter
+
+_CACHED = (
+    get_settings,
+    get_generation_cache,
+    get_quota_store,
+    get_rate_limiter,
+    get_article_store,
+    get_news_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def settings_env(monkeypatch, tmp_path):
+    """Minimal valid settings with state and caches under *tmp_path*."""
+    for name, value in {
+        "ENV_FILE": str(tmp_path / "missing.env"),
+        "GEMINI_API_KEY": "test",
+        "NEWS_API_KEY": "test",
+        "EMAIL_FROM": "sender@example.com",
+        "EMAIL_TO": "reader@example.com",
+        "STATE_DIR": str(tmp_path / "state"),
+        "CACHE_DIR": str(tmp_path / "cache"),
+        "METRICS_DIR": "",
+        "NEWS_API_BASE_URL": "http://127.0.0.1:9",
+    }.items():
+        monkeypatch.setenv(name, value)
+    for getter in _CACHED:
+        getter.cache_clear()
+    yield
+    store = get_article_store() if get_article_store.cache_info().currsize else None
+    if store is not None:
+        store.close()
+    for getter in _CACHED:
+        getter.cache_clear()
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from src.news_mailer.service.news.article import (
+    MAX_CONTENT_CHARS,
+    Article,
+    iter_articles,
+)
+from src.news_mailer.service.news.news_fetcher import merge_articles
+
+RAW = [
+    {
+        "source": {"id": None, "name": "Wire"},
+        "title": "Café opens — “finally”",
+        "url": "https://example.com/1",
+        "description": "Ünïcödé text",
+        "content": "x" * (MAX_CONTENT_CHARS + 50),
+        "publishedAt": "2026-10-17T09:00:00Z",
+        "urlToImage": "https://example.com/1.png",
+    },
+    {
+        "source": {"name": None},
+        "title": "Second",
+        "url": "https://example.com/2",
+        "publishedAt": "2026-10-16T09:00:00Z",
+    },
+]
+BODY = json.dumps(
+    {"status": "ok", "totalResults": 1234567, "articles": RAW, "extra": [1, {"a": 2}]},
+    ensure_ascii=False,
+).encode("utf-8")
+
+
+def _chunks(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(BODY)])
+def test_iter_articles_any_chunking(size):
+    articles = list(iter_articles(_chunks(BODY, size)))
+
+    assert [art["url"] for art in articles] == [raw["url"] for raw in RAW]
+    assert articles[0]["title"] == RAW[0]["title"]
+    assert articles[0]["description"] == RAW[0]["description"]
+
+
+def test_iter_articles_empty_responses():
+    assert list(iter_articles([b"{}"])) == []
+    assert list(iter_articles([b'{"articles": []}'])) == []
+    assert list(iter_articles([b'{"status": "error", "articles": null}'])) == []
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b"", b"[]", b'{"articles": [{"url": "a"}', b'{"articles": [{"url": "a"} {}]}'],
+)
+def test_iter_articles_rejects_malformed_json(body):
+    with pytest.raises(ValueError):
+        list(iter_articles(_chunks(body, 4)))
+
+
+def test_article_mapping_and_round_trip():
+    art = Article.from_json(RAW[0])
+
+    assert len(art["content"]) == MAX_CONTENT_CHARS
+    assert art["source"] == {"name": "Wire"}
+    assert art.get("urlToImage") is None
+    assert "urlToImage" not in art.to_dict()
+    assert Article.from_json(art.to_dict()).to_dict() == art.to_dict()
+    assert Article.from_json(RAW[1])["source"] is None
+    with pytest.raises(KeyError):
+        art["urlToImage"]
+
+
+def test_merge_articles_dedupes_and_orders_newest_first():
+    def art(n, published, title=None):
+        return Article(
+            url=f"https://example.com/{n}",
+            title=title or str(n),
+            published_at=published,
+        )
+
+    first = [art(1, "2026-10-17T10:00:00Z"), art(2, "2026-10-15T10:00:00Z")]
+    # Not newest first, plus a same-timestamp duplicate of an earlier URL.
+    second = [
+        art(3, "2026-10-14T10:00:00Z"),
+        art(4, "2026-10-16T10:00:00Z"),
+        art(1, "2026-10-17T10:00:00Z", title="dup"),
+    ]
+
+    merged = merge_articles([first, second])
+
+    assert [a["title"] for a in merged] == ["1", "4", "2", "3"]
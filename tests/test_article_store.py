@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from src.news_mailer.service.news import article_store
+from src.news_mailer.service.news.article import Article
+from src.news_mailer.service.news.article_store import ArticleStore, fts_query
+
+
+def _article(n, title, description="", topic="markets", day=17):
+    return Article.from_json(
+        {
+            "url": f"https://example.com/{n}",
+            "title": title,
+            "description": description,
+            "publishedAt": f"2026-10-{day:02d}T00:00:00Z",
+            "topic": topic,
+            "source": {"name": "Wire"},
+        }
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ArticleStore(tmp_path / "articles.sqlite3")
+    yield store
+    store.close()
+
+
+def test_upsert_refreshes_existing_rows(store):
+    assert store.upsert([_article(0, "Gold climbs"), _article(1, "Oil slips")]) == 2
+    assert store.upsert([_article(0, "Gold climbs again")]) == 1
+    assert store.upsert([Article.from_json({"title": "No URL"})]) == 0
+
+    stored = {art["url"]: art for art in store.recent(limit=10)}
+    assert len(stored) == 2
+    assert stored["https://example.com/0"]["title"] == "Gold climbs again"
+    assert stored["https://example.com/0"]["source"] == {"name": "Wire"}
+
+
+def test_recent_filters_by_topic_and_date(store):
+    store.upsert(
+        [
+            _article(0, "Old", topic="markets", day=10),
+            _article(1, "New", topic="markets", day=16),
+            _article(2, "Other", topic="energy", day=17),
+        ]
+    )
+
+    markets = store.recent("markets", since="2026-10-15T00:00:00Z")
+    assert [art["title"] for art in markets] == ["New"]
+
+
+def test_full_text_search_follows_updates(store):
+    store.upsert([_article(0, "Central bank raises rates", "Inflation stays high")])
+    assert [a["url"] for a in store.search('"inflation"')] == ["https://example.com/0"]
+
+    store.upsert([_article(0, "Central bank holds rates", "Growth slows")])
+    assert store.search('"inflation"') == []
+    assert len(store.search('"growth"')) == 1
+    # Invalid FTS syntax is logged, not raised.
+    assert store.search('"unterminated') == []
+
+
+def test_for_topics_falls_back_to_full_text_search(store):
+    store.upsert(
+        [
+            _article(0, "Bitcoin hits a record", topic="crypto"),
+            _article(1, "Gold and oil climb", topic="markets"),
+        ]
+    )
+
+    by_topic = store.for_topics(
+        {"crypto": "bitcoin", "commodities": 'gold OR "oil price"'},
+        per_topic=5,
+        since=None,
+    )
+
+    assert [a["url"] for a in by_topic["crypto"]] == ["https://example.com/0"]
+    assert [a["url"] for a in by_topic["commodities"]] == ["https://example.com/1"]
+    assert by_topic["commodities"][0]["topic"] == "commodities"
+
+
+def test_fts_query_quotes_query_terms():
+    assert fts_query('oil OR "commodity prices"') == '"oil" OR "commodity prices"'
+
+
+def test_prune_removes_old_rows_and_their_index_entries(store, monkeypatch):
+    store.upsert([_article(0, "Ancient inflation story")])
+    later = time.time() + 10 * 86400
+    monkeypatch.setattr(time, "time", lambda: later)
+    store.upsert([_article(1, "Fresh inflation story")])
+
+    assert store.prune(max_age_days=1) == 1
+    assert [a["url"] for a in store.recent()] == ["https://example.com/1"]
+    assert [a["url"] for a in store.search('"inflation"')] == ["https://example.com/1"]
+
+
+def test_concurrent_first_calls_open_one_store(monkeypatch):
+    monkeypatch.setenv("ARTICLE_STORE_ENABLED", "true")
+
+    class SlowStore(ArticleStore):
+        def __init__(self, *args, **kwargs):
+            time.sleep(0.05)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(article_store, "ArticleStore", SlowStore)
+    barrier = threading.Barrier(8)
+    stores = []
+
+    def worker():
+        barrier.wait()
+        stores.append(article_store.get_article_store())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(store) for store in stores}) == 1
@@ -0,0 +1,39 @@
+import json
+import os
+
+import pytest
+
+from benchmarks import pipeline
+
+
+@pytest.fixture
+def restore_environ():
+    # The harness configures the application through os.environ directly.
+    saved = dict(os.environ)
+    yield
+    os.environ.clear()
+    os.environ.update(saved)
+
+
+def test_percentile_is_nearest_rank():
+    values = [5.0, 1.0, 4.0, 2.0, 3.0]
+
+    assert pipeline.percentile(values, 0.5) == 3.0
+    assert pipeline.percentile(values, 0.95) == 5.0
+    assert pipeline.percentile([], 0.5) == 0.0
+
+
+def test_pipeline_runs_end_to_end_against_fake_services(restore_environ, tmp_path):
+    report_path = tmp_path / "report.json"
+    flags = ["--runs", "1", "--warmup", "0", "--recipients", "3", "--topics", "2"]
+    for service in ("news", "gemini", "brevo"):
+        flags += [f"--{service}-latency", "0"]
+
+    exit_code = pipeline.main(flags + ["--jitter", "0", "--json", str(report_path)])
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert exit_code == 0
+    assert report["failed_runs"] == 0
+    assert {"fetch_topic", "generation", "send"} <= set(report["stages"])
+    assert report["services"]["gemini"]["requests"] >= 1
+    assert report["services"]["brevo"]["requests"] >= 1
@@ -0,0 +1,79 @@
+import datetime
+
+from src.news_mailer.service.news.article import Article
+from src.news_mailer.service.news.classifier import TopicClassifier, parse_query_terms
+from src.news_mailer.service.news.news_fetcher import combine_queries
+
+NOW = datetime.datetime(2026, 10, 17, 12, tzinfo=datetime.timezone.utc)
+TOPICS = {
+    "commodities": 'oil OR gold OR "commodity prices"',
+    "crypto": "cryptocurrency OR bitcoin OR ethereum",
+    "tech": "generative AI OR open source AI",
+}
+
+
+def _article(n, title, description="", published="2026-10-17T11:00:00Z"):
+    return Article.from_json(
+        {
+            "url": f"https://example.com/{n}",
+            "title": title,
+            "description": description,
+            "publishedAt": published,
+        }
+    )
+
+
+def test_parse_query_terms():
+    assert parse_query_terms('oil OR "commodity prices" NOT gas -coal') == [
+        ("oil",),
+        ("commodity", "prices"),
+    ]
+    assert parse_query_terms("generative AI OR (S&P 500)") == [
+        ("generative", "ai"),
+        ("s&p", "500"),
+    ]
+
+
+def test_articles_go_to_their_best_topic():
+    articles = [
+        _article(0, "Bitcoin rallies", "Ethereum follows bitcoin higher"),
+        _article(1, "Gold and oil climb", "Commodity prices rise on supply fears"),
+        _article(2, "New generative AI model", "An open source AI release"),
+        _article(3, "Local team wins cup final"),
+    ]
+
+    by_topic = TopicClassifier(TOPICS).assign(articles, top_n=5, now=NOW)
+
+    assert {t: [a["url"][-1] for a in arts] for t, arts in by_topic.items()} == {
+        "commodities": ["1"],
+        "crypto": ["0"],
+        "tech": ["2"],
+    }
+    assert by_topic["crypto"][0]["topic"] == "crypto"
+
+
+def test_assign_keeps_top_n_by_recency_and_respects_watermarks():
+    articles = [
+        _article(0, "Bitcoin news", published="2026-10-15T12:00:00Z"),
+        _article(1, "Bitcoin news", published="2026-10-17T11:00:00Z"),
+        _article(2, "Bitcoin news", published="2026-10-16T12:00:00Z"),
+    ]
+    classifier = TopicClassifier(TOPICS)
+
+    newest = classifier.assign(articles, top_n=2, now=NOW)["crypto"]
+    assert [a["url"][-1] for a in newest] == ["1", "2"]
+
+    since = {"crypto": "2026-10-16T13:00:00Z"}
+    fresh = classifier.assign(articles, top_n=5, since=since, now=NOW)["crypto"]
+    assert [a["url"][-1] for a in fresh] == ["1"]
+
+
+def test_combine_queries_packs_within_the_length_limit():
+    queries = {"a": "x" * 10, "b": "y" * 10, "c": "z" * 10, "d": "w" * 40}
+
+    groups = combine_queries(queries, max_chars=30)
+
+    assert groups == [["a", "b"], ["c"], ["d"]]
+    for group in groups[:2]:
+        combined = " OR ".join(f"({queries[t]})" for t in group)
+        assert len(combined) <= 30
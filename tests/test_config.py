@@ -0,0 +1,85 @@
+import json
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from src.news_mailer.config import (
+    Settings,
+    get_settings,
+    load_env,
+    load_region_profiles,
+)
+
+
+def test_load_env_override_lets_the_env_file_win(monkeypatch, tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("TOKEN_FILE=from-dotenv.json\n", encoding="utf-8")
+    monkeypatch.setenv("ENV_FILE", str(env_file))
+    monkeypatch.setenv("TOKEN_FILE", "stale.json")
+    load_env.cache_clear()
+    try:
+        load_env()
+        assert os.environ["TOKEN_FILE"] == "stale.json"
+        load_env(override=True)
+        assert os.environ["TOKEN_FILE"] == "from-dotenv.json"
+    finally:
+        load_env.cache_clear()
+
+
+def test_settings_ignore_dotenv_in_cwd_when_env_file_points_elsewhere(
+    monkeypatch, tmp_path
+):
+    (tmp_path / ".env").write_text(
+        "BREVO_BATCH_SIZE=7\nNEWSAPI_DAILY_QUOTA=1\n", encoding="utf-8"
+    )
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ENV_FILE", os.devnull)
+
+    settings = get_settings()
+
+    assert (
+        settings.brevo_batch_size == Settings.model_fields["brevo_batch_size"].default
+    )
+    assert (
+        settings.newsapi_daily_quota
+        == Settings.model_fields["newsapi_daily_quota"].default
+    )
+
+
+def test_settings_read_the_env_file(monkeypatch, tmp_path):
+    env_file = tmp_path / "custom.env"
+    env_file.write_text("BREVO_BATCH_SIZE=7\n", encoding="utf-8")
+    monkeypatch.setenv("ENV_FILE", str(env_file))
+
+    assert get_settings().brevo_batch_size == 7
+
+
+def test_region_profiles_must_have_distinct_regions(monkeypatch):
+    profiles = [
+        {"region": "US", "topic_queries": {"stocks": "stock market"}},
+        {"region": "EU", "topic_queries": {"energy": "oil OR gas"}},
+        {"region": "US", "topic_queries": {"crypto": "bitcoin"}},
+    ]
+    monkeypatch.setenv("REGION_PROFILES", json.dumps(profiles))
+
+    with pytest.raises(RuntimeError, match=r"\['US'\]"):
+        load_region_profiles()
+
+    monkeypatch.setenv("REGION_PROFILES", json.dumps(profiles[:2]))
+    get_settings.cache_clear()
+    assert [p.region for p in load_region_profiles()] == ["US", "EU"]
+
+
+def test_unknown_fetch_mode_is_rejected(monkeypatch):
+    monkeypatch.setenv("NEWS_FETCH_MODE", "combine")
+
+    with pytest.raises(ValidationError, match="news_fetch_mode"):
+        get_settings()
+
+
+def test_unknown_compose_mode_is_rejected(monkeypatch):
+    monkeypatch.setenv("COMPOSE_MODE", "mapreduce")
+
+    with pytest.raises(ValidationError, match="compose_mode"):
+        get_settings()
@@ -0,0 +1,62 @@
+import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from src.news_mailer.config import RegionProfile
+from src.news_mailer.daemon import LastRunStore, Scheduler
+from src.news_mailer.utils.cron import CronSchedule
+
+UTC = datetime.timezone.utc
+
+
+def _at(*args):
+    return datetime.datetime(*args, tzinfo=UTC)
+
+
+@pytest.mark.parametrize(
+    "expression, moment, expected",
+    [
+        ("*/15 * * * *", _at(2026, 10, 17, 9, 7), _at(2026, 10, 17, 9, 15)),
+        ("0 1 * * *", _at(2026, 10, 17, 1, 0), _at(2026, 10, 18, 1, 0)),
+        ("30 6 * * 1-5", _at(2026, 10, 17, 12, 0), _at(2026, 10, 19, 6, 30)),
+        ("0 0 29 2 *", _at(2026, 3, 1), _at(2028, 2, 29)),
+        ("@monthly", _at(2026, 12, 31, 23, 59), _at(2027, 1, 1)),
+        # Day-of-month and day-of-week restricted: either one fires.
+        ("0 0 1 * 0", _at(2026, 10, 17), _at(2026, 10, 18)),
+        # A field starting with "*" is unrestricted: both must match.
+        ("0 0 */2 * 1", _at(2026, 10, 20), _at(2026, 11, 9)),
+        ("0 0 1 * */2", _at(2026, 10, 17), _at(2026, 11, 1)),
+    ],
+)
+def test_next_after(expression, moment, expected):
+    assert CronSchedule(expression).next_after(moment) == expected
+
+
+@pytest.mark.parametrize("expression", ["* * *", "60 * * * *", "*/0 * * * *"])
+def test_invalid_expressions_are_rejected(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_schedule_that_never_fires_is_rejected_at_config_load():
+    with pytest.raises(ValidationError, match="never fires"):
+        RegionProfile(region="US", topic_queries={}, schedule="0 0 30 2 *")
+
+
+def test_scheduler_skips_unusable_schedules(tmp_path):
+    profiles = [
+        RegionProfile.model_construct(
+            region="Broken", topic_queries={}, schedule="0 0 30 2 *"
+        ),
+        RegionProfile(region="US", topic_queries={}, schedule="0 1 * * *"),
+    ]
+    scheduler = Scheduler(
+        profiles,
+        LastRunStore(tmp_path / "last_runs.json"),
+        catch_up=datetime.timedelta(hours=6),
+        shutdown_timeout=1,
+        runner=lambda profiles: None,
+        clock=lambda: _at(2026, 10, 17),
+    )
+    assert [job.region for job in scheduler.jobs] == ["US"]
@@ -0,0 +1,78 @@
+from src.news_mailer.service.news.article import Article
+from src.news_mailer.service.news.dedupe import (
+    NUM_PERM,
+    cluster_near_duplicates,
+    minhash,
+)
+
+STORY = (
+    "Central bank raises interest rates by a quarter point to curb inflation, "
+    "citing strong labour market data and rising energy prices across the region"
+)
+
+
+def _article(n, title, description="", source="Wire"):
+    return Article.from_json(
+        {
+            "url": f"https://example.com/{n}",
+            "title": title,
+            "description": description,
+            "source": {"name": source},
+        }
+    )
+
+
+def test_minhash_is_stable_and_sized():
+    assert minhash(STORY) == minhash(STORY.upper())
+    assert len(minhash(STORY)) == NUM_PERM
+    assert minhash("") == minhash("!!!")
+
+
+def test_near_duplicates_collapse_into_first():
+    articles = [
+        _article(0, "Rates rise", STORY, source="Wire"),
+        _article(1, "Rates rise", STORY + " on Tuesday", source="Daily"),
+        _article(2, "Local team wins cup final", "Fans celebrate in the streets"),
+    ]
+    kept = cluster_near_duplicates(articles)
+
+    assert [art["url"] for art in kept] == [
+        "https://example.com/0",
+        "https://example.com/2",
+    ]
+    assert kept[0]["alternates"] == [
+        {"url": "https://example.com/1", "title": "Rates rise", "source": "Daily"}
+    ]
+    assert kept[1]["alternates"] == []
+
+
+def test_distinct_articles_are_kept():
+    articles = [
+        _article(n, f"Story number {n}", f"Completely separate report {n} " * 3)
+        for n in range(50)
+    ]
+    assert cluster_near_duplicates(articles) == articles
+
+
+def test_threshold_controls_matching():
+    first = _article(0, "Rates rise", STORY)
+    second = _article(1, "Rates rise", STORY.rsplit(" ", 8)[0] + " says minister")
+
+    assert len(cluster_near_duplicates([first, second], threshold=0.5)) == 1
+    assert len(cluster_near_duplicates([first, second], threshold=1.0)) == 2
+
+
+def test_articles_without_text_are_not_clustered():
+    articles = [
+        _article(0, "Rates rise", STORY),
+        _article(1, "", ""),
+        _article(2, "", "!!!"),
+    ]
+    kept = cluster_near_duplicates(articles)
+
+    assert [art["url"] for art in kept] == [
+        "https://example.com/0",
+        "https://example.com/1",
+        "https://example.com/2",
+    ]
+    assert all(art["alternates"] == [] for art in kept)
@@ -0,0 +1,45 @@
+import os
+import time
+
+from src.news_mailer.utils.disk_cache import DiskCache
+
+
+def test_make_key_ignores_order():
+    assert DiskCache.make_key({"q": "a", "page": 1}) == DiskCache.make_key(
+        {"page": 1, "q": "a"}
+    )
+    assert DiskCache.make_key({"q": "a"}) != DiskCache.make_key({"q": "b"})
+
+
+def test_round_trip_and_stats(tmp_path):
+    cache = DiskCache(tmp_path, ttl_seconds=60, max_bytes=1 << 20)
+
+    assert cache.get("k") is None
+    cache.set("k", {"articles": [1, 2]})
+
+    assert cache.get("k") == {"articles": [1, 2]}
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.stores) == (1, 1, 1)
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = DiskCache(tmp_path, ttl_seconds=0.01, max_bytes=1 << 20)
+    cache.set("k", "value")
+    time.sleep(0.05)
+
+    assert cache.get("k") is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskCache(tmp_path, ttl_seconds=60, max_bytes=250)
+    for n, key in enumerate(["old", "used", "new"]):
+        cache.set(key, "x" * 60)
+        # mtimes are the LRU clock; space them out explicitly.
+        stamp = time.time() - 100 + n
+        os.utime(tmp_path / f"{key}.json", (stamp, stamp))
+    cache.get("used")
+    cache.set("newest", "x" * 60)
+
+    assert cache.get("old") is None
+    assert cache.get("used") == "x" * 60
+    assert cache.stats.evictions >= 1
@@ -0,0 +1,174 @@
+import re
+import threading
+import time
+
+from src.news_mailer.service.mail.email_composer import (
+    EmailComposer,
+    build_prompt_template,
+    get_generation_cache,
+)
+from src.news_mailer.service.mail.prompt_packer import estimate_tokens
+
+
+class _Generator:
+    def __init__(self, winner):
+        self.winner = winner
+        self.calls = 0
+
+    def generate(self, prompt, generation_config=None):
+        self.calls += 1
+        return f" body from {self.winner} ", None, self.winner
+
+
+def _composer(winner, generator=None, topics=("stocks", "energy", "crypto")):
+    # Bypass __init__, which configures the Gemini SDK.
+    composer = EmailComposer.__new__(EmailComposer)
+    composer.model_name = "primary"
+    composer.generation_config = {}
+    composer.generator = generator or _Generator(winner)
+    composer.region = "Global"
+    composer.topics = list(topics)
+    composer.cited_articles = []
+    composer.prompt_template = build_prompt_template({t: t for t in topics})
+    return composer
+
+
+def test_generation_cache_reuses_primary_output(monkeypatch):
+    monkeypatch.setenv("GENERATION_CACHE_ENABLED", "true")
+    monkeypatch.setenv("GEMINI_REQUESTS_PER_MINUTE", "0")
+    composer = _composer("primary")
+
+    assert composer._generate("prompt") == ("body from primary", None)
+    assert composer._generate("prompt") == ("body from primary", None)
+    assert composer.generator.calls == 1
+
+
+def test_fallback_output_is_not_cached_as_primary(monkeypatch):
+    monkeypatch.setenv("GENERATION_CACHE_ENABLED", "true")
+    monkeypatch.setenv("GEMINI_REQUESTS_PER_MINUTE", "0")
+    composer = _composer("fallback")
+
+    composer._generate("prompt")
+    composer._generate("prompt")
+
+    assert composer.generator.calls == 2
+    cache = get_generation_cache()
+    assert cache.get(composer._cache_key("primary", "prompt")) is None
+    assert cache.get(composer._cache_key("fallback", "prompt")) == "body from fallback"
+
+
+def test_generation_cache_is_off_by_default(monkeypatch):
+    monkeypatch.setenv("GEMINI_REQUESTS_PER_MINUTE", "0")
+    composer = _composer("primary")
+
+    composer._generate("prompt")
+    composer._generate("prompt")
+
+    assert get_generation_cache() is None
+    assert composer.generator.calls == 2
+
+
+def test_generation_cache_key_covers_prompt_and_config(monkeypatch):
+    monkeypatch.setenv("GENERATION_CACHE_ENABLED", "true")
+    monkeypatch.setenv("GEMINI_REQUESTS_PER_MINUTE", "0")
+    composer = _composer("primary")
+
+    composer._generate("prompt")
+    composer._generate("another prompt")
+    composer.generation_config = {"temperature": 0.2}
+    composer._generate("prompt")
+    composer._generate("prompt")
+
+    assert composer.generator.calls == 3
+
+
+class _SectionGenerator:
+    """Answers frame and section prompts like Gemini would, 0.2s per call."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = self.peak = 0
+
+    def generate(self, prompt, generation_config=None):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.2)
+        with self.lock:
+            self.in_flight -= 1
+        topic = re.search(r'sections for the topic "([^"]+)"', prompt)
+        if topic is None:
+            text = "<p>Intro</p>\n<!-- SECTIONS -->\n<p>Bye</p>"
+        else:
+            start = re.search(r"starting at (\d+)", prompt).group(1)
+            text = f"<h3>{start}. {topic.group(1)}</h3>"
+        return text, None, "primary"
+
+
+def _articles(topics):
+    return [
+        {
+            "url": f"https://example.com/{topic}/{i}",
+            "title": f"{topic} story {i}",
+            "description": "Details",
+            "publishedAt": f"2026-10-17T0{i}:00:00Z",
+            "topic": topic,
+            "source": {"name": "Wire"},
+        }
+        for topic in topics
+        for i in range(2)
+    ]
+
+
+def test_map_reduce_writes_topic_sections_in_parallel(monkeypatch):
+    monkeypatch.setenv("COMPOSE_MODE", "map_reduce")
+    monkeypatch.setenv("GEMINI_REQUESTS_PER_MINUTE", "0")
+    generator = _SectionGenerator()
+    composer = _composer("primary", generator)
+
+    started = time.perf_counter()
+    _, body = composer.compose_email(_articles(["crypto", "stocks", "energy"]))
+    elapsed = time.perf_counter() - started
+
+    # Frame plus three sections, serially, would take 0.8s.
+    assert elapsed < 0.6
+    assert generator.peak > 1
+    stitched = body.split("\n")[:5]
+    assert stitched == [
+        "<p>Intro</p>",
+        "<h3>1. Stocks</h3>",
+        "<h3>3. Energy</h3>",
+        "<h3>5. Crypto</h3>",
+        "<p>Bye</p>",
+    ]
+    assert len(composer.cited_articles) == 6
+    assert all(art["url"] in body for art in composer.cited_articles)
+
+
+class _RecordingGenerator(_SectionGenerator):
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    def generate(self, prompt, generation_config=None):
+        with self.lock:
+            self.prompts.append(prompt)
+        return super().generate(prompt, generation_config)
+
+
+def test_map_reduce_budget_caps_every_prompt_sent(monkeypatch):
+    monkeypatch.setenv("COMPOSE_MODE", "map_reduce")
+    monkeypatch.setenv("GEMINI_REQUESTS_PER_MINUTE", "0")
+    monkeypatch.setenv("PROMPT_TOKEN_BUDGET", "3000")
+    generator = _RecordingGenerator()
+    composer = _composer("primary", generator)
+    articles = _articles(["crypto", "stocks", "energy"]) * 5
+    for n, art in enumerate(articles):
+        articles[n] = dict(art, url=f"{art['url']}/{n}", description="word " * 80)
+
+    composer.compose_email(articles)
+
+    sent = sum(estimate_tokens(prompt) for prompt in generator.prompts)
+    assert len(generator.prompts) == 4
+    assert 0 < len(composer.cited_articles) < len(articles)
+    assert sent <= 3000
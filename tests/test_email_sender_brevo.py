@@ -0,0 +1,54 @@
+import threading
+from types import SimpleNamespace
+
+import urllib3
+
+from src.news_mailer.service.mail import email_sender_brevo
+from src.news_mailer.utils.rate_limit import get_rate_limiter
+
+
+class _FakeApi:
+    def send_transac_email(self, email):
+        batch = [version["to"][0]["email"] for version in email.message_versions]
+        if "down@example.com" in batch:
+            raise urllib3.exceptions.ReadTimeoutError(None, "/v3/smtp", "timed out")
+        return SimpleNamespace(message_ids=[f"<{addr}>" for addr in batch])
+
+
+def test_transport_error_fails_only_its_batch(monkeypatch):
+    monkeypatch.setenv("BREVO_EMAIL_PROVIDER", "sender@example.com")
+    monkeypatch.setenv("BREVO_DAILY_QUOTA", "10")
+    monkeypatch.setattr(email_sender_brevo, "get_brevo_api", lambda: _FakeApi())
+
+    statuses = email_sender_brevo.send_email_brevo_bulk(
+        "Subject",
+        "<p>Hi</p>",
+        ["a@example.com", "b@example.com", "down@example.com", "c@example.com"],
+        batch_size=2,
+    )
+
+    assert statuses["a@example.com"] == "sent: <a@example.com>"
+    assert statuses["b@example.com"] == "sent: <b@example.com>"
+    assert statuses["down@example.com"].startswith("failed: ReadTimeoutError")
+    assert statuses["c@example.com"].startswith("failed: ")
+    assert get_rate_limiter("brevo").store.used("brevo") == 2
+
+
+def test_concurrent_first_calls_share_one_client(monkeypatch):
+    monkeypatch.setenv("BREVO_API_KEY", "test")
+    email_sender_brevo.get_brevo_api.cache_clear()
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def worker():
+        barrier.wait()
+        clients.append(email_sender_brevo.get_brevo_api())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    email_sender_brevo.get_brevo_api.cache_clear()
+
+    assert len({id(client) for client in clients}) == 1
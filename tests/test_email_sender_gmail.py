@@ -0,0 +1,145 @@
+import base64
+import datetime
+import threading
+import time
+from email import message_from_bytes
+
+import httplib2
+
+from src.news_mailer.service.mail import email_sender_gmail
+from src.news_mailer.service.mail.email_sender_gmail import (
+    GMAIL_BATCH_SIZE,
+    GmailSender,
+    get_gmail_sender,
+)
+
+
+class _Creds:
+    valid = True
+    refresh_token = "refresh"
+
+    def __init__(self, expires_in):
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        self.expiry = now + datetime.timedelta(seconds=expires_in)
+        self.refreshed = 0
+
+    def refresh(self, request):
+        self.refreshed += 1
+        self.expiry += datetime.timedelta(hours=1)
+
+
+class _Request:
+    def __init__(self, body):
+        self.body = body
+
+
+class _Batch:
+    def __init__(self, service, callback):
+        self.service, self.callback = service, callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.batch_sizes.append(len(self.requests))
+        if len(self.service.batch_sizes) in self.service.broken_batches:
+            raise httplib2.ServerNotFoundError("connection dropped")
+        for request_id, request in self.requests:
+            to = message_from_bytes(base64.urlsafe_b64decode(request.body["raw"]))["To"]
+            if to in self.service.failing:
+                self.callback(request_id, None, RuntimeError("rejected"))
+            else:
+                self.callback(request_id, {"id": f"id-{to}"}, None)
+
+
+class _Service:
+    def __init__(self, failing=(), broken_batches=()):
+        self.failing = set(failing)
+        self.broken_batches = set(broken_batches)
+        self.batch_sizes = []
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def send(self, userId, body):
+        return _Request(body)
+
+    def new_batch_http_request(self, callback):
+        return _Batch(self, callback)
+
+
+def _sender(service, creds):
+    loads = []
+    sender = GmailSender(credentials_loader=lambda: loads.append(1) or creds)
+    sender._creds, sender._service = creds, service
+    return sender, loads
+
+
+def test_send_individually_batches_one_message_per_recipient():
+    service = _Service(failing={"r7@example.com"})
+    sender, _ = _sender(service, _Creds(expires_in=3600))
+    recipients = [f"r{i}@example.com" for i in range(120)]
+
+    statuses = sender.send_individually(
+        "Subject", "<p>Hi</p>", recipients + ["r0@example.com", " "]
+    )
+
+    assert service.batch_sizes == [GMAIL_BATCH_SIZE, GMAIL_BATCH_SIZE, 20]
+    assert set(statuses) == set(recipients)
+    assert statuses["r7@example.com"] == "failed: rejected"
+    assert statuses["r8@example.com"] == "sent: id-r8@example.com"
+
+
+def test_credentials_are_reused_until_close_to_expiry():
+    creds = _Creds(expires_in=3600)
+    sender, loads = _sender(_Service(), creds)
+
+    sender.service
+    sender.service
+    assert (creds.refreshed, loads) == (0, [])
+
+    creds.expiry = creds.expiry - datetime.timedelta(seconds=3500)
+    sender.service
+    assert (creds.refreshed, loads) == (1, [])
+
+
+def test_a_failed_batch_does_not_lose_the_others():
+    service = _Service(broken_batches={2})
+    sender, _ = _sender(service, _Creds(expires_in=3600))
+    recipients = [f"r{i}@example.com" for i in range(120)]
+
+    statuses = sender.send_individually("Subject", "<p>Hi</p>", recipients)
+
+    assert service.batch_sizes == [GMAIL_BATCH_SIZE, GMAIL_BATCH_SIZE, 20]
+    assert set(statuses) == set(recipients)
+    failed = [r for r in recipients if statuses[r].startswith("failed")]
+    assert failed == recipients[GMAIL_BATCH_SIZE : 2 * GMAIL_BATCH_SIZE]
+    assert statuses["r119@example.com"] == "sent: id-r119@example.com"
+
+
+def test_gmail_sender_is_built_once_across_threads(monkeypatch):
+    def slow_sender():
+        time.sleep(0.05)
+        return GmailSender()
+
+    monkeypatch.setattr(email_sender_gmail, "GmailSender", slow_sender)
+    get_gmail_sender.cache_clear()
+    barrier = threading.Barrier(8)
+    senders = []
+
+    def worker():
+        barrier.wait()
+        senders.append(get_gmail_sender())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(sender) for sender in senders}) == 1
+    get_gmail_sender.cache_clear()
@@ -0,0 +1,112 @@
+from src.news_mailer import main
+from src.news_mailer.service.mail.fragments import (
+    SECTIONS_MARKER,
+    DigestFragments,
+    renumber_citations,
+    renumber_sections,
+)
+
+
+def _cite(url, n):
+    return f"[<a href='{url}'>{n}</a>]"
+
+
+def _fragments():
+    articles = {
+        topic: [
+            {"url": f"https://example.com/{topic}/{i}", "title": f"{topic} {i}"}
+            for i in range(2)
+        ]
+        for topic in ("crypto", "tech", "commodities")
+    }
+    sections, n = {}, 1
+    for number, (topic, arts) in enumerate(articles.items(), start=1):
+        cites = " ".join(_cite(a["url"], n + i) for i, a in enumerate(arts))
+        sections[topic] = f"<h3>{number}. {topic}</h3><p>News {cites}</p>"
+        n += len(arts)
+    return DigestFragments(
+        subject="Daily digest",
+        frame=f"<h2>Intro</h2>{SECTIONS_MARKER}<p>Outro</p>",
+        footer="<p>footer</p>",
+        sections=sections,
+        articles=articles,
+    )
+
+
+def test_renumber_citations_maps_urls_and_drops_unknown_ones():
+    fragment = (
+        "A [<a href='https://a.example/x?p=1&amp;q=2'>4</a>] "
+        'B [ <a href="https://b.example">5</a> ] '
+        "C: <a href='https://c.example'>6</a>."
+    )
+    numbers = {"https://a.example/x?p=1&q=2": 1, "https://c.example": 2}
+
+    assert renumber_citations(fragment, numbers) == (
+        "A [<a href='https://a.example/x?p=1&amp;q=2'>1</a>] "
+        "B  C:[<a href='https://c.example'>2</a>]."
+    )
+
+
+def test_renumber_sections_counts_from_one():
+    body = "<h3>2. Tech</h3><p>2. not a heading</p><h3 style='x'> 5. Crypto</h3>"
+
+    assert renumber_sections(body) == (
+        "<h3>1. Tech</h3><p>2. not a heading</p><h3 style='x'> 2. Crypto</h3>"
+    )
+
+
+def test_render_all_topics_keeps_the_generated_numbering():
+    fragments = _fragments()
+
+    body, cited = fragments.render()
+
+    assert [a["url"] for a in cited] == [
+        f"https://example.com/{t}/{i}"
+        for t in ("crypto", "tech", "commodities")
+        for i in range(2)
+    ]
+    for topic in fragments.topics:
+        assert fragments.sections[topic] in body
+    assert SECTIONS_MARKER not in body
+    assert body.index("Intro") < body.index("crypto") < body.index("Outro")
+    assert body.endswith("<p>footer</p>")
+
+
+def test_render_subset_renumbers_citations_sections_and_sources():
+    fragments = _fragments()
+
+    body, cited = fragments.render(["commodities", "tech"])
+
+    assert [a["url"] for a in cited] == [
+        "https://example.com/tech/0",
+        "https://example.com/tech/1",
+        "https://example.com/commodities/0",
+        "https://example.com/commodities/1",
+    ]
+    assert "crypto" not in body
+    assert "<h3>1. tech</h3>" in body
+    assert "<h3>2. commodities</h3>" in body
+    assert _cite("https://example.com/tech/0", 1) in body
+    assert _cite("https://example.com/commodities/1", 4) in body
+    assert '<li>[3] <a href="https://example.com/commodities/0">' in body
+    assert "[5]" not in body
+
+
+def test_group_recipients_by_subscribed_topics():
+    groups = main._group_recipients(
+        ["all@x", "tech@x", "mixed@x", "bogus@x", "empty@x", "both@x"],
+        {
+            "tech@x": ["tech"],
+            "mixed@x": ["tech", "unknown"],
+            "bogus@x": ["unknown"],
+            "empty@x": ["sports"],
+            "both@x": ["tech", "crypto"],
+        },
+        known_topics=["crypto", "tech", "sports"],
+        available_topics=["crypto", "tech"],
+    )
+
+    assert groups == {
+        ("crypto", "tech"): ["all@x", "bogus@x", "both@x"],
+        ("tech",): ["tech@x", "mixed@x"],
+    }
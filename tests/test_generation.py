@@ -0,0 +1,127 @@
+import threading
+
+import pytest
+
+from src.news_mailer.service.mail.generation import HedgedGenerator, LatencyHistograms
+from src.news_mailer.utils.rate_limit import (
+    ProviderBudget,
+    ProviderLimiter,
+    QuotaStore,
+)
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class _Stream:
+    def __init__(self, first, rest):
+        self.first, self.rest = first, rest
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        if self.closed.wait(self.first):
+            raise ConnectionError("stream closed")
+        yield _Chunk("a")
+        if self.closed.wait(self.rest):
+            raise ConnectionError("stream closed")
+        yield _Chunk("b")
+
+    def cancel(self):
+        self.closed.set()
+
+
+class _Response:
+    usage_metadata = None
+
+    def __init__(self, stream):
+        self._iterator = stream
+
+    def __iter__(self):
+        return iter(self._iterator)
+
+
+class _RateLimited(Exception):
+    code = 429
+
+
+class _Model:
+    def __init__(self, first=0.0, rest=0.0, error=None):
+        self.first, self.rest, self.error = first, rest, error
+        self.calls = 0
+
+    def generate_content(
+        self, prompt, generation_config=None, stream=False, request_options=None
+    ):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return _Response(_Stream(self.first, self.rest))
+
+
+def _generator(tmp_path, primary, fallback, limiter=None, hedge_delay=0.05):
+    return HedgedGenerator(
+        {"primary": primary, "fallback": fallback},
+        primary="primary",
+        fallback="fallback",
+        histograms=LatencyHistograms(tmp_path / "latency.json"),
+        ttft_deadline=5,
+        overall_deadline=10,
+        hedge_percentile=0.95,
+        hedge_delay=hedge_delay,
+        limiter=limiter,
+    )
+
+
+def _limiter(tmp_path, **budget):
+    return ProviderLimiter(
+        "gemini", ProviderBudget(**budget), QuotaStore(tmp_path / "quota.json")
+    )
+
+
+def test_slow_primary_is_hedged_and_charged(tmp_path):
+    limiter = _limiter(tmp_path, max_concurrency=2, daily_quota=10)
+    primary, fallback = _Model(first=0.0, rest=5.0), _Model()
+    with limiter.slot():
+        text, _, _ = _generator(tmp_path, primary, fallback, limiter).generate("x")
+    assert text == "ab"
+    assert fallback.calls == 1
+    assert limiter.store.used("gemini") == 2
+
+
+def test_hedge_is_skipped_without_a_free_slot(tmp_path):
+    limiter = _limiter(tmp_path, max_concurrency=1)
+    primary, fallback = _Model(first=0.0, rest=0.3), _Model()
+    with limiter.slot():
+        text, _, _ = _generator(tmp_path, primary, fallback, limiter).generate("x")
+    assert text == "ab"
+    assert fallback.calls == 0
+
+
+def test_rate_limited_primary_is_not_hedged(tmp_path):
+    primary, fallback = _Model(error=_RateLimited("quota")), _Model()
+    with pytest.raises(_RateLimited):
+        _generator(tmp_path, primary, fallback, hedge_delay=5).generate("x")
+    assert fallback.calls == 0
+
+
+def test_other_primary_failures_are_hedged(tmp_path):
+    primary, fallback = _Model(error=ValueError("boom")), _Model()
+    text, _, _ = _generator(tmp_path, primary, fallback, hedge_delay=5).generate("x")
+    assert text == "ab"
+
+
+def test_ttft_timeouts_are_counted_not_sampled(tmp_path):
+    primary, fallback = _Model(first=5.0), _Model()
+    generator = _generator(tmp_path, primary, fallback, hedge_delay=5)
+    generator.ttft_deadline = 0.05
+
+    text, _, _ = generator.generate("x")
+
+    histograms = LatencyHistograms(tmp_path / "latency.json")
+    assert text == "ab"
+    assert histograms.timeouts("primary") == 1
+    assert histograms.percentile("primary", 0.5) is None
+    assert sum(histograms._counts.get("primary", [])) == 0
+    assert sum(histograms._counts["fallback"]) == 1
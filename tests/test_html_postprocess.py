@@ -0,0 +1,46 @@
+from src.news_mailer.service.mail.html_postprocess import (
+    compact_style,
+    postprocess_html,
+)
+
+
+def test_whitespace_and_styles_are_compacted():
+    result = postprocess_html(
+        '<p   style="color: #FFFFFF ; margin:0px;color:#ffffff">\n  Hello\n\n'
+        '  <span style="font-weight: bold">world</span>  </p>'
+    )
+    assert result.html == '<p style="margin:0;color:#fff">Hello <b>world</b></p>'
+    assert sum(result.saved.values()) == result.original_bytes - result.final_bytes
+
+
+def test_unsafe_markup_is_stripped():
+    result = postprocess_html(
+        '<p onclick="steal()">Hi<script>alert(1)</script><!-- note -->'
+        '<a href="javascript:alert(1)">x</a></p>'
+    )
+    assert result.html == "<p>Hi<a>x</a></p>"
+
+
+def test_compact_style_keeps_urls_with_semicolons():
+    value = "background:url(data:image/png;base64,xx); color:#FFFFFF"
+    assert compact_style(value) == value
+
+
+def test_plain_text_lists_links_and_citations():
+    result = postprocess_html(
+        "<h2>News</h2><ol><li>One [<a href='https://a.example/1'>1</a>]</li>"
+        "<li><a href='https://b.example'>Two</a></li></ol>"
+    )
+    assert result.text == "News\n\n1. One [1]\n2. Two (https://b.example)\n"
+
+
+def test_preformatted_whitespace_survives_in_plain_text():
+    body = (
+        "<p>Run   this:</p><pre>def f():\n    return  1\n\n  done</pre>"
+        "<p>then <code>a  =  b</code>  please</p>"
+    )
+    result = postprocess_html(body)
+    assert "<pre>def f():\n    return  1\n\n  done</pre>" in result.html
+    assert result.text == (
+        "Run this:\n\ndef f():\n    return  1\n\n  done\n\nthen a  =  b please\n"
+    )
@@ -0,0 +1,111 @@
+import datetime
+import sqlite3
+
+import pytest
+
+from benchmarks.startup import DEFAULT_FORBIDDEN, DEFAULT_MODULE, import_profile
+from src.news_mailer import main
+from src.news_mailer.service.news import Article
+
+
+class _FakeComposer:
+    def __init__(self, region=None, topic_queries=None):
+        self.cited_articles = []
+
+    def compose_email(self, articles):
+        self.cited_articles = list(articles)
+        return "Subject", "<p>Digest</p>"
+
+
+def _articles():
+    return [
+        Article.from_json(
+            {
+                "url": "https://example.com/a",
+                "title": "Stocks rally",
+                "publishedAt": "2026-10-17T00:00:00Z",
+                "topic": "stocks",
+            }
+        )
+    ]
+
+
+def test_partial_plain_delivery_still_commits_state(monkeypatch):
+    monkeypatch.setenv("INCREMENTAL_FETCH", "true")
+    monkeypatch.setattr(main, "EmailComposer", _FakeComposer)
+    monkeypatch.setattr(
+        main,
+        "_send",
+        lambda subject, body, recipients: {
+            "a@example.com": "sent: <1>",
+            "b@example.com": "failed: 500 Internal Server Error",
+        },
+    )
+    state = main._open_state("Global")
+
+    with pytest.raises(RuntimeError, match="b@example.com"):
+        main._deliver(_articles(), state)
+
+    assert main._open_state("Global")[1].filter_unseen(_articles()) == []
+
+
+def test_failed_plain_delivery_leaves_state_untouched(monkeypatch):
+    monkeypatch.setenv("INCREMENTAL_FETCH", "true")
+    monkeypatch.setattr(main, "EmailComposer", _FakeComposer)
+    monkeypatch.setattr(
+        main,
+        "_send",
+        lambda subject, body, recipients: {"a@example.com": "failed: timeout"},
+    )
+    state = main._open_state("Global")
+
+    with pytest.raises(RuntimeError):
+        main._deliver(_articles(), state)
+
+    assert len(main._open_state("Global")[1].filter_unseen(_articles())) == 1
+
+
+def test_from_store_wraps_sqlite_errors(monkeypatch):
+    class BrokenStore:
+        def for_topics(self, *args, **kwargs):
+            raise sqlite3.DatabaseError("file is not a database")
+
+    monkeypatch.setattr(main, "get_article_store", lambda: BrokenStore())
+
+    with pytest.raises(RuntimeError, match="file is not a database"):
+        main._from_store({"stocks": "stock market"}, per_topic=3)
+
+
+def test_from_store_reads_recent_stored_articles(monkeypatch):
+    monkeypatch.setenv("ARTICLE_STORE_ENABLED", "true")
+    now = datetime.datetime.now(datetime.timezone.utc)
+    fresh, stale = (
+        Article.from_json(
+            {
+                "url": f"https://example.com/{name}",
+                "title": f"{name} stock market story",
+                "publishedAt": (now - age).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "topic": "stocks",
+            }
+        )
+        for name, age in (
+            ("fresh", datetime.timedelta(hours=1)),
+            ("stale", datetime.timedelta(days=3)),
+        )
+    )
+    main.get_article_store().upsert([fresh, stale])
+
+    articles = main._from_store({"stocks": "stock market"}, per_topic=3)
+
+    assert [art["url"] for art in articles] == ["https://example.com/fresh"]
+
+
+def test_from_store_requires_the_store(monkeypatch):
+    with pytest.raises(RuntimeError, match="ARTICLE_STORE_ENABLED"):
+        main._from_store({"stocks": "stock market"}, per_topic=3)
+
+
+def test_importing_main_leaves_the_sdks_unloaded():
+    _, loaded = import_profile(DEFAULT_MODULE, DEFAULT_FORBIDDEN)
+
+    assert loaded == []
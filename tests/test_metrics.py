@@ -0,0 +1,61 @@
+import json
+import threading
+
+from src.news_mailer.utils.metrics import Metrics
+
+
+def test_spans_and_counters_aggregate_across_labels():
+    metrics = Metrics()
+    with metrics.span("fetch_topic", topic="stocks"):
+        pass
+    metrics.observe("fetch_topic", 0.5, topic="energy")
+    metrics.incr("articles_fetched", 3, topic="stocks")
+    metrics.incr("articles_fetched", 2, topic="energy")
+
+    assert len(metrics.samples()["fetch_topic"]) == 2
+    assert metrics.counter("articles_fetched") == 5
+    assert metrics.counter("missing") == 0
+
+
+def test_counters_are_thread_safe():
+    metrics = Metrics()
+
+    def worker():
+        for _ in range(1000):
+            metrics.incr("emails_sent")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics.counter("emails_sent") == 8000
+
+
+def test_reset_clears_the_run():
+    metrics = Metrics()
+    metrics.incr("emails_sent")
+    metrics.reset()
+
+    assert metrics.summary()["counters"] == []
+
+
+def test_export_writes_json_and_prometheus(tmp_path):
+    metrics = Metrics()
+    metrics.observe("send", 0.25, provider="brevo")
+    metrics.incr("emails_sent", 4, provider="brevo")
+    metrics.incr("articles_dropped", 1, reason='quote"d')
+    metrics.incr("emails_sent", 1, provider="gmail")
+
+    metrics.export(tmp_path, "daily")
+
+    summary = json.loads((tmp_path / "daily.json").read_text(encoding="utf-8"))
+    assert summary["spans"][0]["stage"] == "send"
+    assert summary["spans"][0]["total_seconds"] == 0.25
+    prom = (tmp_path / "daily.prom").read_text(encoding="utf-8").splitlines()
+    assert 'news_mailer_stage_seconds_sum{provider="brevo",stage="send"} 0.25' in prom
+    assert 'news_mailer_articles_dropped_total{reason="quote\\"d"} 1' in prom
+    sent = [i for i, line in enumerate(prom) if line.startswith("news_mailer_emails")]
+    assert sent == [sent[0], sent[0] + 1]
+    assert prom.count("# TYPE news_mailer_emails_sent_total counter") == 1
@@ -0,0 +1,204 @@
+import sqlite3
+import time
+
+import pytest
+
+from benchmarks.fake_services import FakeNewsAPI, ServiceProfile
+from src.news_mailer.config import RegionProfile, get_settings
+from src.news_mailer.main import _fetch_regions
+from src.news_mailer.service.news import Article, get_article_store
+from src.news_mailer.service.news import news_fetcher
+from src.news_mailer.service.news.news_fetcher import fetch_latest_news, fetch_topics
+from src.news_mailer.utils.metrics import metrics
+from src.news_mailer.utils.rate_limit import get_rate_limiter
+
+
+def _stored(topic, count):
+    return [
+        Article.from_json(
+            {
+                "url": f"https://example.com/{topic}/{i}",
+                "title": f"{topic} {i}",
+                "publishedAt": f"2026-10-1{i}T00:00:00Z",
+                "topic": topic,
+            }
+        )
+        for i in range(count)
+    ]
+
+
+def _exhaust_newsapi(monkeypatch):
+    monkeypatch.setenv("NEWSAPI_DAILY_QUOTA", "1")
+    get_rate_limiter("newsapi").store.add("newsapi", 1)
+
+
+def test_deferred_topics_are_filled_from_the_store(monkeypatch):
+    monkeypatch.setenv("ARTICLE_STORE_ENABLED", "true")
+    _exhaust_newsapi(monkeypatch)
+    get_article_store().upsert(_stored("stocks", 3))
+
+    by_topic = fetch_topics({"stocks": "stock market"}, page_size_per_topic=2)
+
+    assert [a["url"] for a in by_topic["stocks"]] == [
+        "https://example.com/stocks/2",
+        "https://example.com/stocks/1",
+    ]
+    assert get_rate_limiter("newsapi").store.deferred("newsapi") == ["stock market"]
+
+
+def test_fetch_regions_fills_deferred_queries_from_profile_topics(monkeypatch):
+    monkeypatch.setenv("ARTICLE_STORE_ENABLED", "true")
+    _exhaust_newsapi(monkeypatch)
+    get_article_store().upsert(_stored("stocks", 2) + _stored("energy", 1))
+    profiles = [
+        RegionProfile(region="US", topic_queries={"stocks": "stock market"}),
+        RegionProfile(
+            region="EU",
+            topic_queries={"markets": "stock market", "energy": "oil OR gas"},
+        ),
+    ]
+
+    regional = _fetch_regions(profiles, {"US": None, "EU": None})
+
+    assert len(regional["US"]) == 2
+    assert {a["topic"] for a in regional["US"]} == {"stocks"}
+    assert len(regional["EU"]) == 3
+    assert {a["topic"] for a in regional["EU"]} == {"markets", "energy"}
+    assert set(get_rate_limiter("newsapi").store.deferred("newsapi")) == {
+        "stock market",
+        "oil OR gas",
+    }
+
+
+def test_deferred_topics_survive_store_errors(monkeypatch):
+    class BrokenStore:
+        def recent(self, *args, **kwargs):
+            raise sqlite3.OperationalError("database is locked")
+
+    _exhaust_newsapi(monkeypatch)
+    monkeypatch.setattr(news_fetcher, "get_article_store", lambda: BrokenStore())
+
+    by_topic = fetch_topics({"stocks": "stock market"}, page_size_per_topic=2)
+
+    assert by_topic == {"stocks": []}
+    assert get_rate_limiter("newsapi").store.deferred("newsapi") == ["stock market"]
+
+
+def _low_quota_mode(monkeypatch, max_pages):
+    """Return which fetch path fetch_topics picks with 2 requests left for 3 topics."""
+    monkeypatch.setenv("NEWSAPI_DAILY_QUOTA", "3")
+    monkeypatch.setenv("NEWS_COMBINED_MAX_PAGES", str(max_pages))
+    get_rate_limiter("newsapi").store.add("newsapi", 1)
+    monkeypatch.setattr(
+        news_fetcher, "fetch_combined", lambda *args, **kwargs: "combined"
+    )
+    monkeypatch.setattr(news_fetcher, "_fetch_topic", lambda *args: [])
+    topics = {"a": "alpha", "b": "beta", "c": "gamma"}
+    return "combined" if fetch_topics(topics) == "combined" else "per_topic"
+
+
+def test_low_quota_switches_to_combined_queries_that_fit(monkeypatch):
+    assert _low_quota_mode(monkeypatch, max_pages=1) == "combined"
+
+
+def test_low_quota_counts_every_combined_page(monkeypatch):
+    assert _low_quota_mode(monkeypatch, max_pages=3) == "per_topic"
+
+
+@pytest.fixture
+def fake_newsapi(monkeypatch):
+    with FakeNewsAPI(ServiceProfile(latency=0.3)) as fake:
+        monkeypatch.setenv("NEWS_API_BASE_URL", fake.url)
+        monkeypatch.setenv("NEWS_CACHE_ENABLED", "false")
+        yield fake
+
+
+TOPICS = {f"topic_{i}": f"query {i}" for i in range(4)}
+
+
+def test_topics_are_fetched_concurrently(fake_newsapi):
+    started = time.perf_counter()
+    concurrent = fetch_topics(TOPICS, page_size_per_topic=2)
+    elapsed = time.perf_counter() - started
+    sequential = fetch_topics(TOPICS, page_size_per_topic=2, concurrent=False)
+
+    # Four topics at 0.3s each take 1.2s one after another.
+    assert elapsed < 0.9
+    assert concurrent == sequential
+    assert fake_newsapi.requests == 8
+    for topic, articles in concurrent.items():
+        assert len(articles) == 2
+        assert {art["topic"] for art in articles} == {topic}
+
+
+def test_fetch_latest_news_merges_topics_newest_first(fake_newsapi):
+    articles = fetch_latest_news(page_size_per_topic=3, topic_queries=TOPICS)
+
+    urls = [art["url"] for art in articles]
+    assert len(urls) == len(set(urls))
+    published = [art["publishedAt"] for art in articles]
+    assert published == sorted(published, reverse=True)
+
+
+def test_responses_are_cached_across_runs_and_api_keys(fake_newsapi, monkeypatch):
+    monkeypatch.setenv("NEWS_CACHE_ENABLED", "true")
+    first = fetch_topics(TOPICS, page_size_per_topic=2)
+
+    # A new process (fresh settings and cache handle) with another API key.
+    monkeypatch.setenv("NEWS_API_KEY", "other")
+    get_settings.cache_clear()
+    news_fetcher.get_news_cache.cache_clear()
+    second = fetch_topics(TOPICS, page_size_per_topic=2)
+
+    assert second == first
+    assert fake_newsapi.requests == len(TOPICS)
+    assert news_fetcher.get_news_cache().stats.hits == len(TOPICS)
+
+
+def test_concurrent_first_fetch_builds_one_response_cache(fake_newsapi, monkeypatch):
+    monkeypatch.setenv("NEWS_CACHE_ENABLED", "true")
+
+    class SlowCache(news_fetcher.DiskCache):
+        def __init__(self, *args, **kwargs):
+            time.sleep(0.05)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(news_fetcher, "DiskCache", SlowCache)
+
+    fetch_topics(TOPICS, page_size_per_topic=2)
+
+    assert news_fetcher.get_news_cache.cache_info().misses == 1
+    assert news_fetcher.get_news_cache().stats.misses == len(TOPICS)
+
+
+def test_fetch_regions_counts_duplicates_once(monkeypatch):
+    topics = {"stocks": "stock market", "energy": "oil OR gas"}
+    profiles = [
+        RegionProfile(region=region, topic_queries=topics)
+        for region in ("US", "EU", "Asia")
+    ]
+    metrics.reset()
+
+    # Every query returns the same five URLs.
+    with FakeNewsAPI(overlap=1.0) as fake:
+        monkeypatch.setenv("NEWS_API_BASE_URL", fake.url)
+        monkeypatch.setenv("NEWS_CACHE_ENABLED", "false")
+        regional = _fetch_regions(profiles, {p.region: None for p in profiles})
+
+    assert all(len(arts) == 5 for arts in regional.values())
+    assert metrics.counter("articles_dropped") == 5
+
+
+def test_watermarks_limit_the_fetch_to_newer_articles(fake_newsapi):
+    unbounded = fetch_topics({"stocks": "stock market"}, page_size_per_topic=10)
+    mark = sorted(art["publishedAt"] for art in unbounded["stocks"])[4]
+
+    newer = fetch_topics(
+        {"stocks": "stock market"},
+        page_size_per_topic=10,
+        watermarks={"stocks": mark},
+    )
+
+    assert newer["stocks"]
+    assert all(art["publishedAt"] > mark for art in newer["stocks"])
+    assert len(newer["stocks"]) < len(unbounded["stocks"])
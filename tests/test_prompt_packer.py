@@ -0,0 +1,68 @@
+from src.news_mailer.service.mail.prompt_packer import (
+    MIN_SNIPPET_CHARS,
+    estimate_tokens,
+    pack_articles,
+)
+
+FIXED = "Write a digest of the news below.\n"
+
+
+def _article(n, topic, chars=400):
+    return {
+        "title": f"Headline {n}",
+        "url": f"https://example.com/{n}",
+        "content": f"word{n} " * (chars // 6),
+        "topic": topic,
+    }
+
+
+def test_everything_fits():
+    articles = [_article(n, "tech") for n in range(3)]
+    packed = pack_articles(articles, FIXED, 10_000, ["tech"], 400)
+
+    assert packed.articles == articles
+    assert packed.dropped == packed.trimmed == 0
+    assert packed.news_block.startswith("- [1] Headline 0")
+    assert "- [3] Headline 2" in packed.news_block
+
+
+def test_budget_is_respected():
+    articles = [_article(n, "tech") for n in range(20)]
+    budget = estimate_tokens(FIXED) + 300
+    packed = pack_articles(articles, FIXED, budget, ["tech"], 400)
+
+    assert 0 < len(packed.articles) < len(articles)
+    assert packed.dropped == len(articles) - len(packed.articles)
+    assert packed.estimated_tokens <= budget
+
+
+def test_required_topic_survives_a_tight_budget():
+    articles = [_article(n, "tech", chars=2000) for n in range(5)]
+    articles.append(_article(5, "science", chars=2000))
+    budget = estimate_tokens(FIXED) + 40
+    packed = pack_articles(articles, FIXED, budget, ["tech", "science"], 2000)
+
+    topics = [art["topic"] for art in packed.articles]
+    assert topics == ["tech", "science"]
+    # Kept in the original order and renumbered from 1.
+    assert packed.articles[0] is articles[0]
+    assert "- [2] Headline 5" in packed.news_block
+
+
+def test_snippets_trimmed_before_dropping():
+    articles = [_article(0, "tech", chars=1200)]
+    budget = estimate_tokens(FIXED) + 100
+    packed = pack_articles(articles, FIXED, budget, [], 1200)
+
+    assert packed.trimmed == 1
+    snippet = packed.snippets[0]
+    assert MIN_SNIPPET_CHARS <= len(snippet) < 1200
+    assert snippet.endswith("…")
+
+
+def test_non_positive_budget_only_caps_snippets():
+    articles = [_article(n, "tech", chars=1200) for n in range(10)]
+    packed = pack_articles(articles, FIXED, 0, [], 200)
+
+    assert len(packed.articles) == 10
+    assert all(len(snippet) <= 201 for snippet in packed.snippets)
@@ -0,0 +1,164 @@
+import threading
+import time
+
+import pytest
+
+from src.news_mailer.utils import rate_limit
+from src.news_mailer.utils.rate_limit import (
+    ProviderBudget,
+    ProviderLimiter,
+    QuotaExceeded,
+    QuotaStore,
+    RateLimited,
+    TokenBucket,
+    get_rate_limiter,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return QuotaStore(tmp_path / "quota.json")
+
+
+def test_token_bucket_try_acquire_and_give_back():
+    bucket = TokenBucket(rate=0.001, burst=2)
+
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    bucket.give_back()
+    assert bucket.try_acquire()
+
+
+def test_try_reserve_never_overshoots_under_threads(store):
+    results = []
+    barrier = threading.Barrier(16)
+
+    def worker():
+        barrier.wait()
+        for _ in range(10):
+            results.append(store.try_reserve("newsapi", 1, 50))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 50
+    assert store.used("newsapi") == 50
+
+
+def test_refund_and_persistence(tmp_path, store):
+    assert store.try_reserve("brevo", 3, 0)
+    store.refund("brevo", 1)
+    store.refund("other", 5)
+    store.save()
+
+    reloaded = QuotaStore(tmp_path / "quota.json")
+    assert reloaded.used("brevo") == 2
+    assert reloaded.used("other") == 0
+
+
+def test_update_deferred_only_touches_given_items(store):
+    store.update_deferred("newsapi", ["eu:tech", "us:tech"])
+    assert store.update_deferred("newsapi", ["eu:science"], remove=["eu:tech"]) == [
+        "us:tech",
+        "eu:science",
+    ]
+    # Re-deferring an item moves it to the end instead of duplicating it.
+    assert store.update_deferred("newsapi", ["us:tech"]) == ["eu:science", "us:tech"]
+
+
+def test_slot_charges_quota_and_refund_returns_it(store):
+    limiter = ProviderLimiter("newsapi", ProviderBudget(daily_quota=2), store)
+
+    with limiter.slot():
+        pass
+    with limiter.slot():
+        pass
+    assert limiter.remaining() == 0
+    with pytest.raises(QuotaExceeded):
+        with limiter.slot():
+            pass
+
+    limiter.refund()
+    assert limiter.remaining() == 1
+
+
+def test_try_acquire_charges_nothing_when_busy(store):
+    limiter = ProviderLimiter(
+        "gemini", ProviderBudget(max_concurrency=1, daily_quota=10), store
+    )
+
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    assert limiter.remaining() == 9
+
+    limiter.release()
+    assert limiter.try_acquire()
+    limiter.release()
+    assert limiter.remaining() == 8
+
+
+def test_try_acquire_gives_back_rate_budget_when_quota_is_spent(store):
+    limiter = ProviderLimiter(
+        "gemini",
+        ProviderBudget(requests_per_second=0.001, burst=1, daily_quota=1),
+        store,
+    )
+    store.add("gemini", 1)
+
+    assert not limiter.try_acquire()
+    # The request token was returned, so a later call is only blocked by quota.
+    assert limiter._requests.try_acquire()
+
+
+def test_429_halves_concurrency_and_starts_cooldown(store):
+    limiter = ProviderLimiter(
+        "gemini", ProviderBudget(max_concurrency=4, max_wait=1.0), store
+    )
+
+    assert limiter.record(429, {"Retry-After": "30"}) == 30
+    assert limiter.concurrency == 2
+    assert not limiter.try_acquire()
+    with pytest.raises(RateLimited):
+        with limiter.slot():
+            pass
+
+    store.set_cooldown("gemini", 0)
+    # Successes grow the cap back by about one per round of requests.
+    for _ in range(10):
+        limiter.record(200)
+    assert limiter.concurrency == 4
+
+
+def test_remaining_header_resyncs_quota(store):
+    limiter = ProviderLimiter("newsapi", ProviderBudget(daily_quota=100), store)
+
+    limiter.record(200, {"X-RateLimit-Remaining": "40"})
+    assert limiter.remaining() == 40
+
+
+def test_concurrent_first_calls_share_one_limiter(monkeypatch):
+    real_budget = rate_limit._budget
+
+    def slow_budget(provider):
+        time.sleep(0.05)  # widen the window in which threads miss the cache
+        return real_budget(provider)
+
+    monkeypatch.setattr(rate_limit, "_budget", slow_budget)
+    barrier = threading.Barrier(8)
+    limiters = []
+
+    def worker():
+        barrier.wait()
+        limiters.append(get_rate_limiter("gemini"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(limiter) for limiter in limiters}) == 1
@@ -0,0 +1,51 @@
+import time
+
+from src.news_mailer.service.news.state import SeenUrlStore, WatermarkStore
+
+
+def test_watermarks_only_move_forward_and_persist(tmp_path):
+    path = tmp_path / "watermarks.json"
+    marks = WatermarkStore(path)
+    marks.advance(
+        [
+            {"topic": "stocks", "publishedAt": "2026-10-16T08:00:00Z"},
+            {"topic": "stocks", "publishedAt": "2026-10-17T08:00:00Z"},
+            {"topic": "stocks", "publishedAt": "2026-10-15T08:00:00Z"},
+            {"topic": "energy", "publishedAt": None},
+        ]
+    )
+    marks.save()
+
+    reloaded = WatermarkStore(path)
+    assert reloaded.as_dict() == {"stocks": "2026-10-17T08:00:00Z"}
+    reloaded.advance([{"topic": "stocks", "publishedAt": "2026-10-01T00:00:00Z"}])
+    assert reloaded.get("stocks") == "2026-10-17T08:00:00Z"
+
+
+def test_seen_urls_filter_and_persist(tmp_path):
+    path = tmp_path / "seen_urls.json"
+    seen = SeenUrlStore(path)
+    seen.add(["https://example.com/a", ""])
+    seen.save()
+
+    reloaded = SeenUrlStore(path)
+    articles = [{"url": "https://example.com/a"}, {"url": "https://example.com/b"}]
+    assert len(reloaded) == 1
+    assert reloaded.filter_unseen(articles) == [{"url": "https://example.com/b"}]
+
+
+def test_seen_urls_expire(tmp_path):
+    path = tmp_path / "seen_urls.json"
+    seen = SeenUrlStore(path, max_age_days=1)
+    seen.add(["https://example.com/a"])
+    seen._seen = {h: time.time() - 2 * 86400 for h in seen._seen}
+    seen.save()
+
+    assert "https://example.com/a" not in SeenUrlStore(path, max_age_days=1)
+
+
+def test_unreadable_state_starts_empty(tmp_path):
+    path = tmp_path / "watermarks.json"
+    path.write_text("{not json", encoding="utf-8")
+
+    assert WatermarkStore(path).as_dict() == {}